@@ -7,7 +7,7 @@ from sqlalchemy.exc import NoResultFound
 from api.v1.dependencies import get_oauth_state_dep
 from api.v1.models import OauthProviders, OauthState, Tokens
 from core.dependencies import AuthJWTDep, check_auth_dep, oauth2_scheme, optional_token_payload_dep, token_payload_dep
-from core.jwt_manage import create_tokens, get_user_by_jti, revoke_all_tokens, revoke_tokens
+from core.jwt_manage import create_tokens, revoke_all_tokens, revoke_tokens, rotate_tokens
 from core.oauth_provider import OauthProviderFactory
 from core.user_oauth import add_provider, del_provider, get_oauth_user
 from db.models import Users
@@ -22,7 +22,7 @@ async def login(
     authorize: AuthJWTDep,
     user: Users = Depends(check_auth_dep),
 ) -> Tokens:
-    access_token, refresh_token = await create_tokens(user)
+    access_token, refresh_token = await create_tokens(user.id)
     return Tokens(access_token=access_token, refresh_token=refresh_token)
 
 
@@ -33,17 +33,14 @@ async def refresh(authorize: AuthJWTDep):
     """
     await authorize.jwt_refresh_token_required()  # check refresh token
     raw_refresh = await authorize.get_raw_jwt()
-    # check refresh token in database
+    # check refresh token in database and replace it in one transaction
     try:
-        user = await get_user_by_jti(raw_refresh["jti"])
+        new_access_token, new_refresh_token = await rotate_tokens(raw_refresh["jti"])
     except NoResultFound:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token has been revoked",
         )
-    await revoke_tokens(raw_refresh["jti"])
-
-    new_access_token, new_refresh_token = await create_tokens(user)
 
     return Tokens(access_token=new_access_token, refresh_token=new_refresh_token)
 
@@ -86,7 +83,7 @@ async def oauth(
     else:
         user = await get_oauth_user(provider_info)
 
-    new_access_token, new_refresh_token = await create_tokens(user)
+    new_access_token, new_refresh_token = await create_tokens(user.id)
     return Tokens(access_token=new_access_token, refresh_token=new_refresh_token)
 
 
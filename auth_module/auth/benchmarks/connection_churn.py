@@ -0,0 +1,141 @@
+"""Задержка обращений к базе при входе пользователя: соединение на сессию (NullPool) против пула соединений.
+
+Каждый вход повторяет работу /login с базой: сессия проверки пользователя (выбор по логину с ролями и
+правами, запись в историю входов) и сессия выдачи токенов (запись токена).
+Проверка пароля и подпись JWT в замер не входят, они одинаковы в обоих режимах. Для каждого режима
+выводятся средняя задержка входа, p50, p99 и число открытых соединений с Postgres.
+
+Нужна база сервиса со схемой auth, для замера создается и затем удаляется отдельный пользователь.
+Запуск из каталога сервиса: python -m benchmarks.connection_churn --logins 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+from contextlib import AsyncExitStack, asynccontextmanager
+from statistics import mean, quantiles
+from time import perf_counter
+from typing import AsyncIterator
+from uuid import uuid4
+
+from redis import asyncio as redis_async
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from core import password_hasher
+from core.config import PostgresSettings, settings
+from db import redis
+from db.postgres import engine_options
+from models.tokens import Token
+from models.users import ExtendedUser, UserAuthHistory
+from services.repository import TokensService, UserAuthHistoryService, UsersAdminService
+
+
+def make_engine(postgres_settings: PostgresSettings) -> tuple[AsyncEngine, list[int]]:
+    engine = create_async_engine(str(postgres_settings.dsn), future=True, **engine_options(postgres_settings))
+    connects = [0]
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def count_connect(*args: object) -> None:
+        connects[0] += 1
+
+    return engine, connects
+
+
+async def login(session_factory: async_sessionmaker[AsyncSession], username: str) -> None:
+    async with session_factory() as session:
+        user = await UsersAdminService(session).get_by_login(username)
+        await UserAuthHistoryService(session).create(
+            UserAuthHistory(user_id=user.id, ip_address="127.0.0.1", user_agent="connection-churn-benchmark"),
+        )
+    async with session_factory() as tokens_session:
+        await TokensService(tokens_session).create(Token(jti=str(uuid4()), user_id=user.id))
+
+
+async def measure(
+    postgres_settings: PostgresSettings,
+    username: str,
+    logins: int,
+    concurrency: int,
+) -> dict[str, float]:
+    engine, connects = make_engine(postgres_settings)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    semaphore = asyncio.Semaphore(concurrency)
+    timings: list[float] = []
+
+    async def one_login() -> None:
+        async with semaphore:
+            start = perf_counter()
+            await login(session_factory, username)
+            timings.append(perf_counter() - start)
+
+    started = perf_counter()
+    await asyncio.gather(*(one_login() for _ in range(logins)))
+    elapsed = perf_counter() - started
+    await engine.dispose()
+    percentiles = quantiles(timings, n=100)
+    return {
+        "mean_ms": mean(timings) * 1000,
+        "p50_ms": percentiles[49] * 1000,
+        "p99_ms": percentiles[98] * 1000,
+        "logins_per_sec": logins / elapsed,
+        "connections": connects[0],
+    }
+
+
+def format_result(mode: str, result: dict[str, float]) -> str:
+    return "  ".join((
+        f"{mode:<9} mean {result['mean_ms']:7.2f} ms",
+        f"p50 {result['p50_ms']:7.2f} ms",
+        f"p99 {result['p99_ms']:7.2f} ms",
+        f"{result['logins_per_sec']:8.1f} logins/s",
+        f"{result['connections']} connections",
+    ))
+
+
+@asynccontextmanager
+async def benchmark_user(engine: AsyncEngine) -> AsyncIterator[str]:
+    """Отдельный пользователь для замера, удаляется после него"""
+    username = f"churn-{uuid4().hex[:12]}"
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        user = await UsersAdminService(session).create(
+            ExtendedUser(
+                username=username,
+                email=f"{username}@example.com",
+                password=uuid4().hex,
+                first_name="Connection",
+                last_name="Churn",
+                roles=[],
+                permissions=[],
+            ),
+        )
+    try:
+        yield username
+    finally:
+        async with AsyncSession(engine) as cleanup_session:
+            await UsersAdminService(cleanup_session).delete(user.id)
+
+
+async def main(args: argparse.Namespace) -> None:
+    password_hasher.password_hasher = password_hasher.PasswordHasher(method=settings.password.method, workers=1)
+    redis.redis_interface = redis_async.from_url(str(settings.redis.dsn), encoding="utf8", decode_responses=True)
+    setup_engine, _ = make_engine(settings.postgres)
+    modes = {
+        "nullpool": settings.postgres.model_copy(update={"pool_enabled": False, "pgbouncer": False}),
+        "pool": settings.postgres.model_copy(
+            update={"pool_enabled": True, "pgbouncer": False, "pool_size": args.pool_size},
+        ),
+    }
+    async with AsyncExitStack() as stack:
+        stack.push_async_callback(redis.redis_interface.close)
+        stack.push_async_callback(setup_engine.dispose)
+        username = await stack.enter_async_context(benchmark_user(setup_engine))
+        for mode, postgres_settings in modes.items():
+            result = await measure(postgres_settings, username, args.logins, args.concurrency)
+            print(format_result(mode, result))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--pool-size", type=int, default=settings.postgres.pool_size)
+    asyncio.run(main(parser.parse_args()))
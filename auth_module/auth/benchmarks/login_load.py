@@ -0,0 +1,111 @@
+"""Одновременные входы: проверка пароля в цикле событий против проверки в пуле PasswordHasher.
+
+Каждый вход повторяет шаги check_auth_dep: выбор пользователя (заглушка с задержкой --db-latency-ms),
+проверка пароля и перехэширование, если хэш вычислен не с --method. Параллельно зонд раз в 10 мс
+измеряет, на сколько опаздывает цикл событий, - столько же ждал бы любой другой запрос к сервису.
+Для каждого режима выводятся p50 и p99 входа, число отказов 429 и p99 и максимум опоздания цикла.
+
+Запуск из каталога сервиса: python -m benchmarks.login_load --logins 200 --concurrency 50
+"""
+import argparse
+import asyncio
+from statistics import quantiles
+from time import perf_counter
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from core.password_hasher import PasswordHasher, PasswordHasherBusyError
+
+PASSWORD = "Benchmark1password"
+PROBE_INTERVAL = 0.01
+
+
+async def probe_loop_lag(lags: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(perf_counter() - start - PROBE_INTERVAL)
+
+
+async def login_inline(password_hash: str, method: str, db_latency: float) -> None:
+    await asyncio.sleep(db_latency)
+    if not check_password_hash(password_hash, PASSWORD):
+        raise ValueError("wrong password")
+    if password_hash.split("$", 1)[0] != method:
+        generate_password_hash(PASSWORD, method)
+
+
+async def login_pooled(hasher: PasswordHasher, password_hash: str, db_latency: float) -> None:
+    await asyncio.sleep(db_latency)
+    if not await hasher.verify(password_hash, PASSWORD):
+        raise ValueError("wrong password")
+    if hasher.needs_rehash(password_hash):
+        await hasher.hash(PASSWORD)
+
+
+def percentile_ms(values: list[float], percentile: int) -> float:
+    if not values:
+        return 0
+    if len(values) < 2:
+        return values[0] * 1000
+    return quantiles(values, n=100, method="inclusive")[percentile - 1] * 1000
+
+
+async def measure(mode: str, args: argparse.Namespace, password_hash: str) -> None:
+    hasher = PasswordHasher(
+        method=args.method,
+        executor=args.executor,
+        workers=args.workers,
+        max_pending=args.max_pending,
+    )
+    semaphore = asyncio.Semaphore(args.concurrency)
+    db_latency = args.db_latency_ms / 1000
+    timings: list[float] = []
+    lags: list[float] = []
+    rejected = 0
+
+    async def one_login() -> None:
+        nonlocal rejected
+        async with semaphore:
+            start = perf_counter()
+            try:
+                if mode == "inline":
+                    await login_inline(password_hash, args.method, db_latency)
+                else:
+                    await login_pooled(hasher, password_hash, db_latency)
+            except PasswordHasherBusyError:
+                rejected += 1
+                return
+            timings.append(perf_counter() - start)
+
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_loop_lag(lags, stop))
+    await asyncio.gather(*(one_login() for _ in range(args.logins)))
+    stop.set()
+    await probe
+    hasher.close()
+    print("  ".join((
+        f"{mode:<7} login p50 {percentile_ms(timings, 50):8.1f} ms",
+        f"p99 {percentile_ms(timings, 99):8.1f} ms",
+        f"429: {rejected:<5} loop lag p99 {percentile_ms(lags, 99):8.1f} ms",
+        f"max {max(lags, default=0) * 1000:8.1f} ms",
+    )))
+
+
+async def main(args: argparse.Namespace) -> None:
+    password_hash = generate_password_hash(PASSWORD, args.stored_method or args.method)
+    for mode in ("inline", "pooled"):
+        await measure(mode, args, password_hash)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--method", default="scrypt:32768:8:1")
+    parser.add_argument("--stored-method", help="метод хранимого хэша, по умолчанию --method (без перехэширования)")
+    parser.add_argument("--executor", choices=("thread", "process"), default="thread")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-pending", type=int, default=32)
+    parser.add_argument("--db-latency-ms", type=float, default=2)
+    asyncio.run(main(parser.parse_args()))
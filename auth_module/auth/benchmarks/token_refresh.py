@@ -0,0 +1,138 @@
+"""Пропускная способность /refresh в базе: прежняя последовательность сессий против TokensService.rotate.
+
+В режиме sessions замена токена повторяет прежний /refresh: поиск токена, его удаление, вставка нового
+и удаление устаревших токенов пользователя в трех сессиях, в режиме rotate - один запрос в одной
+транзакции, устаревшие токены удаляет services.compaction. Каждый из --concurrency клиентов по очереди
+заменяет свой токен, подпись JWT и запись в Redis в замер не входят, они одинаковы в обоих режимах.
+Выводятся замены в секунду, p50, p99 и число SQL-запросов на одну замену.
+
+Нужна база сервиса со схемой auth, для замера создается и затем удаляется отдельный пользователь.
+Запуск из каталога сервиса: python -m benchmarks.token_refresh --refreshes 5000 --concurrency 20
+"""
+import argparse
+import asyncio
+from contextlib import AsyncExitStack, asynccontextmanager
+from datetime import datetime, timedelta
+from statistics import quantiles
+from time import perf_counter
+from typing import AsyncIterator
+from uuid import UUID, uuid4
+
+from redis import asyncio as redis_async
+from sqlalchemy import delete, event
+
+from core import password_hasher
+from core.config import settings
+from db import redis
+from db.models import Tokens
+from db.postgres import async_session, engine
+from models.tokens import Token
+from models.users import ExtendedUser
+from services.repository import TokensService, UsersAdminService
+
+
+def expired_before() -> datetime:
+    return datetime.now() - timedelta(hours=settings.jwt.refresh_token_expires_hours)
+
+
+async def delete_user_expire_tokens(token_service: TokensService, user_id: UUID) -> None:
+    """Удаление устаревших токенов, выполнявшееся раньше при каждой выдаче токенов"""
+    stmt = delete(Tokens).where(Tokens.user_id == user_id, Tokens.created_at < expired_before())
+    await token_service.session.execute(stmt)
+    await token_service.session.commit()
+
+
+async def refresh_sessions(jti: str) -> str:
+    async with async_session() as session:
+        token = await TokensService(session).get_by_jti(jti=jti)
+        user_id = token.user_id
+    async with async_session() as delete_session:
+        await TokensService(delete_session).delete_by_jti(jti)
+    new_jti = str(uuid4())
+    async with async_session() as create_session:
+        token_service = TokensService(create_session)
+        await token_service.create(Token(jti=new_jti, user_id=user_id))
+        await delete_user_expire_tokens(token_service, user_id)
+    return new_jti
+
+
+async def refresh_rotate(jti: str) -> str:
+    new_jti = str(uuid4())
+    async with async_session() as session:
+        await TokensService(session).rotate(jti=jti, new_jti=new_jti)
+    return new_jti
+
+
+async def measure(mode: str, user_id: UUID, refreshes: int, concurrency: int) -> None:
+    refresh = refresh_rotate if mode == "rotate" else refresh_sessions
+    statements = [0]
+
+    def count_statement(*args: object) -> None:
+        statements[0] += 1
+
+    async with async_session() as session:
+        token_service = TokensService(session)
+        jtis = [str(uuid4()) for _ in range(concurrency)]
+        for jti in jtis:
+            await token_service.create(Token(jti=jti, user_id=user_id))
+    timings: list[float] = []
+
+    async def client(jti: str, count: int) -> None:
+        for _ in range(count):
+            start = perf_counter()
+            jti = await refresh(jti)
+            timings.append(perf_counter() - start)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+    started = perf_counter()
+    await asyncio.gather(*(client(first_jti, refreshes // concurrency) for first_jti in jtis))
+    elapsed = perf_counter() - started
+    event.remove(engine.sync_engine, "before_cursor_execute", count_statement)
+    percentiles = quantiles(timings, n=100)
+    print("  ".join((
+        f"{mode:<8} {len(timings) / elapsed:8.1f} refreshes/s",
+        f"p50 {percentiles[49] * 1000:7.2f} ms",
+        f"p99 {percentiles[98] * 1000:7.2f} ms",
+        f"{statements[0] / len(timings):.1f} statements/refresh",
+    )))
+
+
+@asynccontextmanager
+async def benchmark_user() -> AsyncIterator[UUID]:
+    """Отдельный пользователь для замера, удаляется после него"""
+    username = f"refresh-{uuid4().hex[:12]}"
+    async with async_session() as session:
+        user = await UsersAdminService(session).create(
+            ExtendedUser(
+                username=username,
+                email=f"{username}@example.com",
+                password=uuid4().hex,
+                first_name="Token",
+                last_name="Refresh",
+                roles=[],
+                permissions=[],
+            ),
+        )
+    try:
+        yield user.id
+    finally:
+        async with async_session() as cleanup_session:
+            await UsersAdminService(cleanup_session).delete(user.id)
+
+
+async def main(args: argparse.Namespace) -> None:
+    password_hasher.password_hasher = password_hasher.PasswordHasher(method=settings.password.method, workers=1)
+    redis.redis_interface = redis_async.from_url(str(settings.redis.dsn), encoding="utf8", decode_responses=True)
+    async with AsyncExitStack() as stack:
+        stack.push_async_callback(redis.redis_interface.close)
+        stack.push_async_callback(engine.dispose)
+        user_id = await stack.enter_async_context(benchmark_user())
+        for mode in ("sessions", "rotate"):
+            await measure(mode, user_id, args.refreshes, args.concurrency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--refreshes", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
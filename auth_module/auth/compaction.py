@@ -0,0 +1,38 @@
+import asyncio
+import logging
+from contextlib import AsyncExitStack
+
+from core.config import settings
+from db.postgres import engine
+from services.compaction import AuthCompactor
+
+logger = logging.getLogger("compaction")
+
+
+async def compact_forever(compactor: AuthCompactor) -> None:
+    while True:
+        try:
+            await compactor.run()
+        except Exception:
+            logger.exception("Compaction failed, retrying in %d seconds.", settings.compaction.interval)
+        await asyncio.sleep(settings.compaction.interval)
+
+
+async def main() -> None:
+    compactor = AuthCompactor(
+        engine,
+        tokens_ttl=settings.jwt.authjwt_refresh_token_expires,
+        tokens_batch_size=settings.compaction.tokens_batch_size,
+        batch_pause=settings.compaction.batch_pause,
+        history_retention_months=settings.compaction.history_retention_months,
+        partitions_ahead=settings.compaction.partitions_ahead,
+        archive_dir=settings.compaction.archive_dir,
+    )
+    async with AsyncExitStack() as stack:
+        stack.push_async_callback(engine.dispose)
+        await compact_forever(compactor)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    asyncio.run(main())
@@ -1,6 +1,7 @@
 import os
 from datetime import timedelta
 from functools import cached_property
+from typing import Literal
 from uuid import UUID
 
 from async_fastapi_jwt_auth import AuthJWT
@@ -36,6 +37,14 @@ class AuthSettings(BaseSettings):
 class PostgresSettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="postgres_")
     dsn: PostgresDsn
+    pool_enabled: bool = True
+    pool_size: int = 10
+    max_overflow: int = 10
+    pool_timeout: float = 30
+    pool_pre_ping: bool = True
+    pool_recycle: int = 1800
+    statement_cache_size: int = 100
+    pgbouncer: bool = False
 
 
 class NotificationSettings(BaseSettings):
@@ -71,6 +80,43 @@ class JwtSettings(BaseSettings):
         return timedelta(hours=self.refresh_token_expires_hours)
 
 
+class PasswordSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="password_")
+    algorithm: Literal["scrypt", "pbkdf2"] = "scrypt"
+    scrypt_n: int = 32768
+    scrypt_r: int = 8
+    scrypt_p: int = 1
+    pbkdf2_hash: str = "sha256"
+    pbkdf2_iterations: int = 600000
+    salt_length: int = 16
+    executor: Literal["thread", "process"] = "thread"
+    workers: int = 4
+    max_pending: int = 32
+
+    @computed_field
+    @cached_property
+    def method(self) -> str:
+        if self.algorithm == "scrypt":
+            return f"scrypt:{self.scrypt_n}:{self.scrypt_r}:{self.scrypt_p}"
+        return f"pbkdf2:{self.pbkdf2_hash}:{self.pbkdf2_iterations}"
+
+
+class RbacCacheSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="rbac_cache_")
+    enabled: bool = True
+    ttl: int = 3600
+
+
+class CompactionSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="compaction_")
+    interval: int = 3600
+    tokens_batch_size: int = 1000
+    batch_pause: float = 0.1
+    history_retention_months: int = 12
+    partitions_ahead: int = 3
+    archive_dir: str | None = None
+
+
 class BaseOauth(BaseSettings):
     client_id: str
     client_secret: str
@@ -116,10 +162,27 @@ class SentrySettings(BaseSettings):
     enable_tracing: bool = False
 
 
+class HttpClientSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="http_client_")
+    limit: int = 100
+    limit_per_host: int = 20
+    dns_cache_ttl: int = 300
+    keepalive_timeout: float = 30
+    timeout: float = 10
+    connect_timeout: float = 3
+    retries: int = 2
+    retry_backoff: float = 0.1
+    retry_budget_ratio: float = 0.2
+    retry_budget_max: float = 10
+
+
 class AppSettings:
     redis = RedisSettings()
     postgres = PostgresSettings()
     jwt = JwtSettings()
+    password = PasswordSettings()
+    rbac_cache = RbacCacheSettings()
+    compaction = CompactionSettings()
     auth = AuthSettings()
     app = FastApiSettings()
     oauth_yandex = OauthYandex()
@@ -131,6 +194,7 @@ class AppSettings:
     sentry: SentrySettings = SentrySettings()
     service_role: str = 'service'
     notification = NotificationSettings()
+    http_client = HttpClientSettings()
 
 
 settings = AppSettings()
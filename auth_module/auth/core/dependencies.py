@@ -5,6 +5,7 @@ from async_fastapi_jwt_auth import AuthJWT
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 
+from core import password_hasher
 from core.config import AppSettings
 from db.models import Users
 from db.postgres import async_session
@@ -53,8 +54,12 @@ async def check_auth_dep(
         except Exception:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
 
-        if not user.check_password(auth_data.password):
+        hasher = password_hasher.password_hasher
+        if not await hasher.verify(user.password, auth_data.password):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+        if hasher.needs_rehash(user.password):
+            # Новый хэш сохранится вместе с записью в историю входов
+            user.password = await hasher.hash(auth_data.password)
 
         await logging_user_auth(user, request, auth_history_service)
     return user
@@ -1,12 +1,11 @@
 from contextlib import suppress
-from datetime import datetime, timedelta
-from uuid import uuid4
+from uuid import UUID, uuid4
 
 from async_fastapi_jwt_auth import AuthJWT
 
-from core.config import AppSettings, settings
+from core.config import settings
+from core.rbac_cache import get_user_rbac
 from db import redis
-from db.models import Users
 from db.postgres import async_session
 from models.tokens import Token
 from services.repository import TokensService
@@ -34,38 +33,32 @@ async def revoke_tokens(jti: str):
     await revoke_access(jti)
 
 
-async def create_tokens(user: Users) -> tuple[str, str]:
+async def sign_tokens(user_id: UUID, jti: str) -> tuple[str, str]:
     auth = AuthJWT()
-    access_token_data = {
-        "roles": ",".join([role.name for role in user.roles]),
-        "permissions": ",".join(permission.name for permission in user.permissions),
-    }
-    refresh_token_data = {}
+    rbac = await get_user_rbac(user_id)
+    # access и refresh токены имеют общий jti
+    access_token = await auth.create_access_token(
+        subject=str(user_id),
+        user_claims={"roles": ",".join(rbac.roles), "permissions": ",".join(rbac.permissions), "jti": jti},
+    )
+    refresh_token = await auth.create_refresh_token(subject=str(user_id), user_claims={"jti": jti})
+    return access_token, refresh_token
 
-    # creating a common jti
-    jti = str(uuid4())
-    access_token_data["jti"] = jti
-    refresh_token_data["jti"] = jti
 
+async def create_tokens(user_id: UUID) -> tuple[str, str]:
+    jti = str(uuid4())
     async with async_session() as session:
-        token_service = TokensService(session)
-
-        access_token = await auth.create_access_token(
-            subject=str(user.id),
-            user_claims=access_token_data,
-        )
-        refresh_token = await auth.create_refresh_token(
-            subject=str(user.id),
-            user_claims=refresh_token_data,
-        )
+        await TokensService(session).create(Token(jti=jti, user_id=user_id))
+    return await sign_tokens(user_id, jti)
 
-        await token_service.create(Token(jti=jti, user_id=user.id))
-        await token_service.delete_user_expire_tokens(
-            entity_id=user.id,
-            before_created=datetime.now() - timedelta(hours=AppSettings.jwt.refresh_token_expires_hours),
-        )
 
-    return access_token, refresh_token
+async def rotate_tokens(jti: str) -> tuple[str, str]:
+    """Замена refresh токена новой парой токенов в одной транзакции, NoResultFound - токен уже отозван"""
+    new_jti = str(uuid4())
+    async with async_session() as session:
+        user_id = await TokensService(session).rotate(jti=jti, new_jti=new_jti)
+    await revoke_access(jti)
+    return await sign_tokens(user_id, new_jti)
 
 
 async def revoke_all_tokens(user_id: str) -> None:
@@ -76,10 +69,3 @@ async def revoke_all_tokens(user_id: str) -> None:
         )
         for token in tokens:
             await revoke_tokens(token.jti)
-
-
-async def get_user_by_jti(jti: str):
-    async with async_session() as session:
-        token_service = TokensService(session)
-        token = await token_service.get_by_jti(jti=jti)
-        return token.user
@@ -1,8 +1,9 @@
 import json
+import logging
 from datetime import timedelta
 from uuid import UUID, uuid4
-import aiohttp
 
+from core import http_client
 from db import redis
 from fastapi import HTTPException, status
 from models.users import User
@@ -10,12 +11,13 @@ from services.repository import UsersService
 
 from core.config import settings
 
+logger = logging.getLogger(__name__)
+
 
 async def generate_short_link(link):
     api_url = 'http://tinyurl.com/api-create.php'
-    async with aiohttp.ClientSession() as session:
-        async with session.get(api_url, params={"url": link}) as response:
-            return await response.text()
+    async with http_client.http_client.get(api_url, params={"url": link}) as response:
+        return await response.text()
 
 
 async def send_confirm_email(user_id: UUID, email: str, request_id: str):
@@ -28,18 +30,19 @@ async def send_confirm_email(user_id: UUID, email: str, request_id: str):
         json.dumps({"user_id": str(user_id), "email": email}),
     )
     link = await generate_short_link(f"{settings.auth.email_confirm_url}{confirm_request_id}")
-    async with aiohttp.ClientSession() as session:
-        await session.post(
-            str(settings.notification.email_confirm_endpoint),
-            params={
-                "user_id": str(user_id),
-                "pattern_id": str(settings.notification.email_pattern),
-                "worker": "email",
-                "urgently": str(True),
-            },
-            json={"link_confirm": link},
-            headers={"X-Request-Id": request_id},
-        )
+    async with http_client.http_client.post(
+        str(settings.notification.email_confirm_endpoint),
+        params={
+            "user_id": str(user_id),
+            "pattern_id": str(settings.notification.email_pattern),
+            "worker": "email",
+            "urgently": str(True),
+        },
+        json={"link_confirm": link},
+        headers={"X-Request-Id": request_id},
+    ) as response:
+        if not response.ok:
+            logger.warning("Confirm email for user %s is not sent: %s", user_id, response.status)
 
 
 async def set_confirm_email(request_id: UUID, user_service: UsersService):
@@ -0,0 +1,79 @@
+from __future__ import annotations
+import asyncio
+from contextlib import contextmanager
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterator, Literal
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+password_hasher: PasswordHasher
+
+
+async def get_password_hasher() -> PasswordHasher:
+    return password_hasher  # noqa
+
+
+class PasswordHasherBusyError(Exception):
+    pass  # noqa
+
+
+class PasswordHasher:
+    """Вычисление и проверка хэшей паролей вне цикла событий.
+
+    Хэширование занимает десятки миллисекунд процессора, поэтому выполняется в пуле из workers потоков
+    или процессов. В работе и очереди одновременно не больше max_pending паролей, при превышении
+    запрос сразу получает PasswordHasherBusyError вместо ожидания в растущей очереди.
+    """
+
+    def __init__(
+        self,
+        method: str,
+        salt_length: int = 16,
+        executor: Literal["thread", "process"] = "thread",
+        workers: int = 4,
+        max_pending: int = 32,
+    ):
+        self.method = method
+        self.salt_length = salt_length
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Executor
+        if executor == "process":
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hasher")
+
+    async def hash(self, password: str) -> str:
+        return await self._run(generate_password_hash, password, self.method, self.salt_length)
+
+    async def verify(self, password_hash: str | None, password: str) -> bool:
+        if not password_hash:
+            return False
+        return await self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash: str | None) -> bool:
+        """Хэш вычислен с другим алгоритмом, стоимостью или длиной соли, чем заданы в настройках"""
+        if not password_hash:
+            return False
+        method, _, rest = password_hash.partition("$")
+        salt = rest.partition("$")[0]
+        return method != self.method or len(salt) != self.salt_length
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, func, *args):  # noqa
+        with self._pending_slot():
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    @contextmanager
+    def _pending_slot(self) -> Iterator[None]:
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordHasherBusyError()
+        self.pending += 1
+        try:
+            yield
+        finally:
+            self.pending -= 1
@@ -0,0 +1,76 @@
+from uuid import UUID
+
+from sqlalchemy import literal, select, union_all
+
+from core.config import settings
+from db import redis
+from db.models import Permissions, Roles, UsersPermissions, UsersRoles
+from db.postgres import async_session
+from models.access import RbacSnapshot
+
+# Снимок ролей и прав пользователя для выдачи токенов хранится в Redis с версией "общая:пользователя".
+# Изменение ролей и прав увеличивает общую версию, изменение пользователя - его версию, снимок
+# с устаревшей версией не используется. Версии читаются до запроса в базу, поэтому снимок, собранный
+# одновременно с изменением, сохраняется со старой версией и при следующем чтении перестраивается.
+VERSION_KEY = "rbac:version"
+
+
+def _snapshot_key(user_id: UUID) -> str:
+    return f"rbac:user:{user_id}"
+
+
+def _user_version_key(user_id: UUID) -> str:
+    return f"rbac:version:{user_id}"
+
+
+async def load_user_rbac(user_id: UUID, version: str = "") -> RbacSnapshot:
+    """Имена ролей и прав пользователя одним запросом"""
+    stmt = union_all(
+        select(literal("role"), Roles.name).join(UsersRoles, UsersRoles.role_id == Roles.id).where(
+            UsersRoles.user_id == user_id,
+        ),
+        select(literal("permission"), Permissions.name).join(
+            UsersPermissions,
+            UsersPermissions.permission_id == Permissions.id,
+        ).where(UsersPermissions.user_id == user_id),
+    )
+    async with async_session() as session:
+        rows = (await session.execute(stmt)).all()
+    return RbacSnapshot(
+        version=version,
+        roles=sorted(name for kind, name in rows if kind == "role"),
+        permissions=sorted(name for kind, name in rows if kind == "permission"),
+    )
+
+
+async def get_user_rbac(user_id: UUID) -> RbacSnapshot:
+    if not settings.rbac_cache.enabled:
+        return await load_user_rbac(user_id)
+    global_version, user_version, raw_snapshot = await redis.redis_interface.mget(
+        VERSION_KEY,
+        _user_version_key(user_id),
+        _snapshot_key(user_id),
+    )
+    version = f"{global_version or 0}:{user_version or 0}"
+    if raw_snapshot:
+        snapshot = RbacSnapshot.model_validate_json(raw_snapshot)
+        if snapshot.version == version:
+            return snapshot
+    snapshot = await load_user_rbac(user_id, version)
+    await redis.redis_interface.set(_snapshot_key(user_id), snapshot.model_dump_json(), ex=settings.rbac_cache.ttl)
+    return snapshot
+
+
+async def invalidate_user_rbac(user_id: UUID) -> None:
+    if not settings.rbac_cache.enabled:
+        return
+    # Версия пользователя живет дольше снимков: после ее истечения не останется снимка с нулевой версией
+    async with redis.redis_interface.pipeline(transaction=False) as pipe:
+        pipe.incr(_user_version_key(user_id))
+        pipe.expire(_user_version_key(user_id), settings.rbac_cache.ttl * 2)
+        await pipe.execute()
+
+
+async def invalidate_all_rbac() -> None:
+    if settings.rbac_cache.enabled:
+        await redis.redis_interface.incr(VERSION_KEY)
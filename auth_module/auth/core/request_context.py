@@ -0,0 +1,40 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from opentelemetry import trace
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+REQUEST_ID_HEADER = "X-Request-Id"
+
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+
+@contextmanager
+def request_id_context(request_id: str | None) -> Iterator[None]:
+    token = request_id_var.set(request_id)
+    try:
+        yield
+    finally:
+        request_id_var.reset(token)
+
+
+class RequestContextMiddleware:
+    """Сохранение X-Request-Id входящего запроса в контекст на все время его обработки.
+
+    Контекст читают фильтр логов и span запроса OpenTelemetry.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_id = Headers(scope=scope).get(REQUEST_ID_HEADER)
+        if request_id:
+            trace.get_current_span().set_attribute("http.request_id", request_id)
+        with request_id_context(request_id):
+            await self.app(scope, receive, send)
@@ -1,6 +1,11 @@
 import asyncio
 from getpass import getpass
 
+from redis import asyncio as redis_async
+
+from core import password_hasher
+from core.config import settings
+from db import redis
 from db.postgres import async_session
 from models.access import ExtendedRole
 from models.users import ExtendedUser
@@ -8,6 +13,13 @@ from services.repository import RolesService, UsersAdminService
 
 
 async def create_superuser(username, email, password, first_name, last_name):
+    password_hasher.password_hasher = password_hasher.PasswordHasher(
+        method=settings.password.method,
+        salt_length=settings.password.salt_length,
+        workers=1,
+    )
+    # Создание роли сбрасывает снимки ролей в rbac_cache
+    redis.redis_interface = redis_async.from_url(str(settings.redis.dsn), encoding="utf8", decode_responses=True)
     async with async_session() as session:
         role_service = RolesService(session)
         role = ExtendedRole(name="admin", users=[], permissions=[])
@@ -27,6 +39,7 @@ async def create_superuser(username, email, password, first_name, last_name):
         )
         user_service = UsersAdminService(session)
         await user_service.create(superuser)
+    await redis.redis_interface.close()
 
 
 if __name__ == "__main__":
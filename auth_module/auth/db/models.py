@@ -3,11 +3,10 @@ from __future__ import annotations
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, Integer, ForeignKey, MetaData, String
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, ForeignKey, MetaData, String
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import DeclarativeBase, Mapped, relationship
-from werkzeug.security import check_password_hash, generate_password_hash
 
 
 class Base(DeclarativeBase):
@@ -60,12 +59,10 @@ class Users(Base):
         return self._password
 
     @password.setter
-    def password(self, password):  # noqa
-        if password:
-            self._password = generate_password_hash(password)  # noqa
-
-    def check_password(self, password: str) -> bool:
-        return check_password_hash(self._password, password)
+    def password(self, password_hash):  # noqa
+        # Хэш вычисляется заранее в PasswordHasher, чтобы не блокировать цикл событий
+        if password_hash:
+            self._password = password_hash  # noqa
 
     def __repr__(self) -> str:
         return f"<User {self.login}>"
@@ -145,9 +142,10 @@ class UsersAuthHistory(Base):
 
 class Tokens(Base):
     __tablename__ = "tokens"
+    __table_args__ = (Index("ix_tokens_created_at", "created_at"),)
 
     user_id = Column(ForeignKey("users.id", ondelete="CASCADE"))
-    jti = Column(String(255), nullable=False)
+    jti = Column(String(255), nullable=False, index=True)
 
     user: Mapped[Users | None] = relationship(back_populates="tokens")
 
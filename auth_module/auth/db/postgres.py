@@ -1,9 +1,12 @@
+from typing import Any
+from uuid import uuid4
+
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import NullPool
 from sqlalchemy.schema import CreateSchema
 
-from core.config import settings
+from core.config import PostgresSettings, settings
 from db.models import Base
 
 
@@ -18,12 +21,40 @@ async def purge_database() -> None:
         await conn.run_sync(Base.metadata.drop_all)
 
 
+def engine_options(postgres_settings: PostgresSettings) -> dict[str, Any]:
+    """Параметры движка по настройкам: пул соединений или соединение на сессию.
+
+    За PgBouncer в режиме transaction серверное соединение меняется между транзакциями, поэтому кэш
+    подготовленных запросов отключается, имена запросов делаются уникальными, а пулом занимается PgBouncer.
+    """
+    if postgres_settings.pgbouncer:
+        return {
+            "poolclass": NullPool,
+            "connect_args": {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            },
+        }
+    connect_args = {"prepared_statement_cache_size": postgres_settings.statement_cache_size}
+    if not postgres_settings.pool_enabled:
+        return {"poolclass": NullPool, "connect_args": connect_args}
+    return {
+        "pool_size": postgres_settings.pool_size,
+        "max_overflow": postgres_settings.max_overflow,
+        "pool_timeout": postgres_settings.pool_timeout,
+        "pool_pre_ping": postgres_settings.pool_pre_ping,
+        "pool_recycle": postgres_settings.pool_recycle,
+        "connect_args": connect_args,
+    }
+
+
 # Создаём базовый класс для будущих моделей
 
 # Создаём движок
 engine = create_async_engine(
     str(settings.postgres.dsn),
     future=True,
-    poolclass=NullPool,
+    **engine_options(settings.postgres),
 )
 async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
@@ -1,6 +1,6 @@
-import logging
 from contextlib import asynccontextmanager
 from logging import config as logging_config
+from typing import Any
 
 import sentry_sdk
 from async_fastapi_jwt_auth.exceptions import AuthJWTException
@@ -17,11 +17,13 @@ from api.v1.admin.roles import roles_id_router, roles_router
 from api.v1.tokens import open_token_router, token_router
 from api.v1.users import open_user_router, user_router
 from api.v1.email import email_router
+from core import http_client, password_hasher
 from core.config import settings
-from core.logger import LOGGING, RequestIdFilter
+from core.logger import LOGGING
+from core.request_context import RequestContextMiddleware
 from core.oauth_provider import OauthProviderFactory, UnknownOauthProviderError
 from core.user_oauth import EmptyProfileError
-from db import redis
+from db import postgres, redis
 from services.exceptions import AlreadyExistException
 from services.repository import DatabaseConnectionError
 
@@ -37,8 +39,19 @@ async def lifespan(_):
         encoding="utf8",
         decode_responses=True,
     )
+    http_client.http_client = http_client.HttpClient(**settings.http_client.model_dump())
+    password_hasher.password_hasher = password_hasher.PasswordHasher(
+        method=settings.password.method,
+        salt_length=settings.password.salt_length,
+        executor=settings.password.executor,
+        workers=settings.password.workers,
+        max_pending=settings.password.max_pending,
+    )
     yield
     await redis.redis_interface.close()
+    await http_client.http_client.close()
+    password_hasher.password_hasher.close()
+    await postgres.engine.dispose()
 
 
 tags_metadata = [
@@ -128,6 +141,15 @@ def database_not_found_exception_handler(request: Request, exc: NoResultFound):
     )
 
 
+@app.exception_handler(password_hasher.PasswordHasherBusyError)
+def password_hasher_busy_exception_handler(request: Request, exc: password_hasher.PasswordHasherBusyError):
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": "Too many password checks in progress, try again later"},
+        headers={"Retry-After": "1"},
+    )
+
+
 @app.exception_handler(AlreadyExistException)
 def already_exists_exception_handler(request: Request, exc: AlreadyExistException):
     return JSONResponse(
@@ -149,12 +171,7 @@ async def before_request(request: Request, call_next):
     return response
 
 
-@app.middleware("http")
-async def add_log_filter(request: Request, call_next):
-    for log_type in ("access", "error"):
-        logger = logging.getLogger("uvicorn.%s" % (log_type,))
-        logger.addFilter(RequestIdFilter(request))
-    return await call_next(request)
+app.add_middleware(RequestContextMiddleware)
 
 
 @app.get("/healthcheck")
@@ -162,7 +179,12 @@ async def health() -> None:
     return  # noqa
 
 
-FastAPIInstrumentor.instrument_app(app, excluded_urls="healthcheck")
+@app.get("/http-client/stats")
+async def http_client_stats() -> Any:
+    return http_client.http_client.stats
+
+
+FastAPIInstrumentor.instrument_app(app, excluded_urls="healthcheck,http-client/stats")
 
 
 @app.exception_handler(EmptyProfileError)
@@ -0,0 +1,63 @@
+"""tokens indexes and monthly user_auth_history partitions
+
+Revision ID: 5b1e7c2d9a40
+Revises: 88caa71825dc
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from datetime import date, datetime
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1e7c2d9a40'
+down_revision: Union[str, None] = '88caa71825dc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Дальнейшие месяцы создает services.compaction
+MONTHS_AHEAD = 3
+
+
+def month_start(months_from_now: int) -> date:
+    today = datetime.utcnow().date()
+    month = today.month - 1 + months_from_now
+    return date(today.year + month // 12, month % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    op.create_index("ix_tokens_jti", "tokens", ["jti"], schema="auth")
+    op.create_index("ix_tokens_created_at", "tokens", ["created_at"], schema="auth")
+    # Строки вне диапазонов секций попадают в секцию по умолчанию, а не дают ошибку при входе
+    op.execute("CREATE TABLE auth.user_auth_history_default PARTITION OF auth.user_auth_history DEFAULT")
+    for num in range(MONTHS_AHEAD + 1):
+        start, end = month_start(num), month_start(num + 1)
+        op.execute(
+            f"""
+            CREATE TABLE auth.user_auth_history_y{start.year}m{start.month:02d}
+            PARTITION OF auth.user_auth_history FOR VALUES FROM ('{start}') TO ('{end}')
+            """,
+        )
+
+
+def downgrade() -> None:
+    op.execute(
+        r"""
+        DO $$
+        DECLARE
+            part text;
+        BEGIN
+            FOR part IN
+                SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = 'auth.user_auth_history'::regclass
+                    AND c.relname ~ '^user_auth_history_y\d{4}m\d{2}$'
+            LOOP
+                EXECUTE format('DROP TABLE auth.%I', part);
+            END LOOP;
+        END $$
+        """,
+    )
+    op.execute("DROP TABLE auth.user_auth_history_default")
+    op.drop_index("ix_tokens_created_at", table_name="tokens", schema="auth")
+    op.drop_index("ix_tokens_jti", table_name="tokens", schema="auth")
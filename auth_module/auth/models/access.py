@@ -19,3 +19,9 @@ class Role(BaseModel):
 class ExtendedRole(Role):
     users: list[UUID]
     permissions: list[UUID]
+
+
+class RbacSnapshot(BaseModel):
+    version: str
+    roles: list[str]
+    permissions: list[str]
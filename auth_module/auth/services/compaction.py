@@ -0,0 +1,214 @@
+import asyncio
+import gzip
+import logging
+import re
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import AsyncIterator
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from db.models import Tokens
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = "auth"
+HISTORY_TABLE = "user_auth_history"
+DEFAULT_PARTITION = f"{HISTORY_TABLE}_default"
+# Ключ pg_advisory_lock: одновременно сжатие выполняет один процесс
+LOCK_KEY = 5170331
+PARTITIONS_QUERY = """
+    SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = CAST(:parent AS regclass)
+"""
+BOUNDS_RE = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+def month_start(day: date, months: int = 0) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+@dataclass
+class Partition:
+    name: str
+    start: date | None = None
+    end: date | None = None
+
+    @property
+    def is_default(self) -> bool:
+        return self.start is None
+
+
+class AuthCompactor:
+    """Фоновое сжатие данных auth вместо удаления на каждом входе.
+
+    Устаревшие токены удаляются порциями по tokens_batch_size с паузой между ними, чтобы не держать
+    долгих блокировок. История входов секционирована по месяцам: секции создаются на partitions_ahead
+    месяцев вперед, строки, попавшие в секцию по умолчанию, переносятся в созданные для них секции,
+    а секции старше history_retention_months выгружаются в archive_dir (csv.gz) и удаляются.
+    Без archive_dir старые секции не удаляются, чтобы история не терялась без выгрузки.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        tokens_ttl: timedelta,
+        tokens_batch_size: int = 1000,
+        batch_pause: float = 0.1,
+        history_retention_months: int = 12,
+        partitions_ahead: int = 3,
+        archive_dir: str | None = None,
+    ):
+        self.engine = engine
+        self.tokens_ttl = tokens_ttl
+        self.tokens_batch_size = tokens_batch_size
+        self.batch_pause = batch_pause
+        self.history_retention_months = history_retention_months
+        self.partitions_ahead = partitions_ahead
+        self.archive_dir = Path(archive_dir) if archive_dir else None
+
+    async def run(self) -> None:
+        async with self.engine.connect() as conn, self.advisory_lock(conn) as locked:
+            if not locked:
+                logger.info("Compaction is already running in another process.")
+                return
+            deleted = await self.delete_expired_tokens(conn)
+            logger.info("Deleted %d expired tokens.", deleted)
+            today = datetime.utcnow().date()
+            await self.ensure_partitions(conn, today)
+            await self.drop_old_partitions(conn, today)
+
+    @asynccontextmanager
+    async def advisory_lock(self, conn: AsyncConnection) -> AsyncIterator[bool]:
+        """Попытка взять блокировку сжатия, снимается при выходе, если была взята"""
+        locked = await conn.scalar(select(text("pg_try_advisory_lock(:key)")), {"key": LOCK_KEY})
+        await conn.commit()
+        if not locked:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            await conn.rollback()
+            await conn.execute(select(text("pg_advisory_unlock(:key)")), {"key": LOCK_KEY})
+            await conn.commit()
+
+    async def delete_expired_tokens(self, conn: AsyncConnection) -> int:
+        before = datetime.utcnow() - self.tokens_ttl
+        expired_ids = select(Tokens.id).where(Tokens.created_at < before).limit(self.tokens_batch_size)
+        total = 0
+        while True:
+            result = await conn.execute(delete(Tokens).where(Tokens.id.in_(expired_ids)))
+            await conn.commit()
+            total += result.rowcount
+            if result.rowcount < self.tokens_batch_size:
+                return total
+            await asyncio.sleep(self.batch_pause)
+
+    async def get_partitions(self, conn: AsyncConnection) -> list[Partition]:
+        result = await conn.execute(
+            text(PARTITIONS_QUERY),
+            {"parent": f"{SCHEMA}.{HISTORY_TABLE}"},
+        )
+        partitions = []
+        for name, bounds in result.all():
+            match = BOUNDS_RE.search(bounds)
+            if match is None:
+                partitions.append(Partition(name))
+                continue
+            start, end = (datetime.fromisoformat(value).date() for value in match.groups())
+            partitions.append(Partition(name, start, end))
+        await conn.commit()
+        return partitions
+
+    async def ensure_partitions(self, conn: AsyncConnection, today: date) -> None:
+        """Секции с самого раннего месяца в секции по умолчанию (или текущего) до partitions_ahead вперед"""
+        partitions = await self.get_partitions(conn)
+        has_default = any(partition.is_default for partition in partitions)
+        first_month = month_start(today)
+        if has_default:
+            oldest = await conn.scalar(text(f"SELECT min(created_at) FROM {SCHEMA}.{DEFAULT_PARTITION}"))
+            await conn.commit()
+            if oldest is not None:
+                first_month = min(first_month, month_start(oldest.date()))
+        month = first_month
+        while month <= month_start(today, self.partitions_ahead):
+            next_month = month_start(month, 1)
+            if not any(
+                partition.start < next_month and month < partition.end  # type: ignore
+                for partition in partitions
+                if not partition.is_default
+            ):
+                await self.create_partition(conn, month, next_month, has_default)
+            month = next_month
+
+    async def create_partition(self, conn: AsyncConnection, start: date, end: date, has_default: bool) -> None:
+        name = f"{HISTORY_TABLE}_y{start.year}m{start.month:02d}"
+        bounds = f"FROM ('{start}') TO ('{end}')"
+        if not has_default:
+            await conn.execute(
+                text(f"CREATE TABLE {SCHEMA}.{name} PARTITION OF {SCHEMA}.{HISTORY_TABLE} FOR VALUES {bounds}"),
+            )
+            await conn.commit()
+            logger.info("Created partition %s.", name)
+            return
+        # Присоединение секции проверяет, что в секции по умолчанию нет строк ее диапазона,
+        # поэтому такие строки переносятся в новую секцию в той же транзакции
+        in_range = "created_at >= :start AND created_at < :end"
+        params = {"start": start, "end": end}
+        await conn.execute(text(f"CREATE TABLE {SCHEMA}.{name} (LIKE {SCHEMA}.{HISTORY_TABLE} INCLUDING DEFAULTS)"))
+        moved = await conn.execute(
+            text(f"INSERT INTO {SCHEMA}.{name} SELECT * FROM {SCHEMA}.{DEFAULT_PARTITION} WHERE {in_range}"),
+            params,
+        )
+        await conn.execute(text(f"DELETE FROM {SCHEMA}.{DEFAULT_PARTITION} WHERE {in_range}"), params)
+        await conn.execute(
+            text(f"ALTER TABLE {SCHEMA}.{HISTORY_TABLE} ATTACH PARTITION {SCHEMA}.{name} FOR VALUES {bounds}"),
+        )
+        await conn.commit()
+        logger.info("Created partition %s, moved %d rows from the default partition.", name, moved.rowcount)
+
+    async def drop_old_partitions(self, conn: AsyncConnection, today: date) -> None:
+        cutoff = month_start(today, -self.history_retention_months)
+        old_partitions = [
+            partition
+            for partition in await self.get_partitions(conn)
+            if not partition.is_default and partition.end <= cutoff  # type: ignore
+        ]
+        if old_partitions and self.archive_dir is None:
+            logger.warning("Kept %d partitions older than %s: archive_dir is not set.", len(old_partitions), cutoff)
+            return
+        for partition in old_partitions:
+            await self.archive_partition(conn, partition.name)
+            await conn.execute(
+                text(f"ALTER TABLE {SCHEMA}.{HISTORY_TABLE} DETACH PARTITION {SCHEMA}.{partition.name}"),
+            )
+            await conn.execute(text(f"DROP TABLE {SCHEMA}.{partition.name}"))
+            await conn.commit()
+            logger.info("Dropped partition %s older than %s.", partition.name, cutoff)
+
+    async def archive_partition(self, conn: AsyncConnection, name: str) -> Path:
+        """Выгрузка секции в csv.gz через COPY, файл появляется под своим именем только целиком"""
+        self.archive_dir.mkdir(parents=True, exist_ok=True)  # type: ignore
+        path = self.archive_dir / f"{name}.csv.gz"  # type: ignore
+        partial_path = path.with_name(f"{path.name}.partial")
+        raw_connection = await conn.get_raw_connection()
+        with gzip.open(partial_path, "wb") as file:
+
+            async def write(chunk: bytes) -> None:
+                file.write(chunk)
+
+            await raw_connection.driver_connection.copy_from_table(
+                name,
+                schema_name=SCHEMA,
+                output=write,
+                format="csv",
+                header=True,
+            )
+        partial_path.rename(path)
+        logger.info("Archived partition %s to %s.", name, path)
+        return path
@@ -1,16 +1,17 @@
 from abc import ABC
 from datetime import datetime
 from typing import Generic, TypeVar
-from uuid import UUID
+from uuid import UUID, uuid4
 
 import backoff
 from pydantic import BaseModel
-from sqlalchemy import delete, func, literal_column, or_, select, update
+from sqlalchemy import delete, func, insert, literal, literal_column, or_, select, update
 from sqlalchemy.exc import IntegrityError, InterfaceError, PendingRollbackError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from api.v1.models import PaginatedParams
+from core import password_hasher, rbac_cache
 from db.models import Base, OauthProvider, Permissions, Roles, Tokens, Users, UsersAuthHistory
 from models.access import ExtendedPermission, ExtendedRole
 from models.tokens import Token
@@ -50,6 +51,12 @@ def backoff_decorator(backoff_interval=0.5, backoff_max_time_sec=2):
     return decorate
 
 
+async def hash_password(password: str | None) -> str | None:
+    if not password:
+        return None
+    return await password_hasher.password_hasher.hash(password)
+
+
 class BaseService(Generic[DBModel, ExtendedSchema], ABC):
     _model = DBModel
 
@@ -116,14 +123,7 @@ class TokensService(BaseService[Tokens, Token]):
 
     @backoff_decorator()
     async def get_by_jti(self, jti: UUID) -> _model:
-        stmt = (
-            select(self._model)
-            .where(self._model.jti == jti)
-            .options(
-                selectinload(self._model.user).subqueryload(Users.roles),
-                selectinload(self._model.user).subqueryload(Users.permissions),
-            )
-        )
+        stmt = select(self._model).where(self._model.jti == jti)
         return (await self.session.scalars(stmt)).one()
 
     @backoff_decorator()
@@ -133,17 +133,32 @@ class TokensService(BaseService[Tokens, Token]):
         await self.session.commit()
 
     @backoff_decorator()
-    async def delete_user_expire_tokens(
-        self,
-        entity_id: UUID,
-        before_created: datetime,
-    ) -> None:
-        stmt = delete(self._model).where(
-            self._model.id == entity_id,
-            self._model.created_at < before_created,
+    async def rotate(self, jti: str, new_jti: str) -> UUID:
+        """Замена токена новым одним запросом.
+
+        Старый токен удаляется с возвратом user_id, новый вставляется только если он был найден,
+        поэтому повторное использование отозванного токена, в том числе одновременное, дает NoResultFound.
+        Устаревшие токены удаляет services.compaction.
+        """
+        revoked = delete(self._model).where(self._model.jti == jti).returning(self._model.user_id).cte("revoked")
+        inserted = (
+            insert(self._model)
+            .from_select(
+                ["id", "created_at", "user_id", "jti"],
+                select(
+                    literal(uuid4(), self._model.id.type),
+                    literal(datetime.utcnow(), self._model.created_at.type),
+                    revoked.c.user_id,
+                    literal(new_jti, self._model.jti.type),
+                ),
+            )
+            .returning(self._model.user_id)
+            .cte("inserted")
         )
-        await self.session.execute(stmt)
+        stmt = select(inserted.c.user_id)
+        user_id = (await self.session.execute(stmt)).scalar_one()
         await self.session.commit()
+        return user_id
 
 
 class UsersService(BaseService[Users, User]):
@@ -167,11 +182,12 @@ class UsersService(BaseService[Users, User]):
             or_(self._model.username == login, self._model.email == login),
         )
         user = (await self.session.scalars(stmt)).one()
-        return user.check_password(password)
+        return await password_hasher.password_hasher.verify(user.password, password)
 
     @backoff_decorator()
     async def create(self, entity: ExtendedSchema) -> _model:
-        db_item = self._model(**entity.model_dump())
+        password = await hash_password(entity.password)
+        db_item = self._model(**{**entity.model_dump(), "password": password})
         self.session.add(db_item)
         try:
             await self.session.commit()
@@ -181,12 +197,15 @@ class UsersService(BaseService[Users, User]):
 
     @backoff_decorator()
     async def update(self, entity_id: UUID, entity: ExtendedSchema, confirmed_email: bool) -> _model:
+        values = entity.model_dump()
+        if values.get("password"):
+            values["password"] = await hash_password(values["password"])
         stmt = (
             update(self._model)
             .where(
                 self._model.id == entity_id,
             )
-            .values(**entity.model_dump(), confirmed_email=confirmed_email)
+            .values(**values, confirmed_email=confirmed_email)
         )
         await self.session.execute(stmt)
         try:
@@ -226,6 +245,7 @@ class RolesService(BaseService[Roles, ExtendedRole]):
             await self.session.commit()
         except IntegrityError:
             raise AlreadyExistException(f"Entity {entity} already exists")
+        await rbac_cache.invalidate_all_rbac()
         return obj
 
     @backoff_decorator()
@@ -249,8 +269,13 @@ class RolesService(BaseService[Roles, ExtendedRole]):
             await self.session.commit()
         except IntegrityError:
             raise AlreadyExistException(f"Entity {entity} already exists")
+        await rbac_cache.invalidate_all_rbac()
         return obj
 
+    async def delete(self, entity_id: UUID) -> None:
+        await super().delete(entity_id)
+        await rbac_cache.invalidate_all_rbac()
+
 
 class PermissionsService(BaseService[Permissions, ExtendedPermission]):
     _model = Permissions
@@ -282,6 +307,7 @@ class PermissionsService(BaseService[Permissions, ExtendedPermission]):
             await self.session.commit()
         except IntegrityError:
             raise AlreadyExistException(f"Entity {entity} already exists")
+        await rbac_cache.invalidate_all_rbac()
         return obj
 
     @backoff_decorator()
@@ -305,8 +331,13 @@ class PermissionsService(BaseService[Permissions, ExtendedPermission]):
             await self.session.commit()
         except IntegrityError:
             raise AlreadyExistException(f"Entity {entity} already exists")
+        await rbac_cache.invalidate_all_rbac()
         return obj
 
+    async def delete(self, entity_id: UUID) -> None:
+        await super().delete(entity_id)
+        await rbac_cache.invalidate_all_rbac()
+
 
 class UsersAdminService(BaseService[Users, ExtendedUser]):
     _model = Users
@@ -328,14 +359,8 @@ class UsersAdminService(BaseService[Users, ExtendedUser]):
 
     @backoff_decorator()
     async def get_by_login(self, login: str) -> _model:
-        stmt = (
-            select(self._model)
-            .where(or_(self._model.username == login, self._model.email == login))
-            .options(
-                selectinload(self._model.roles),
-                selectinload(self._model.permissions),
-            )
-        )
+        # Роли и права для токенов берутся из rbac_cache, здесь они не загружаются
+        stmt = select(self._model).where(or_(self._model.username == login, self._model.email == login))
         return (await self.session.scalars(stmt)).one()
 
     @backoff_decorator()
@@ -343,7 +368,7 @@ class UsersAdminService(BaseService[Users, ExtendedUser]):
         obj = self._model(
             username=entity.username,
             email=entity.email,
-            password=entity.password,
+            password=await hash_password(entity.password),
             first_name=entity.first_name,
             last_name=entity.last_name,
         )
@@ -360,10 +385,11 @@ class UsersAdminService(BaseService[Users, ExtendedUser]):
 
     @backoff_decorator()
     async def update(self, entity_id: UUID, entity: ExtendedUser) -> _model:
+        password = await hash_password(entity.password)
         obj = await self.get_by_id(entity_id)
         obj.username = entity.username
         obj.email = entity.email
-        obj.password = entity.password
+        obj.password = password
         obj.first_name = entity.first_name
         obj.last_name = entity.last_name
         obj.confirmed_email = entity.confirmed_email
@@ -378,8 +404,13 @@ class UsersAdminService(BaseService[Users, ExtendedUser]):
             await self.session.commit()
         except IntegrityError:
             raise AlreadyExistException(f"Entity {entity} already exists")
+        await rbac_cache.invalidate_user_rbac(entity_id)
         return obj
 
+    async def delete(self, entity_id: UUID) -> None:
+        await super().delete(entity_id)
+        await rbac_cache.invalidate_user_rbac(entity_id)
+
 
 class UserAuthHistoryService(BaseService[UsersAuthHistory, UserAuthHistory]):
     _model = UsersAuthHistory
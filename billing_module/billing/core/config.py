@@ -10,15 +10,23 @@ from opentelemetry.exporter.jaeger.thrift import JaegerExporter
 from opentelemetry.sdk.resources import Resource
 from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
-from pydantic import HttpUrl, PostgresDsn, RedisDsn
+from pydantic import HttpUrl, RedisDsn
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from db.engine import PostgresSettings
+
 
 class RedisSettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="redis_")
     dsn: RedisDsn
 
 
+class SubscriptionEventsSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="subscription_events_")
+    redis_dsn: RedisDsn | None = None
+    channel: str = "billing:user_subscriptions"
+
+
 class YooKassaSettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="yookassa_")
     account_id: str
@@ -40,11 +48,6 @@ class AuthSettings(BaseSettings):
     login_redirect_url: HttpUrl
 
 
-class PostgresSettings(BaseSettings):
-    model_config = SettingsConfigDict(env_prefix="postgres_")
-    dsn: PostgresDsn
-
-
 class BaseOauth(BaseSettings):
     client_id: str
     client_secret: str
@@ -74,9 +77,25 @@ class SentrySettings(BaseSettings):
     enable_tracing: bool = False
 
 
+class HttpClientSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="http_client_")
+    limit: int = 100
+    limit_per_host: int = 20
+    dns_cache_ttl: int = 300
+    keepalive_timeout: float = 30
+    timeout: float = 10
+    connect_timeout: float = 3
+    retries: int = 2
+    retry_backoff: float = 0.1
+    retry_budget_ratio: float = 0.2
+    retry_budget_max: float = 10
+
+
 class AppSettings:
     yookassa = YooKassaSettings()
     redis = RedisSettings()
+    subscription_events = SubscriptionEventsSettings()
+    http_client = HttpClientSettings()
     postgres = PostgresSettings()
     auth = AuthSettings()
     jaeger = JaegerSetting()
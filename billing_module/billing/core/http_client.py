@@ -0,0 +1,196 @@
+from __future__ import annotations
+import asyncio
+import logging
+import random
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from time import monotonic
+from types import SimpleNamespace
+from typing import Any, AsyncIterator
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+http_client: HttpClient | None = None
+
+
+async def get_http_client() -> HttpClient:
+    return http_client  # type: ignore
+
+
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS", "PUT", "DELETE"))
+RETRY_STATUSES = frozenset((502, 503, 504))
+
+
+@dataclass
+class HttpClientStats:
+    requests: int = 0
+    retries: int = 0
+    retries_denied: int = 0
+    errors: int = 0
+    connections_created: int = 0
+    connections_reused: int = 0
+    pool_waits: int = 0
+    pool_wait_seconds: float = 0
+    queued: int = 0
+    max_queued: int = 0
+
+
+class RetryBudget:
+    """Ограничение доли повторных запросов.
+
+    Каждый запрос пополняет бюджет на ratio, каждый повтор тратит единицу, поэтому при отказе
+    сервиса повторы не увеличивают нагрузку на него больше чем в 1 + ratio раз.
+    """
+
+    def __init__(self, ratio: float, max_tokens: float):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+
+    def deposit(self) -> None:
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class HttpClient:
+    """Общая на процесс сессия aiohttp с пулом keep-alive соединений для запросов к другим сервисам.
+
+    Создается при старте приложения и закрывается при остановке. Запросы с идемпотентными методами
+    повторяются при сетевых ошибках и ответах 502/503/504 в пределах бюджета повторов.
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 20,
+        dns_cache_ttl: int = 300,
+        keepalive_timeout: float = 30,
+        timeout: float = 10,
+        connect_timeout: float = 3,
+        retries: int = 2,
+        retry_backoff: float = 0.1,
+        retry_budget_ratio: float = 0.2,
+        retry_budget_max: float = 10,
+        trace_configs: list[aiohttp.TraceConfig] | None = None,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self._stats = HttpClientStats()
+        self._budget = RetryBudget(retry_budget_ratio, retry_budget_max)
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=limit,
+                limit_per_host=limit_per_host,
+                ttl_dns_cache=dns_cache_ttl,
+                keepalive_timeout=keepalive_timeout,
+            ),
+            timeout=aiohttp.ClientTimeout(total=timeout, connect=connect_timeout),
+            trace_configs=[self._pool_trace_config(), *(trace_configs or [])],
+        )
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        return {"limit": self.limit, "limit_per_host": self.limit_per_host, **asdict(self._stats)}
+
+    @asynccontextmanager
+    async def request(
+        self,
+        method: str,
+        url: str,
+        retry: bool | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        """Запрос с повторами, retry по умолчанию включен только для идемпотентных методов"""
+        retry = method.upper() in IDEMPOTENT_METHODS if retry is None else retry
+        self._stats.requests += 1
+        self._budget.deposit()
+        response = await self._send(method, url, retry, kwargs)
+        try:
+            yield response
+        finally:
+            response.release()
+
+    def get(self, url: str, **kwargs: Any) -> Any:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> Any:
+        return self.request("POST", url, **kwargs)
+
+    async def close(self) -> None:
+        logger.info("HTTP client stats: %s", self.stats)
+        await self.session.close()
+
+    async def _send(self, method: str, url: str, retry: bool, kwargs: dict[str, Any]) -> aiohttp.ClientResponse:
+        attempt = 0
+        while True:
+            response = await self._attempt(method, url, retry, attempt, kwargs)
+            if response is not None:
+                return response
+            attempt += 1
+            await asyncio.sleep(random.uniform(0, self.retry_backoff * 2 ** attempt))  # noqa: S311
+
+    async def _attempt(
+        self,
+        method: str,
+        url: str,
+        retry: bool,
+        attempt: int,
+        kwargs: dict[str, Any],
+    ) -> aiohttp.ClientResponse | None:
+        """Одна попытка запроса, None - попытка не удалась и будет повторена"""
+        try:
+            response = await self.session.request(method, url, **kwargs)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if self._can_retry(retry, attempt):
+                return None
+            self._stats.errors += 1
+            raise
+        if response.status in RETRY_STATUSES and self._can_retry(retry, attempt):
+            response.release()
+            return None
+        return response
+
+    def _can_retry(self, retry: bool, attempt: int) -> bool:
+        if not retry or attempt >= self.retries:
+            return False
+        if not self._budget.withdraw():
+            self._stats.retries_denied += 1
+            return False
+        self._stats.retries += 1
+        return True
+
+    def _pool_trace_config(self) -> aiohttp.TraceConfig:
+        """Сбор метрик пула: ожидание свободного соединения означает, что пул исчерпан"""
+        stats = self._stats
+
+        async def on_queued_start(session: Any, ctx: SimpleNamespace, params: Any) -> None:
+            ctx.queued_at = monotonic()
+            stats.pool_waits += 1
+            stats.queued += 1
+            stats.max_queued = max(stats.max_queued, stats.queued)
+
+        async def on_queued_end(session: Any, ctx: SimpleNamespace, params: Any) -> None:
+            stats.queued -= 1
+            stats.pool_wait_seconds += monotonic() - ctx.queued_at
+
+        async def on_create_end(session: Any, ctx: SimpleNamespace, params: Any) -> None:
+            stats.connections_created += 1
+
+        async def on_reuse(session: Any, ctx: SimpleNamespace, params: Any) -> None:
+            stats.connections_reused += 1
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_queued_start.append(on_queued_start)
+        trace_config.on_connection_queued_end.append(on_queued_end)
+        trace_config.on_connection_create_end.append(on_create_end)
+        trace_config.on_connection_reuseconn.append(on_reuse)
+        return trace_config
@@ -1,8 +1,8 @@
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy.pool import NullPool
 from sqlalchemy.schema import CreateSchema
 
 from core.config import settings
+from db.engine import engine_options
 from db.models import Base
 
 
@@ -23,6 +23,6 @@ async def purge_database() -> None:
 engine = create_async_engine(
     str(settings.postgres.dsn),
     future=True,
-    poolclass=NullPool,
+    **engine_options(settings.postgres),
 )
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
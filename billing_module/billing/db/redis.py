@@ -0,0 +1,7 @@
+from redis.asyncio import Redis
+
+redis_interface: Redis | None = None
+
+
+async def get_db_client() -> Redis | None:
+    return redis_interface
@@ -1,4 +1,3 @@
-import logging
 from contextlib import asynccontextmanager
 from logging import config as logging_config
 from typing import Any
@@ -7,12 +6,16 @@ from fastapi import FastAPI, Request, status
 from fastapi.responses import JSONResponse
 
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+from redis import asyncio as redis_async
 
 from api.v1 import payment, user_subscriptions, cards
+from core import http_client
 from core.config import AppSettings
-from db.postgres import create_database
+from db import redis
+from db.postgres import create_database, engine
 
-from core.logger import RequestIdFilter, LOGGING
+from core.logger import LOGGING
+from core.request_context import RequestContextMiddleware, request_id_trace_config
 from services.exceptions import (
     AlreadyExistException,
     DatabaseConnectionError,
@@ -25,8 +28,22 @@ app_settings = AppSettings()
 @asynccontextmanager
 async def lifespan(app: FastAPI):  # type: ignore
     logging_config.dictConfig(LOGGING)
+    if app_settings.subscription_events.redis_dsn:
+        redis.redis_interface = redis_async.from_url(
+            str(app_settings.subscription_events.redis_dsn),
+            encoding="utf8",
+            decode_responses=True,
+        )
+    http_client.http_client = http_client.HttpClient(
+        **app_settings.http_client.model_dump(),
+        trace_configs=[request_id_trace_config()],
+    )
     await create_database()
     yield
+    await http_client.http_client.close()
+    if redis.redis_interface is not None:
+        await redis.redis_interface.close()
+    await engine.dispose()
 
 
 tags_metadata = [
@@ -112,12 +129,7 @@ async def before_request(request: Request, call_next):
     return response
 
 
-@app.middleware("http")
-async def add_log_filter(request: Request, call_next):
-    for log_type in ("access", "error"):
-        logger = logging.getLogger("uvicorn.%s" % (log_type,))
-        logger.addFilter(RequestIdFilter(request))
-    return await call_next(request)
+app.add_middleware(RequestContextMiddleware)
 
 
 @app.get("/healthcheck")
@@ -125,4 +137,9 @@ async def health() -> Any:
     return  # noqa
 
 
-FastAPIInstrumentor.instrument_app(app, excluded_urls="healthcheck")
+@app.get("/http-client/stats")
+async def http_client_stats() -> Any:
+    return http_client.http_client.stats
+
+
+FastAPIInstrumentor.instrument_app(app, excluded_urls="healthcheck,http-client/stats")
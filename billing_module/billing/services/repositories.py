@@ -21,6 +21,7 @@ from db.models import (
     TransactionState,
 )
 from services.exceptions import AlreadyExistException
+from services.subscription_events import notify_subscriptions_changed
 from utils import DurationAdapter
 from schemas import UserPaymentMethodDTO
 
@@ -159,6 +160,7 @@ class TransactionsService(BaseService):
         self.session.add(user_subscription)
         await self.change_state(transaction, TransactionState.TRANSACTION_COMPLETE.name)
         await self.session.commit()
+        await notify_subscriptions_changed(user_subscription.user_id, transaction.user_id)
         return user_subscription
 
     async def decrease_subscription(self, transaction: Transaction):
@@ -177,6 +179,7 @@ class TransactionsService(BaseService):
         self.session.add(user_subscription)
         await self.change_state(transaction, TransactionState.TRANSACTION_COMPLETE.name)
         await self.session.commit()
+        await notify_subscriptions_changed(user_subscription.user_id, transaction.user_id)
         return user_subscription
 
     async def save_user_payment_method(self, entity: UserPaymentMethodDTO):
@@ -0,0 +1,27 @@
+import json
+import logging
+from uuid import UUID
+
+from redis.exceptions import RedisError
+
+from core.config import settings
+from db import redis
+
+logger = logging.getLogger(__name__)
+
+
+async def notify_subscriptions_changed(*user_ids: UUID) -> None:
+    """Оповещение сервисов, кэширующих подписки пользователей, об изменении подписок.
+
+    Ошибка отправки не прерывает платеж: закэшированные подписки устареют не позже max TTL кэша.
+    """
+    if redis.redis_interface is None:
+        return
+    try:
+        for user_id in set(user_ids):
+            await redis.redis_interface.publish(
+                settings.subscription_events.channel,
+                json.dumps({"user_id": str(user_id)}),
+            )
+    except RedisError:
+        logger.exception("Failed to publish subscription change for users %s", user_ids)
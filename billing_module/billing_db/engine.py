@@ -0,0 +1,49 @@
+from typing import Any
+from uuid import uuid4
+
+from pydantic import PostgresDsn
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from sqlalchemy.pool import NullPool
+
+
+class PostgresSettings(BaseSettings):
+    """Подключение к базе биллинга, общее для billing и billing_scheduler"""
+
+    model_config = SettingsConfigDict(env_prefix="postgres_")
+    dsn: PostgresDsn
+    pool_enabled: bool = True
+    pool_size: int = 10
+    max_overflow: int = 10
+    pool_timeout: float = 30
+    pool_pre_ping: bool = True
+    pool_recycle: int = 1800
+    statement_cache_size: int = 100
+    pgbouncer: bool = False
+
+
+def engine_options(postgres_settings: PostgresSettings) -> dict[str, Any]:
+    """Аргументы create_async_engine для PostgresSettings.
+
+    При pgbouncer пул и кэш подготовленных запросов asyncpg выключены, а имена запросов уникальны:
+    в режиме transaction PgBouncer отдает каждой транзакции любое из своих серверных соединений.
+    """
+    if postgres_settings.pgbouncer:
+        return {
+            "poolclass": NullPool,
+            "connect_args": {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            },
+        }
+    connect_args = {"prepared_statement_cache_size": postgres_settings.statement_cache_size}
+    if not postgres_settings.pool_enabled:
+        return {"poolclass": NullPool, "connect_args": connect_args}
+    return {
+        "pool_size": postgres_settings.pool_size,
+        "max_overflow": postgres_settings.max_overflow,
+        "pool_timeout": postgres_settings.pool_timeout,
+        "pool_pre_ping": postgres_settings.pool_pre_ping,
+        "pool_recycle": postgres_settings.pool_recycle,
+        "connect_args": connect_args,
+    }
@@ -1,11 +1,8 @@
 import os
-from pydantic import HttpUrl, PostgresDsn
+from pydantic import HttpUrl
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
-
-class PostgresSettings(BaseSettings):
-    model_config = SettingsConfigDict(env_prefix="postgres_")
-    dsn: PostgresDsn
+from database.engine import PostgresSettings
 
 
 class AuthSettings(BaseSettings):
@@ -48,6 +45,20 @@ class JobSettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="job_")
 
 
+class HttpClientSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="http_client_")
+    limit: int = 100
+    limit_per_host: int = 20
+    dns_cache_ttl: int = 300
+    keepalive_timeout: float = 30
+    timeout: float = 10
+    connect_timeout: float = 3
+    retries: int = 2
+    retry_backoff: float = 0.1
+    retry_budget_ratio: float = 0.2
+    retry_budget_max: float = 10
+
+
 class AppSettings:
     postgres = PostgresSettings()
     redis = RedisSettings()
@@ -55,6 +66,7 @@ class AppSettings:
     logstash = LogstashSettings()
     job = JobSettings()
     pattern = PatternSettings()
+    http_client = HttpClientSettings()
     BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     x_request_id = os.getenv("SERVICE_X_REQUEST_ID")
 
@@ -1,7 +1,7 @@
 from core.config import settings
+from database.engine import engine_options
 from database.models import Base
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy.pool import NullPool
 from sqlalchemy.schema import CreateSchema
 
 
@@ -19,6 +19,6 @@ async def purge_database() -> None:
 engine = create_async_engine(
     str(settings.postgres.dsn),
     future=True,
-    poolclass=NullPool,
+    **engine_options(settings.postgres),
 )
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
@@ -1,14 +1,20 @@
 import asyncio
 import logging
 
+from core import http_client
+from core.config import settings
 from scheduler.scheduler import scheduler
 from scheduler import jobs
+from database import postgres
+from services import auth
 
 logging.basicConfig()
 logging.getLogger("apscheduler").setLevel(logging.DEBUG)
 
 
 async def main():
+    http_client.http_client = http_client.HttpClient(**settings.http_client.model_dump())
+    auth.auth_interface = auth.AuthService(**settings.auth.model_dump()).connections(http_client.http_client)
     scheduler.add_job(
         jobs.send_notification_tomorrow_auto_pay_job,
         "cron",
@@ -55,6 +61,9 @@ async def main():
             await asyncio.sleep(3)
     except KeyboardInterrupt:
         scheduler.shutdown()
+    finally:
+        await http_client.http_client.close()
+        await postgres.engine.dispose()
 
 
 if __name__ == "__main__":
@@ -1,11 +1,11 @@
 import asyncio
-from aiohttp import ClientSession
 from urllib.parse import urlencode
 
+from core import http_client
 from core.config import settings
 from models.abstract_database import AbstractDatabase
 from models.abstract_schedule import AbstractSchedule
-from services.auth import AuthService
+from services import auth
 
 
 class SchedulerService(AbstractSchedule):
@@ -17,7 +17,7 @@ class SchedulerService(AbstractSchedule):
             database (DatabaseService): The database service instance.
         """
         self.database = database
-        self.auth = AuthService(**settings.auth.model_dump()).connections()
+        self.auth = auth.auth_interface
 
     async def send_notification_no_auto_pay_job(self):
         users: list = await self.database.get_users_with_no_auto_pay()
@@ -47,17 +47,16 @@ class SchedulerService(AbstractSchedule):
             await self.check_payment_status(str(transaction))
 
     async def send_notification_to_user(self, user_id: str, pattern_id: str):
-        async with ClientSession() as session:
-            async with session.post(
-                settings.job.notification_url,
-                params={
-                    "user_id": user_id,
-                    "pattern_id": pattern_id,
-                    "worker": "email",
-                },
-                headers={"X-Request-Id": settings.x_request_id},
-            ):
-                await asyncio.sleep(0.1)
+        async with http_client.http_client.post(
+            settings.job.notification_url,
+            params={
+                "user_id": user_id,
+                "pattern_id": pattern_id,
+                "worker": "email",
+            },
+            headers={"X-Request-Id": settings.x_request_id},
+        ):
+            await asyncio.sleep(0.1)
 
     async def check_payment_status(self, transaction_id: str):
         params = urlencode({"transaction_id": transaction_id})
@@ -2,11 +2,12 @@ from typing import Annotated, Any
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, Query, status
-from fastapi_cache.decorator import cache
 
-from api.v1.models import ExtendedFilm, Films, FilmsSortParam, HttpException, PaginatedParams
+from api.v1.models import BatchIds, ExtendedFilm, Films, FilmsBatch, FilmsSortParam, HttpException, PaginatedParams
+from core.config import settings
 from core.dependencies import paginator_params_dep, token_roles_dep, user_subscriptions_dep
 from core.permission import check_film_permission
+from db.cache import cache, get_many_cached
 from services.film import FilmService, get_film_service
 
 film_router = APIRouter(
@@ -14,19 +15,37 @@ film_router = APIRouter(
     tags=["films"],
     responses={status.HTTP_504_GATEWAY_TIMEOUT: {"model": HttpException, "description": "Gateway timeout"}},
 )
+CursorQuery = Annotated[
+    str,
+    Query(description="Cursor from next_cursor of the previous page, empty value starts cursor pagination"),
+]
+
+
+def is_cursor_request(params: dict[str, Any]) -> bool:
+    """Ответ с курсором содержит point in time с коротким keep_alive, поэтому не кэшируется"""
+    return params.get("cursor") is not None
 
 
 @film_router.get("", response_model=Films)
-@cache(expire=60)
+@cache(expire=settings.cache.expire, bypass=is_cursor_request)
 async def get_film_list(
     sort: Annotated[FilmsSortParam, Query(description="Sort result by field")] = None,
     genre: Annotated[str | None, Query(description="Genre name for filter results")] = None,
+    cursor: CursorQuery = None,
     paginated_params: PaginatedParams = Depends(paginator_params_dep),
     film_service: FilmService = Depends(get_film_service),
 ) -> Any:
     fields = ["id, imdb_rating", "title"]
     nested_query = {"genre": genre} if genre else None
 
+    if cursor is not None:
+        return await film_service.get_cursor_list(
+            sort=sort,
+            page_size=paginated_params.page_size,
+            cursor=cursor,
+            fields=fields,
+            nested_query=nested_query,
+        )
     return await film_service.get_list(
         sort=sort,
         page_number=paginated_params.page_number,
@@ -37,14 +56,23 @@ async def get_film_list(
 
 
 @film_router.get("/search", response_model=Films)
-@cache(expire=60)
+@cache(expire=settings.cache.expire, bypass=is_cursor_request)
 async def search_by_films(
     query: Annotated[str, Query(description="Query for filter result")] = "",
     sort: Annotated[FilmsSortParam, Query(description="Sort result by field")] = None,
+    cursor: CursorQuery = None,
     paginated_params: PaginatedParams = Depends(paginator_params_dep),
     film_service: FilmService = Depends(get_film_service),
 ) -> Any:
     fields = ["id, imdb_rating", "title"]
+    if cursor is not None:
+        return await film_service.get_cursor_list(
+            sort=sort,
+            page_size=paginated_params.page_size,
+            cursor=cursor,
+            fields=fields,
+            query_phrase=query,
+        )
     return await film_service.get_list(
         sort=sort,
         page_number=paginated_params.page_number,
@@ -54,12 +82,25 @@ async def search_by_films(
     )
 
 
+@film_router.post("/batch", response_model=FilmsBatch)
+async def get_films_batch(
+    batch: BatchIds,
+    film_service: FilmService = Depends(get_film_service),
+) -> Any:
+    ids = batch.unique_ids
+    films = await get_many_cached("get_film_info", ids, film_service.get_many, settings.cache.expire)
+    return {
+        "results": [films[str(entity_id)] for entity_id in ids if str(entity_id) in films],
+        "not_found": [entity_id for entity_id in ids if str(entity_id) not in films],
+    }
+
+
 @film_router.get(
     "/{film_id}",
     responses={status.HTTP_404_NOT_FOUND: {"model": HttpException, "description": "Film not found"}},
     response_model=ExtendedFilm,
 )
-@cache(expire=60)
+@cache(expire=settings.cache.expire)
 async def get_film_info(
     film_id: UUID,
     film_service: FilmService = Depends(get_film_service),
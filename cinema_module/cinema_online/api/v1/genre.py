@@ -2,10 +2,11 @@ from typing import Any
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, status
-from fastapi_cache.decorator import cache
 
-from api.v1.models import Films, Genre, Genres, HttpException, PaginatedParams
+from api.v1.models import BatchIds, Films, Genre, Genres, GenresBatch, HttpException, PaginatedParams
+from core.config import settings
 from core.dependencies import paginator_params_dep
+from db.cache import cache, get_many_cached
 from services.film import FilmService, get_film_service
 from services.genre import GenreService, get_genre_service
 
@@ -17,7 +18,7 @@ genre_router = APIRouter(
 
 
 @genre_router.get("", response_model=Genres)
-@cache(expire=60)
+@cache(expire=settings.cache.expire)
 async def get_genre_list(
     paginated_params: PaginatedParams = Depends(paginator_params_dep),
     genre_service: GenreService = Depends(get_genre_service),
@@ -25,12 +26,25 @@ async def get_genre_list(
     return await genre_service.get_list(page_number=paginated_params.page_number, page_size=paginated_params.page_size)
 
 
+@genre_router.post("/batch", response_model=GenresBatch)
+async def get_genres_batch(
+    batch: BatchIds,
+    genre_service: GenreService = Depends(get_genre_service),
+) -> Any:
+    ids = batch.unique_ids
+    genres = await get_many_cached("get_genre_info", ids, genre_service.get_many, settings.cache.expire)
+    return {
+        "results": [genres[str(entity_id)] for entity_id in ids if str(entity_id) in genres],
+        "not_found": [entity_id for entity_id in ids if str(entity_id) not in genres],
+    }
+
+
 @genre_router.get(
     "/{genre_id}",
     responses={status.HTTP_404_NOT_FOUND: {"model": HttpException, "description": "Genre not found"}},
     response_model=Genre,
 )
-@cache(expire=60)
+@cache(expire=settings.cache.expire)
 async def get_genre_info(
     genre_id: UUID,
     genre_service: GenreService = Depends(get_genre_service),
@@ -43,7 +57,7 @@ async def get_genre_info(
     responses={status.HTTP_404_NOT_FOUND: {"model": HttpException, "description": "Genre not found"}},
     response_model=Films,
 )
-@cache(expire=60)
+@cache(expire=settings.cache.expire)
 async def get_films_by_genre(
     genre_id: UUID,
     paginated_params: PaginatedParams = Depends(paginator_params_dep),
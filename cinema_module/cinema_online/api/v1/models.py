@@ -20,6 +20,14 @@ class PaginatedParams(BaseModel):
         return self.page_size * (self.page_number - 1)
 
 
+class BatchIds(BaseModel):
+    ids: list[UUID] = Field(min_length=1, max_length=500)
+
+    @property
+    def unique_ids(self) -> list[UUID]:
+        return list(dict.fromkeys(self.ids))
+
+
 class Genre(BaseModel):
     id: UUID = Field(serialization_alias="uuid")
     name: str
@@ -61,6 +69,7 @@ class ExtendedFilm(BaseModel):
 
 class Films(Paginations):
     results: list[Film]
+    next_cursor: str | None = None
 
 
 class Persons(Paginations):
@@ -71,5 +80,20 @@ class Genres(Paginations):
     results: list[Genre]
 
 
+class FilmsBatch(BaseModel):
+    results: list[ExtendedFilm]
+    not_found: list[UUID]
+
+
+class PersonsBatch(BaseModel):
+    results: list[ExtendedPerson]
+    not_found: list[UUID]
+
+
+class GenresBatch(BaseModel):
+    results: list[Genre]
+    not_found: list[UUID]
+
+
 class HttpException(BaseModel):
     detail: str
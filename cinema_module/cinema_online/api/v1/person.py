@@ -2,10 +2,11 @@ from typing import Annotated, Any
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, Query, status
-from fastapi_cache.decorator import cache
 
-from api.v1.models import ExtendedPerson, Films, HttpException, PaginatedParams, Persons
+from api.v1.models import BatchIds, ExtendedPerson, Films, HttpException, PaginatedParams, Persons, PersonsBatch
+from core.config import settings
 from core.dependencies import paginator_params_dep
+from db.cache import cache, get_many_cached
 from services.film import FilmService, get_film_service
 from services.person import PersonService, get_person_service
 
@@ -17,7 +18,7 @@ person_router = APIRouter(
 
 
 @person_router.get("", response_model=Persons)
-@cache(expire=60)
+@cache(expire=settings.cache.expire)
 async def get_person_list(
     paginated_params: PaginatedParams = Depends(paginator_params_dep),
     person_service: PersonService = Depends(get_person_service),
@@ -26,7 +27,7 @@ async def get_person_list(
 
 
 @person_router.get("/search", response_model=Persons)
-@cache(expire=60)
+@cache(expire=settings.cache.expire)
 async def search_by_person(
     query: Annotated[str, Query(description="Query for filter result")] = "",
     paginated_params: PaginatedParams = Depends(paginator_params_dep),
@@ -41,12 +42,25 @@ async def search_by_person(
     )
 
 
+@person_router.post("/batch", response_model=PersonsBatch)
+async def get_persons_batch(
+    batch: BatchIds,
+    person_service: PersonService = Depends(get_person_service),
+) -> Any:
+    ids = batch.unique_ids
+    persons = await get_many_cached("get_person_info", ids, person_service.get_many, settings.cache.expire)
+    return {
+        "results": [persons[str(entity_id)] for entity_id in ids if str(entity_id) in persons],
+        "not_found": [entity_id for entity_id in ids if str(entity_id) not in persons],
+    }
+
+
 @person_router.get(
     "/{person_id}",
     responses={status.HTTP_404_NOT_FOUND: {"model": HttpException, "description": "Person not found"}},
     response_model=ExtendedPerson,
 )
-@cache(expire=60)
+@cache(expire=settings.cache.expire)
 async def get_person_info(
     person_id: UUID,
     person_service: PersonService = Depends(get_person_service),
@@ -59,7 +73,7 @@ async def get_person_info(
     responses={status.HTTP_404_NOT_FOUND: {"model": HttpException, "description": "Person not found"}},
     response_model=Films,
 )
-@cache(expire=60)
+@cache(expire=settings.cache.expire)
 async def get_movies_with_person_participation(
     person_id: UUID,
     paginated_params: PaginatedParams = Depends(paginator_params_dep),
@@ -0,0 +1,93 @@
+"""Длительная нагрузка на логирование с X-Request-Id: фильтр на каждый запрос против фильтра из контекста.
+
+В режиме legacy middleware на каждый запрос добавляет логгеру новый фильтр с объектом запроса,
+в режиме context фильтр подключен один раз и читает id запроса из contextvars.
+Каждый запрос проходит через RequestContextMiddleware и пишет одну строку лога, через каждые
+--report запросов выводится число фильтров логгера, занятая память и средняя стоимость одной записи.
+
+Запуск из каталога сервиса: python -m benchmarks.request_log_filter --requests 1000000
+"""
+import argparse
+import asyncio
+import io
+import logging
+import tracemalloc
+from time import perf_counter
+from typing import Any
+
+from core.logger import RequestIdFilter
+from core.request_context import RequestContextMiddleware, request_id_var
+
+logger = logging.getLogger("benchmark.access")
+
+
+class LegacyRequestIdFilter(logging.Filter):
+    def __init__(self, scope: dict[str, Any]):
+        super().__init__()
+        self.scope = scope
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = dict(self.scope["headers"]).get(b"x-request-id")
+        return True
+
+
+async def endpoint(scope: dict[str, Any], receive: Any, send: Any) -> None:
+    logger.info("GET /api/v1/films 200")
+
+
+async def legacy_endpoint(scope: dict[str, Any], receive: Any, send: Any) -> None:
+    logger.addFilter(LegacyRequestIdFilter(scope))
+    await endpoint(scope, receive, send)
+
+
+def configure_logger(legacy: bool) -> io.StringIO:
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter("%(request_id)s %(message)s"))
+    if not legacy:
+        handler.addFilter(RequestIdFilter())
+    logger.handlers = [handler]
+    logger.filters = []
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return stream
+
+
+async def soak(legacy: bool, requests: int, report: int) -> None:
+    stream = configure_logger(legacy)
+    app = RequestContextMiddleware(legacy_endpoint if legacy else endpoint)
+    tracemalloc.start()
+    start = perf_counter()
+    for num in range(1, requests + 1):
+        scope = {"type": "http", "headers": [(b"x-request-id", str(num).encode())]}
+        await app(scope, None, None)  # type: ignore
+        if num % report == 0:
+            elapsed = perf_counter() - start
+            current, _ = tracemalloc.get_traced_memory()
+            mode = "legacy" if legacy else "context"
+            memory = f"memory {current / 2 ** 20:8.2f} MB"
+            latency = f"{elapsed / report * 10 ** 6:8.2f} us per request"
+            print(f"{mode:>7}: {num:>9} requests, filters {len(logger.filters):>7}, {memory}, {latency}")
+            # Очищаем вывод, чтобы в памяти оставалось только то, что держат логгер и фильтры
+            stream.seek(0)
+            stream.truncate()
+            start = perf_counter()
+    tracemalloc.stop()
+    assert request_id_var.get() is None
+
+
+async def main(args: argparse.Namespace) -> None:
+    await soak(legacy=True, requests=args.legacy_requests, report=args.legacy_requests // 5)
+    await soak(legacy=False, requests=args.requests, report=args.requests // 10)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=1000000)
+    parser.add_argument(
+        "--legacy-requests",
+        type=int,
+        default=10000,
+        help="в режиме legacy стоимость записи растет линейно, миллион запросов займет часы",
+    )
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,74 @@
+"""Сравнение задержки ElasticInterface.search_query в режимах count + search и search с track_total_hits.
+
+Вместо ElasticSearch используется заглушка с фиксированной сетевой задержкой на каждый запрос,
+поэтому результат показывает стоимость количества обращений к кластеру, а не скорость поиска.
+
+Запуск из каталога сервиса: python -m benchmarks.search_query --requests 500 --latency-ms 5
+"""
+import argparse
+import asyncio
+from statistics import mean, quantiles
+from time import perf_counter
+from typing import Any
+
+from interfaces.db_interface import ElasticInterface, app_settings
+
+
+class ElasticStandIn:
+    def __init__(self, latency_sec: float, total: int = 1000):
+        self.latency_sec = latency_sec
+        self.total = total
+        self.calls = 0
+
+    async def count(self, **kwargs: Any) -> dict[str, Any]:
+        self.calls += 1
+        await asyncio.sleep(self.latency_sec)
+        return {"count": self.total}
+
+    async def search(self, body: dict[str, Any], **kwargs: Any) -> dict[str, Any]:
+        self.calls += 1
+        await asyncio.sleep(self.latency_sec)
+        hits = [{"_source": {"id": str(num), "title": "film"}} for num in range(body.get("size", 0))]
+        return {"hits": {"total": {"value": self.total, "relation": "eq"}, "hits": hits}}
+
+    async def close(self) -> None:
+        pass  # noqa
+
+
+async def measure(single_request: bool, requests: int, concurrency: int, latency_sec: float) -> dict[str, float]:
+    app_settings.elastic.single_request_search = single_request
+    stand_in = ElasticStandIn(latency_sec)
+    interface = ElasticInterface(stand_in)  # type: ignore
+    semaphore = asyncio.Semaphore(concurrency)
+    timings: list[float] = []
+
+    async def one_request(page_number: int) -> None:
+        async with semaphore:
+            start = perf_counter()
+            await interface.search_query("movies", page_number, 20, sort="-imdb_rating")
+            timings.append(perf_counter() - start)
+
+    await asyncio.gather(*(one_request(num % 50 + 1) for num in range(requests)))
+    percentiles = quantiles(timings, n=100)
+    return {
+        "mean_ms": mean(timings) * 1000,
+        "p50_ms": percentiles[49] * 1000,
+        "p99_ms": percentiles[98] * 1000,
+        "es_calls": stand_in.calls,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    latency_sec = args.latency_ms / 1000
+    for name, single_request in (("count + search", False), ("track_total_hits", True)):
+        result = await measure(single_request, args.requests, args.concurrency, latency_sec)
+        latency = ", ".join(f"{key[:-3]} {result[key]:.2f} ms" for key in ("mean_ms", "p50_ms", "p99_ms"))
+        print(f"{name:>18}: {latency}, ES calls {result['es_calls']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=5)
+    asyncio.run(main(parser.parse_args()))
@@ -1,4 +1,5 @@
 import os
+from typing import Literal
 
 from opentelemetry import trace
 from opentelemetry.exporter.jaeger.thrift import JaegerExporter
@@ -13,12 +14,39 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 class RedisSettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="redis_")
     dsn: RedisDsn
+    # Канал, в который ETL публикует идентификаторы переиндексированных документов
+    indexed_channel: str = "etl:indexed"
 
 
 # Настройки Elasticsearch
 class ElasticSettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="elastic_")
     base_url: HttpUrl
+    # Порог точного подсчета документов, далее подсчет приблизительный, None - точный подсчет без порога.
+    # Отключить подсчет нельзя: без количества документов ответ поиска не содержит total для пагинации
+    track_total_hits: int | None = None
+    # Ограничение глубины пагинации (from + size), совпадает с index.max_result_window
+    max_result_window: int = 10000
+    # Получение документов и их количества одним запросом вместо count + search
+    single_request_search: bool = True
+    # Время жизни point in time между запросами страниц курсорной пагинации
+    point_in_time_keep_alive: str = "1m"
+
+    @property
+    def total_hits(self) -> int | bool:
+        return True if self.track_total_hits is None else self.track_total_hits
+
+
+# Настройки локального уровня кэша ответов
+class CacheSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="cache_")
+    expire: int = 3600
+    local_max_bytes: int = 64 * 1024 * 1024
+    local_ttl: int = 10
+    coalesce_timeout: float = 3
+    # Кэш подписок пользователя, время жизни дополнительно ограничено ближайшим окончанием подписки
+    subscriptions_max_ttl: int = 300
+    subscriptions_local_max_size: int = 10000
 
 
 class AuthSettings(BaseSettings):
@@ -29,6 +57,23 @@ class AuthSettings(BaseSettings):
     refresh_url: HttpUrl
     username: str
     password: str
+    # local - проверка подписи, срока действия и отзыва токена на месте, remote - запрос ролей в сервисе auth
+    token_verification: Literal["local", "remote"] = "remote"
+    jwt_algorithm: str = "HS256"
+    jwt_secret_key: str | None = None
+    jwt_public_key_file: str | None = None
+    # Redis сервиса auth со списком отозванных токенов
+    denylist_redis_dsn: RedisDsn | None = None
+    # Обращаться в сервис auth, если локальная проверка недоступна
+    remote_fallback: bool = False
+
+    def jwt_verification_key(self) -> str:
+        if self.jwt_public_key_file:
+            with open(self.jwt_public_key_file) as key_file:
+                return key_file.read()
+        if self.jwt_secret_key:
+            return self.jwt_secret_key
+        raise ValueError("AUTH_JWT_SECRET_KEY or AUTH_JWT_PUBLIC_KEY_FILE is required for local token verification")
 
 
 class FastApiSettings(BaseSettings):
@@ -56,16 +101,34 @@ class LogstashSettings(BaseSettings):
 class BillingService(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="billing_")
     user_subscription_list_url: HttpUrl
+    # Канал, в который billing публикует id пользователей с изменившимися подписками
+    subscription_events_channel: str = "billing:user_subscriptions"
+
+
+class HttpClientSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="http_client_")
+    limit: int = 100
+    limit_per_host: int = 20
+    dns_cache_ttl: int = 300
+    keepalive_timeout: float = 30
+    timeout: float = 10
+    connect_timeout: float = 3
+    retries: int = 2
+    retry_backoff: float = 0.1
+    retry_budget_ratio: float = 0.2
+    retry_budget_max: float = 10
 
 
 class AppSettings:
     elastic = ElasticSettings()
     redis = RedisSettings()
+    cache = CacheSettings()
     auth = AuthSettings()
     logstash = LogstashSettings()
     jaeger = JaegerSetting()
     app = FastApiSettings()
     billing = BillingService()
+    http_client = HttpClientSettings()
     tracer_enable = bool(int(os.getenv("TRACER_ENABLE")))
     BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -1,4 +1,5 @@
-from typing import Annotated
+import asyncio
+from typing import Annotated, Any
 from uuid import UUID
 
 import aiohttp
@@ -7,10 +8,14 @@ import jwt
 from fastapi import Depends, HTTPException, Query, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from opentelemetry import trace
+from redis.exceptions import RedisError
 
 from api.v1.models import PaginatedParams
 from core.config import AppSettings, settings
+from core.http_client import HttpClient, get_http_client
 from services.auth import get_auth_client, AuthService
+from services.jwt_verifier import JWTVerifier, get_jwt_verifier
+from services.subscription_cache import SubscriptionCache, get_subscription_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=str(AppSettings.auth.login_redirect_url))
 
@@ -24,37 +29,63 @@ async def paginator_params_dep(
     return PaginatedParams(page_size=page_size, page_number=page_number)
 
 
+async def token_claims_dep(
+    token=Depends(oauth2_scheme),
+    verifier: JWTVerifier | None = Depends(get_jwt_verifier),
+) -> dict[str, Any] | None:
+    """Содержимое проверенного на месте токена, None если локальная проверка выключена или недоступна"""
+    if verifier is None:
+        return None
+    with tracer.start_as_current_span("verify-token"):
+        try:
+            return await verifier.verify(token)
+        except jwt.InvalidTokenError:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Auth Error")
+        except RedisError:
+            if settings.auth.remote_fallback:
+                return None
+            raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Token denylist is not responding")
+
+
 async def token_roles_dep(
     request: Request,
     token=Depends(oauth2_scheme),
+    claims: dict[str, Any] | None = Depends(token_claims_dep),
+    http_client: HttpClient = Depends(get_http_client),
 ) -> set[str]:
+    if claims is not None:
+        return JWTVerifier.get_roles(claims)
     with tracer.start_as_current_span("check-token-request"):
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{AppSettings.auth.base_url}roles",
-                    headers={
-                        "Authorization": f"Bearer {token}",
-                        "x-request-id": request.headers.get("x-request-id"),
-                    },
-                ) as response:
-                    if response.status != status.HTTP_200_OK:
-                        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Auth Error")
-                    return set(await response.json())
-        except Exception:
+            async with http_client.get(
+                f"{AppSettings.auth.base_url}roles",
+                headers={"Authorization": f"Bearer {token}"},
+            ) as response:
+                if response.status != status.HTTP_200_OK:
+                    raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Auth Error")
+                return set(await response.json())
+        except (aiohttp.ClientError, asyncio.TimeoutError):
             raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Auth service is not responding")
 
 
 async def user_subscriptions_dep(
     request: Request,
     token=Depends(oauth2_scheme),
+    claims: dict[str, Any] | None = Depends(token_claims_dep),
     auth_client: AuthService = Depends(get_auth_client),
+    subscription_cache: SubscriptionCache = Depends(get_subscription_cache),
 ) -> list[UUID]:
-    user_id = jwt.decode(token, options={'verify_signature': False})['sub']
-    user_subscriptions_raw = []
+    if claims is None:
+        # подпись уже проверена сервисом auth в token_roles_dep
+        claims = jwt.decode(token, options={'verify_signature': False})
+    user_id = claims['sub']
+    user_subscriptions = await subscription_cache.get(UUID(user_id))
+    if user_subscriptions is not None:
+        return user_subscriptions
+    generation = await subscription_cache.generation(UUID(user_id))
     with tracer.start_as_current_span("get_user_subscriptions"):
         user_subscriptions_raw = await auth_client.get_query(
             url=str(settings.billing.user_subscription_list_url).replace('user_id', user_id),
             request_id=request.headers.get("x-request-id"),
         )
-    return [UUID(subscription['subscription_id']) for subscription in user_subscriptions_raw]
+    return await subscription_cache.set(UUID(user_id), user_subscriptions_raw, generation)
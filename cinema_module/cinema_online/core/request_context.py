@@ -0,0 +1,59 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from types import SimpleNamespace
+from typing import Iterator
+
+import aiohttp
+from opentelemetry import trace
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+REQUEST_ID_HEADER = "X-Request-Id"
+
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+
+@contextmanager
+def request_id_context(request_id: str | None) -> Iterator[None]:
+    token = request_id_var.set(request_id)
+    try:
+        yield
+    finally:
+        request_id_var.reset(token)
+
+
+class RequestContextMiddleware:
+    """Сохранение X-Request-Id входящего запроса в контекст на все время его обработки.
+
+    Контекст читают фильтр логов, исходящие запросы aiohttp и span запроса OpenTelemetry.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_id = Headers(scope=scope).get(REQUEST_ID_HEADER)
+        if request_id:
+            trace.get_current_span().set_attribute("http.request_id", request_id)
+        with request_id_context(request_id):
+            await self.app(scope, receive, send)
+
+
+async def _add_request_id_header(
+    session: aiohttp.ClientSession,
+    trace_config_ctx: SimpleNamespace,
+    params: aiohttp.TraceRequestStartParams,
+) -> None:
+    request_id = request_id_var.get()
+    if request_id and REQUEST_ID_HEADER not in params.headers:
+        params.headers[REQUEST_ID_HEADER] = request_id
+
+
+def request_id_trace_config() -> aiohttp.TraceConfig:
+    """Передача id текущего запроса в заголовке исходящих запросов сессии aiohttp"""
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(_add_request_id_header)
+    return trace_config
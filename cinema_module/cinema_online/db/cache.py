@@ -0,0 +1,436 @@
+import asyncio
+import hashlib
+import inspect
+import json
+import logging
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from functools import wraps
+from itertools import chain
+from time import monotonic
+from typing import Any, Awaitable, Callable
+from uuid import UUID
+
+import backoff
+from fastapi_cache import FastAPICache, decorator
+from fastapi_cache.backends import Backend
+from fastapi_cache.backends.redis import RedisBackend
+from redis.asyncio import Redis
+from redis.exceptions import ConnectionError, TimeoutError
+
+from pydantic import BaseModel
+
+from services.services import Service
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RouteCacheStats:
+    local_hits: int = 0
+    remote_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+
+@dataclass
+class LocalCacheItem:
+    value: str
+    expire_at: float
+    size: int
+
+
+@dataclass
+class InflightRequest:
+    future: asyncio.Future
+    deadline: float
+    owner: asyncio.Task | None
+
+
+@dataclass(frozen=True)
+class IndexCacheRoutes:
+    detail: str
+    lists: tuple[str, ...]
+
+
+# Обработчики, ответы которых зависят от документов индекса: карточка документа и списки
+INDEX_ROUTES = {
+    "movies": IndexCacheRoutes(
+        detail="get_film_info",
+        lists=("get_film_list", "search_by_films", "get_films_by_genre", "get_movies_with_person_participation"),
+    ),
+    "genres": IndexCacheRoutes(detail="get_genre_info", lists=("get_genre_list",)),
+    "persons": IndexCacheRoutes(detail="get_person_info", lists=("get_person_list", "search_by_person")),
+}
+LIST_ROUTES = {route for routes in INDEX_ROUTES.values() for route in routes.lists}
+NO_ENTITY = "-"
+CacheBypass = Callable[[dict[str, Any]], bool]
+Endpoint = Callable[..., Awaitable[Any]]
+FetchDocuments = Callable[[list[UUID]], Awaitable[dict[str, BaseModel]]]
+InvalidationHandler = Callable[[dict[str, Any]], Awaitable[None]]
+
+
+def build_cache_key(
+    route: str,
+    entity_id: str = NO_ENTITY,
+    params: dict[str, Any] | None = None,
+    namespace: str = "",
+) -> str:
+    params_hash = hashlib.md5(f"{params or {}}".encode()).hexdigest()  # noqa: S324
+    return f"{FastAPICache.get_prefix()}:{namespace}:{route}:{entity_id}:{params_hash}"
+
+
+def route_key_builder(
+    func: Callable[..., Any],
+    namespace: str = "",
+    request: Any = None,
+    response: Any = None,
+    args: tuple[Any, ...] | None = None,
+    kwargs: dict[str, Any] | None = None,
+) -> str:
+    """Построение ключа кэша вида prefix:namespace:обработчик:id сущности из пути:хэш параметров.
+
+    Зависимости-сервисы в ключ не попадают.
+    """
+    params = {key: value for key, value in (kwargs or {}).items() if not isinstance(value, Service)}
+    entity_key = next((key for key in params if key.endswith("_id")), None)
+    entity_id = str(params.pop(entity_key)) if entity_key else NO_ENTITY
+    return build_cache_key(func.__name__, entity_id, params, namespace)
+
+
+def route_from_key(key: str) -> str:
+    return key.rsplit(":", 3)[-3]
+
+
+def route_tag(route: str) -> str:
+    return f"{FastAPICache.get_prefix()}:tags:{route}"
+
+
+class TieredCacheBackend(Backend):
+    """Двухуровневый кэш: ограниченный по объему LRU в памяти процесса перед общим бэкендом.
+
+    Одновременные промахи по одному ключу объединяются: обработчик выполняет только первый запрос,
+    остальные ждут, пока первый запишет результат в кэш, а при его ошибке (см. release) выполняют обработчик сами.
+    """
+
+    def __init__(
+        self,
+        backend: RedisBackend,
+        max_bytes: int,
+        local_ttl: int,
+        coalesce_timeout: float,
+    ):
+        self.backend = backend
+        self.max_bytes = max_bytes
+        self.local_ttl = local_ttl
+        self.coalesce_timeout = coalesce_timeout
+        self.size = 0
+        self._local: OrderedDict[str, LocalCacheItem] = OrderedDict()
+        self._inflight: dict[str, InflightRequest] = {}
+        self._stats: dict[str, RouteCacheStats] = {}
+
+    @property
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {route: asdict(route_stats) for route, route_stats in self._stats.items()}
+
+    async def get_with_ttl(self, key: str) -> tuple[int, str | None]:
+        route_stats = self._route_stats(key)
+        item = self._get_local(key)
+        if item is not None:
+            route_stats.local_hits += 1
+            return int(item.expire_at - monotonic()), item.value
+        ttl, value = await self.backend.get_with_ttl(key)
+        if value is not None:
+            route_stats.remote_hits += 1
+            self._set_local(key, value, ttl)
+            return ttl, value
+        return await self._coalesce(key, route_stats)
+
+    async def get_many(self, keys: list[str]) -> list[str | None]:
+        """Получение нескольких значений: сначала из памяти процесса, оставшиеся одним MGET из Redis"""
+        values: dict[str, str | None] = {}
+        for key in keys:
+            item = self._get_local(key)
+            if item is not None:
+                self._route_stats(key).local_hits += 1
+                values[key] = item.value
+        remote_keys = [remote_key for remote_key in keys if remote_key not in values]
+        if remote_keys:
+            values.update(await self._get_remote(remote_keys))
+        return [values.get(value_key) for value_key in keys]
+
+    async def set_many(self, items: dict[str, str], expire: int | None = None) -> None:
+        async with self.backend.redis.pipeline(transaction=False) as pipe:
+            for remote_key, remote_value in items.items():
+                pipe.set(remote_key, remote_value, ex=expire)
+            await pipe.execute()
+        for key, value in items.items():
+            self._set_local(key, value, expire)
+
+    async def get(self, key: str) -> str | None:
+        item = self._get_local(key)
+        if item is not None:
+            return item.value
+        return await self.backend.get(key)
+
+    async def set(self, key: str, value: str, expire: int | None = None) -> None:
+        # Ожидающие промаха запросы получают значение сразу, новые находят его в памяти процесса
+        self._set_local(key, value, expire)
+        inflight = self._inflight.pop(key, None)
+        if inflight is not None and not inflight.future.done():
+            inflight.future.set_result(value)
+        await self.backend.set(key, value, expire)
+        if route_from_key(key) in LIST_ROUTES:
+            await self._add_to_route_tag(key, expire)
+
+    def release(self, key: str, error: BaseException) -> None:
+        """Снятие промаха, начатого текущим запросом, если обработчик завершился ошибкой и set не вызывался"""
+        inflight = self._inflight.get(key)
+        if inflight is None or inflight.owner is not asyncio.current_task():
+            return
+        del self._inflight[key]
+        if inflight.future.done():
+            return
+        if isinstance(error, Exception):
+            inflight.future.set_exception(error)
+            # Без ожидающих запросов ошибка не должна попадать в лог как необработанная
+            inflight.future.exception()
+        else:
+            inflight.future.cancel()
+
+    async def clear(self, namespace: str | None = None, key: str | None = None) -> int:
+        if namespace:
+            namespace_keys = [local_key for local_key in self._local if local_key.startswith(f"{namespace}:")]
+            self._drop_local(namespace_keys)
+        elif key:
+            self._pop_local(key)
+        return await self.backend.clear(namespace, key)
+
+    async def invalidate(self, index: str, ids: list[str] | None) -> None:
+        """Удаление из обоих уровней кэша карточек с указанными id и всех списков, зависящих от индекса.
+
+        ids=None - индекс обновлен целиком (перестройка, полная перезагрузка), удаляются все его карточки.
+        """
+        routes = INDEX_ROUTES.get(index)
+        if routes is None:
+            return
+        if ids is None:
+            dropped_routes = {routes.detail, *routes.lists}
+            detail_keys = await self._route_keys(routes.detail)
+        else:
+            dropped_routes = set(routes.lists)
+            detail_keys = [build_cache_key(routes.detail, entity_id) for entity_id in ids]
+        self._drop_local(detail_keys)
+        self._drop_local([local_key for local_key in self._local if route_from_key(local_key) in dropped_routes])
+        tags = [route_tag(route) for route in routes.lists]
+        list_keys = await self._tagged_keys(tags)
+        await self.backend.redis.delete(*detail_keys, *list_keys, *tags)
+        self._stats.setdefault(routes.detail, RouteCacheStats()).invalidations += len(detail_keys)
+        for list_route in routes.lists:
+            self._stats.setdefault(list_route, RouteCacheStats()).invalidations += 1
+
+    async def _coalesce(self, key: str, route_stats: RouteCacheStats) -> tuple[int, str | None]:
+        """Промах по ключу: первый запрос выполняет обработчик, одновременные с ним ждут его результата"""
+        inflight = self._inflight.get(key)
+        if inflight is None or inflight.deadline < monotonic():
+            # Первый промах, запрос выполняет обработчик и сохраняет результат через set
+            self._sweep_inflight()
+            self._inflight[key] = InflightRequest(
+                future=asyncio.get_running_loop().create_future(),
+                deadline=monotonic() + self.coalesce_timeout,
+                owner=asyncio.current_task(),
+            )
+            route_stats.misses += 1
+            return 0, None
+        route_stats.coalesced += 1
+        try:
+            value = await asyncio.wait_for(asyncio.shield(inflight.future), self.coalesce_timeout)
+        except Exception:
+            # Истекло ожидание или обработчик первого запроса завершился ошибкой (например, 404),
+            # запрос выполняется сам
+            return 0, None
+        return self.local_ttl, value
+
+    async def _get_remote(self, keys: list[str]) -> dict[str, str | None]:
+        values = dict(zip(keys, await self.backend.redis.mget(keys)))
+        for key, value in values.items():
+            if value is None:
+                self._route_stats(key).misses += 1
+            else:
+                self._route_stats(key).remote_hits += 1
+                self._set_local(key, value, self.local_ttl)
+        return values
+
+    async def _route_keys(self, route: str) -> list[str]:
+        pattern = f"{FastAPICache.get_prefix()}:*:{route}:*"
+        return [route_key async for route_key in self.backend.redis.scan_iter(match=pattern)]
+
+    async def _tagged_keys(self, tags: list[str]) -> list[str]:
+        async with self.backend.redis.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.smembers(tag)
+            members = await pipe.execute()
+        return list(chain.from_iterable(members))
+
+    async def _add_to_route_tag(self, key: str, expire: int | None) -> None:
+        tag = route_tag(route_from_key(key))
+        async with self.backend.redis.pipeline(transaction=False) as pipe:
+            pipe.sadd(tag, key)
+            if expire:
+                pipe.expire(tag, expire)
+            await pipe.execute()
+
+    def _sweep_inflight(self) -> None:
+        """Удаление промахов, не завершенных за coalesce_timeout, их уже никто не ждет"""
+        now = monotonic()
+        expired = [inflight_key for inflight_key, inflight in self._inflight.items() if inflight.deadline < now]
+        for key in expired:
+            self._inflight.pop(key).future.cancel()
+
+    def _route_stats(self, key: str) -> RouteCacheStats:
+        return self._stats.setdefault(route_from_key(key), RouteCacheStats())
+
+    def _get_local(self, key: str) -> LocalCacheItem | None:
+        item = self._local.get(key)
+        if item is None:
+            return None
+        if item.expire_at <= monotonic():
+            self._pop_local(key)
+            return None
+        self._local.move_to_end(key)
+        return item
+
+    def _set_local(self, key: str, value: str, expire: int | None) -> None:
+        if self.local_ttl <= 0:
+            return
+        ttl = min(expire, self.local_ttl) if expire and expire > 0 else self.local_ttl
+        size = len(value.encode()) if isinstance(value, str) else len(value)
+        if size > self.max_bytes:
+            return
+        self._pop_local(key)
+        self._local[key] = LocalCacheItem(value=value, expire_at=monotonic() + ttl, size=size)
+        self.size += size
+        while self.size > self.max_bytes:
+            evicted_key, evicted_item = self._local.popitem(last=False)
+            self.size -= evicted_item.size
+            self._route_stats(evicted_key).evictions += 1
+
+    def _drop_local(self, keys: list[str]) -> None:
+        for key in keys:
+            self._pop_local(key)
+
+    def _pop_local(self, key: str) -> LocalCacheItem | None:
+        item = self._local.pop(key, None)
+        if item is not None:
+            self.size -= item.size
+        return item
+
+
+def release_on_error(func: Endpoint, namespace: str = "") -> Endpoint:
+    """Обертка обработчика, снимающая объединение промахов по его ключу, если обработчик завершился ошибкой.
+
+    Иначе одновременные запросы того же ключа ждали бы coalesce_timeout и получали промах.
+    """
+
+    @wraps(func)
+    async def wrapped(*args: Any, **kwargs: Any) -> Any:
+        try:
+            return await func(*args, **kwargs)
+        except (Exception, asyncio.CancelledError) as error:
+            backend = FastAPICache.get_backend()
+            if isinstance(backend, TieredCacheBackend):
+                key_builder = FastAPICache.get_key_builder()
+                backend.release(key_builder(wrapped, namespace, args=args, kwargs=kwargs), error)
+            raise
+
+    return wrapped
+
+
+def bypass_cache(cached: Endpoint, func: Endpoint, bypass: CacheBypass) -> Endpoint:
+    """Обертка кэшируемого обработчика, вызывающая обработчик без кэша, если bypass(параметры) истинно"""
+    func_params = inspect.signature(func).parameters
+
+    @wraps(cached)
+    async def wrapped(*args: Any, **kwargs: Any) -> Any:
+        if not bypass(kwargs):
+            return await cached(*args, **kwargs)
+        # request и response добавлены в сигнатуру fastapi_cache, обработчику передаются только его параметры
+        return await func(*args, **{name: param for name, param in kwargs.items() if name in func_params})
+
+    return wrapped
+
+
+def cache(
+    expire: int | None = None,
+    namespace: str = "",
+    bypass: CacheBypass | None = None,
+) -> Callable[[Endpoint], Endpoint]:
+    """Декоратор fastapi_cache со снятием объединения промахов при ошибке и выполнением части запросов без кэша"""
+
+    def wrapper(func: Endpoint) -> Endpoint:
+        cached = decorator.cache(expire=expire, namespace=namespace)(release_on_error(func, namespace))
+        return cached if bypass is None else bypass_cache(cached, func, bypass)
+
+    return wrapper
+
+
+async def get_many_cached(
+    route: str,
+    entity_ids: list[UUID],
+    fetch: FetchDocuments,
+    expire: int,
+) -> dict[str, Any]:
+    """Пакетное получение документов с использованием кэша карточек обработчика route.
+
+    Документы, которых нет в кэше, запрашиваются одним вызовом fetch и сохраняются в кэш карточек.
+    """
+    backend: TieredCacheBackend = FastAPICache.get_backend()  # type: ignore
+    coder = FastAPICache.get_coder()
+    keys = {str(entity_id): build_cache_key(route, str(entity_id)) for entity_id in entity_ids}
+    cached_values = await backend.get_many(list(keys.values()))
+    documents: dict[str, Any] = {}
+    missing_ids = []
+    for entity_id, cached_value in zip(entity_ids, cached_values):
+        if cached_value is None:
+            missing_ids.append(entity_id)
+        else:
+            documents[str(entity_id)] = coder.decode(cached_value)
+    if missing_ids:
+        fetched = await fetch(missing_ids)
+        documents.update(fetched)
+        if fetched:
+            await backend.set_many(
+                {keys[fetched_id]: coder.encode(document) for fetched_id, document in fetched.items()},
+                expire,
+            )
+    return documents
+
+
+class CacheInvalidator:
+    """Подписка на оповещения других сервисов об изменении данных и сброс зависящего от них кэша"""
+
+    def __init__(self, redis: Redis, handlers: dict[str, InvalidationHandler]):
+        self.redis = redis
+        self.handlers = handlers
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._listen())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+    @backoff.on_exception(backoff.expo, exception=(ConnectionError, TimeoutError), max_value=30)
+    async def _listen(self) -> None:
+        async with self.redis.pubsub() as pubsub:
+            await pubsub.subscribe(*self.handlers)
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                try:
+                    await self.handlers[message["channel"]](json.loads(message["data"]))
+                except (ValueError, KeyError, TypeError):
+                    logger.warning("Invalid cache invalidation message in %s: %s", message["channel"], message["data"])
@@ -7,11 +7,19 @@ from elasticsearch import AsyncElasticsearch, NotFoundError
 from opentelemetry import trace
 
 from core.config import AppSettings
-from services.exceptions import NotFoundException
-from services.query_params import ElasticSearchQueryBuilder, sort_params
+from services.exceptions import InvalidCursor, NotFoundException, PageOutOfRange
+from services.query_params import (
+    ElasticSearchQueryBuilder,
+    cursor_filter,
+    decode_cursor,
+    encode_cursor,
+    sort_params,
+)
 
 tracer = trace.get_tracer(__name__)
 app_settings = AppSettings()
+# Количество найденных документов и документы страницы
+SearchPage = tuple[int, list[dict[str, Any]]]
 
 
 class DBInterface(ABC):
@@ -23,6 +31,10 @@ class DBInterface(ABC):
     async def get_query(self, source: str, entity_id: UUID) -> dict[str, Any]:  # noqa
         pass  # noqa
 
+    @abstractmethod
+    async def mget_query(self, source: str, entity_ids: list[UUID]) -> dict[str, dict[str, Any]]:  # noqa
+        pass  # noqa
+
     @abstractmethod
     async def search_query(
         self,
@@ -36,6 +48,19 @@ class DBInterface(ABC):
     ) -> dict[str, Any]:
         pass  # noqa
 
+    @abstractmethod
+    async def cursor_search_query(
+        self,
+        source: str,
+        page_size: int,
+        cursor: str,
+        query_phrase: str | None = None,
+        nested_query: dict[str, UUID] | None = None,
+        sort: str = "",
+        fields: list[str] | None = None,
+    ) -> dict[str, Any]:
+        pass  # noqa
+
 
 class ElasticInterface(DBInterface):
     def __init__(self, elastic: AsyncElasticsearch):
@@ -50,6 +75,12 @@ class ElasticInterface(DBInterface):
                 raise NotFoundException from ex
             return result["_source"]
 
+    async def mget_query(self, source: str, entity_ids: list[UUID]) -> dict[str, dict[str, Any]]:
+        """Метод возвращает найденные документы по списку entity_id одним запросом, ключ словаря - id документа"""
+        with tracer.start_as_current_span("elasticsearch-request"):
+            result = await self.client.mget(index=source, ids=[str(entity_id) for entity_id in entity_ids])
+            return {doc["_id"]: doc["_source"] for doc in result["docs"] if doc.get("found")}
+
     async def search_query(
         self,
         source: str,
@@ -69,6 +100,8 @@ class ElasticInterface(DBInterface):
         :param sort: сортировка, может принимать значения ["imdb_rating", "-imdb_rating"]
         :param fields: список возвращаемых полей
         """
+        if page_number * page_size > app_settings.elastic.max_result_window:
+            raise PageOutOfRange
         with tracer.start_as_current_span("elasticsearch-request"):
             query_builder = ElasticSearchQueryBuilder()
             processed_sort = sort_params.get(sort)
@@ -76,24 +109,152 @@ class ElasticInterface(DBInterface):
                 query_builder.add_nested_search_params_id(nested_query)
             else:
                 query_builder.add_search_param(query_phrase)
-            count_responce = await self.client.count(index=source, body=query_builder.query)  # type: ignore
-            item_count = count_responce["count"]
-            query_builder.add_pagination(page=page_number, size=page_size)
-            result = await self.client.search(
-                index=source,
-                sort=processed_sort,
-                body=query_builder.query,  # type: ignore
-                source_includes=fields,
+            if app_settings.elastic.single_request_search:
+                item_count, documents = await self._search_with_total(
+                    source,
+                    query_builder,
+                    page_number,
+                    page_size,
+                    processed_sort,
+                    fields,
+                )
+            else:
+                item_count, documents = await self._count_and_search(
+                    source,
+                    query_builder,
+                    page_number,
+                    page_size,
+                    processed_sort,
+                    fields,
+                )
+            # Страницы за пределами max_result_window недоступны, поэтому не предлагаем их клиенту
+            total_page = ceil(min(item_count, app_settings.elastic.max_result_window) / page_size)
+            return {
+                "count": item_count,
+                "total_pages": total_page,
+                "prev": page_number - 1 if page_number > 1 else None,
+                "next": page_number + 1 if page_number < total_page else None,
+                "page": page_number,
+                "results": documents,
+            }
+
+    async def cursor_search_query(
+        self,
+        source: str,
+        page_size: int,
+        cursor: str,
+        query_phrase: str | None = None,
+        nested_query: dict[str, UUID] | None = None,
+        sort: str = "",
+        fields: list[str] | None = None,
+    ) -> dict[str, Any]:
+        """Метод получения списка документов через point in time и search_after.
+
+        Стоимость запроса не зависит от глубины страницы и не ограничена max_result_window.
+
+        :param page_size: размер страницы
+        :param cursor: значение next_cursor предыдущей страницы, пустая строка для первой страницы
+        :param query_phrase: фраза для поиска
+        :param nested_query: словарь, где ключ название поля для вложенного объекта, значение поля
+        :param sort: сортировка, может принимать значения ["imdb_rating", "-imdb_rating"]
+        :param fields: список возвращаемых полей
+        """
+        state = decode_cursor(cursor)
+        sort = sort or ""
+        filters = cursor_filter(query_phrase, nested_query)
+        # Курсор действителен только с теми же сортировкой и условиями выборки, с которыми он получен
+        if state["sort"] not in {None, sort} or state["filter"] not in {None, filters}:
+            raise InvalidCursor
+        with tracer.start_as_current_span("elasticsearch-request"):
+            pit_id = state["pit"] or await self._open_point_in_time(source)
+            query_builder = ElasticSearchQueryBuilder()
+            if nested_query:
+                query_builder.add_nested_search_params_id(nested_query)
+            else:
+                query_builder.add_search_param(query_phrase)
+            query_builder.add_search_after(
+                size=page_size,
+                sort=sort_params.get(sort),
+                pit_id=pit_id,
+                keep_alive=app_settings.elastic.point_in_time_keep_alive,
+                search_after=state["after"],
             )
+            try:
+                result = await self.client.search(
+                    body=query_builder.query,  # type: ignore
+                    source_includes=fields,
+                    track_total_hits=app_settings.elastic.total_hits,
+                )
+            except NotFoundError as ex:  # noqa
+                # point in time истек или был закрыт
+                raise InvalidCursor from ex
+            hits = result["hits"]["hits"]
+            item_count = result["hits"]["total"]["value"]
+            page_number = state["page"]
             total_page = ceil(item_count / page_size)
+            next_cursor = None
+            # Число документов может быть ограничено порогом track_total_hits, поэтому о следующей странице
+            # судим по заполненности текущей
+            if len(hits) == page_size:
+                next_cursor = encode_cursor(page_number + 1, sort, filters, hits[-1]["sort"], result["pit_id"])
+            else:
+                await self.client.close_point_in_time(id=result["pit_id"])
             return {
                 "count": item_count,
                 "total_pages": total_page,
                 "prev": page_number - 1 if page_number > 1 else None,
-                "next": page_number + 1 if page_number < total_page else None,
+                "next": page_number + 1 if next_cursor else None,
                 "page": page_number,
-                "results": [doc["_source"] for doc in result["hits"]["hits"]],
+                "results": [doc["_source"] for doc in hits],
+                "next_cursor": next_cursor,
             }
 
     async def close(self):
         await self.client.close()
+
+    async def _open_point_in_time(self, source: str) -> str:
+        pit = await self.client.open_point_in_time(
+            index=source,
+            keep_alive=app_settings.elastic.point_in_time_keep_alive,
+        )
+        return pit["id"]
+
+    async def _search_with_total(
+        self,
+        source: str,
+        query_builder: ElasticSearchQueryBuilder,
+        page_number: int,
+        page_size: int,
+        sort: dict[str, Any] | None,
+        fields: list[str] | None,
+    ) -> SearchPage:
+        """Получение страницы документов и их общего количества одним запросом"""
+        query_builder.add_pagination(page=page_number, size=page_size)
+        result = await self.client.search(
+            index=source,
+            sort=sort,
+            body=query_builder.query,  # type: ignore
+            source_includes=fields,
+            track_total_hits=app_settings.elastic.total_hits,
+        )
+        return result["hits"]["total"]["value"], [doc["_source"] for doc in result["hits"]["hits"]]
+
+    async def _count_and_search(
+        self,
+        source: str,
+        query_builder: ElasticSearchQueryBuilder,
+        page_number: int,
+        page_size: int,
+        sort: dict[str, Any] | None,
+        fields: list[str] | None,
+    ) -> SearchPage:
+        """Получение количества документов и страницы документов отдельными запросами count и search"""
+        count_responce = await self.client.count(index=source, body=query_builder.query)  # type: ignore
+        query_builder.add_pagination(page=page_number, size=page_size)
+        result = await self.client.search(
+            index=source,
+            sort=sort,
+            body=query_builder.query,  # type: ignore
+            source_includes=fields,
+        )
+        return count_responce["count"], [doc["_source"] for doc in result["hits"]["hits"]]
@@ -1,7 +1,7 @@
-import logging
 from contextlib import asynccontextmanager
 from logging import config as logging_config
 from typing import Any
+from uuid import UUID
 
 from dotenv import load_dotenv
 from elasticsearch import AsyncElasticsearch, ConnectionError
@@ -13,16 +13,21 @@ from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
 from redis import asyncio as redis_async
 
 from api.v1 import film, genre, person
+from core import http_client
 from core.config import AppSettings
-from core.logger import RequestIdFilter, LOGGING
+from core.logger import LOGGING
+from core.request_context import RequestContextMiddleware, request_id_trace_config
 from core.permission import NoNecessaryRoleError
 from db import db_client
+from db.cache import CacheInvalidator, TieredCacheBackend, route_key_builder
 from interfaces.db_interface import ElasticInterface
-from services import auth
+from services import auth, jwt_verifier, subscription_cache
 from services.exceptions import (
     FilmNotFound,
     GenreNotFound,
+    InvalidCursor,
     NotFoundException,
+    PageOutOfRange,
     PersonNotFound,
 )
 
@@ -39,13 +44,57 @@ async def lifespan(app: FastAPI):  # type: ignore
         encoding="utf8",
         decode_responses=True,
     )
-    FastAPICache.init(RedisBackend(redis), prefix="fastapi-cache")
+    cache_backend = TieredCacheBackend(
+        RedisBackend(redis),
+        max_bytes=app_settings.cache.local_max_bytes,
+        local_ttl=app_settings.cache.local_ttl,
+        coalesce_timeout=app_settings.cache.coalesce_timeout,
+    )
+    FastAPICache.init(cache_backend, prefix="fastapi-cache", key_builder=route_key_builder)
+    subscription_cache.subscription_cache = subscription_cache.SubscriptionCache(
+        redis,
+        max_ttl=app_settings.cache.subscriptions_max_ttl,
+        local_max_size=app_settings.cache.subscriptions_local_max_size,
+    )
+    cache_invalidator = CacheInvalidator(
+        redis,
+        {
+            app_settings.redis.indexed_channel: lambda payload: cache_backend.invalidate(
+                payload["index"],
+                payload["ids"],
+            ),
+            app_settings.billing.subscription_events_channel: lambda payload: (
+                subscription_cache.subscription_cache.invalidate(UUID(payload["user_id"]))
+            ),
+        },
+    )
+    cache_invalidator.start()
     db_client.db = ElasticInterface(AsyncElasticsearch(hosts=[str(app_settings.elastic.base_url)]))  # type: ignore
-    auth.auth_interface = auth.AuthService(**app_settings.auth.model_dump()).connections()
+    http_client.http_client = http_client.HttpClient(
+        **app_settings.http_client.model_dump(),
+        trace_configs=[request_id_trace_config()],
+    )
+    auth.auth_interface = auth.AuthService(**app_settings.auth.model_dump()).connections(http_client.http_client)
+    if app_settings.auth.token_verification == "local":
+        denylist = None
+        if app_settings.auth.denylist_redis_dsn:
+            denylist = redis_async.from_url(
+                str(app_settings.auth.denylist_redis_dsn),
+                encoding="utf8",
+                decode_responses=True,
+            )
+        jwt_verifier.jwt_verifier = jwt_verifier.JWTVerifier(
+            key=app_settings.auth.jwt_verification_key(),
+            algorithm=app_settings.auth.jwt_algorithm,
+            denylist=denylist,
+        )
     yield
+    await cache_invalidator.close()
     await redis.close()
     await db_client.db.close()
-    await auth.auth_interface.close()
+    await http_client.http_client.close()
+    if jwt_verifier.jwt_verifier is not None:
+        await jwt_verifier.jwt_verifier.close()
 
 
 tags_metadata = [
@@ -108,6 +157,21 @@ async def unicorn_elastic_connection_error_handler(request: Request, exc: Except
     )
 
 
+@app.exception_handler(PageOutOfRange)
+async def page_out_of_range_handler(request: Request, exc: PageOutOfRange) -> JSONResponse:
+    limit = app_settings.elastic.max_result_window
+    detail = f"Pagination depth is limited to {limit} documents, use cursor pagination or refine the query"
+    return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"detail": detail})
+
+
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={"detail": "Cursor is invalid or expired, start pagination again"},
+    )
+
+
 @app.exception_handler(NoNecessaryRoleError)
 async def no_necessary_role_error_handler(request: Request, exc: NoNecessaryRoleError) -> JSONResponse:
     if exc.required_roles != "":
@@ -131,12 +195,7 @@ async def before_request(request: Request, call_next):
     return response
 
 
-@app.middleware("http")
-async def add_log_filter(request: Request, call_next):
-    for log_type in ("access", "error"):
-        logger = logging.getLogger("uvicorn.%s" % (log_type,))
-        logger.addFilter(RequestIdFilter(request))
-    return await call_next(request)
+app.add_middleware(RequestContextMiddleware)
 
 
 @app.get("/healthcheck")
@@ -144,4 +203,14 @@ async def health() -> Any:
     return  # noqa
 
 
-FastAPIInstrumentor.instrument_app(app, excluded_urls="healthcheck")
+@app.get("/cache/stats")
+async def cache_stats() -> Any:
+    return FastAPICache.get_backend().stats  # type: ignore
+
+
+@app.get("/http-client/stats")
+async def http_client_stats() -> Any:
+    return http_client.http_client.stats
+
+
+FastAPIInstrumentor.instrument_app(app, excluded_urls="healthcheck,cache/stats,http-client/stats")
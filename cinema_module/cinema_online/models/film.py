@@ -27,3 +27,4 @@ class ExtendedFilm(BaseModel):
 
 class Films(Paginations):
     results: list[Film]
+    next_cursor: str | None = None
@@ -1,13 +1,14 @@
 from __future__ import annotations
 from typing import Any
 from asyncio import Lock
-import aiohttp
 
 from models.token import Tokens
 from http import HTTPStatus
 from pydantic import HttpUrl
 from time import time
 
+from core.http_client import HttpClient
+
 
 auth_interface: AuthService
 
@@ -33,39 +34,30 @@ class AuthService:
         self.refresh_url = str(refresh_url)
         self.username = username
         self.password = password
-        self.session: aiohttp.ClientSession
+        self.http_client: HttpClient
         self.refresh_token = None
         self.access_token = None
         self.access_exp = time()
         self.lock = Lock()
 
-    async def __aenter__(self):
-        return self.connections()
-
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.close()
-
-    def connections(self):
-        self.session: aiohttp.ClientSession = aiohttp.ClientSession()
+    def connections(self, http_client: HttpClient):
+        self.http_client = http_client
         return self
 
-    async def close(self):
-        await self.session.close()
-
     async def get_query(self, url, request_id):
-        async with self.session.get(url=url, headers=await self._get_headers(request_id)) as resp:
+        async with self.http_client.get(url=url, headers=await self._get_headers(request_id)) as resp:
             if resp.ok:
                 return await resp.json()
             elif resp.status in (HTTPStatus.UNAUTHORIZED, HTTPStatus.UNPROCESSABLE_ENTITY):
                 await self.refresh_tokens(request_id)
-                async with self.session.get(url=url, headers=await self._get_headers(request_id)) as resp:  # noqa!
+                async with self.http_client.get(url=url, headers=await self._get_headers(request_id)) as resp:  # noqa!
                     if resp.ok:
                         return await resp.json()
             raise AuthorizationError(f"Error get user info. {await resp.text()}")
 
     async def get_tokens(self, request_id):
         params = {"username": self.username, "password": self.password}
-        async with self.session.post(
+        async with self.http_client.post(
             url=self.login_url,
             data=params,
             headers={"X-Request-Id": request_id},
@@ -80,7 +72,7 @@ class AuthService:
 
     async def refresh_tokens(self, request_id):
         headers = {"Authorization": f"Bearer {self.refresh_token}"}
-        async with self.session.post(url=self.refresh_url, headers=headers) as resp:
+        async with self.http_client.post(url=self.refresh_url, headers=headers) as resp:
             if resp.ok:
                 tokens = Tokens.model_validate_json(await resp.text())
                 self.access_token = tokens.access_token
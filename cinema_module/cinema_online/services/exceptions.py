@@ -20,3 +20,11 @@ class PersonNotFound(NotFoundException):
 
 class DatabaseConnectionError(Exception):
     pass  # noqa
+
+
+class PageOutOfRange(Exception):
+    pass  # noqa
+
+
+class InvalidCursor(Exception):
+    pass  # noqa
@@ -18,10 +18,18 @@ class FilmService(Service):
         result = await self.get_query(entity_id)
         return ExtendedFilm(**result)
 
+    async def get_many(self, entity_ids: list[UUID]) -> dict[str, ExtendedFilm]:
+        results = await self.get_many_query(entity_ids)
+        return {entity_id: ExtendedFilm(**result) for entity_id, result in results.items()}
+
     async def get_list(self, *args: Any, **kwargs: Any) -> Films:
         results = await self.search_query(*args, **kwargs)
         return Films(**results)
 
+    async def get_cursor_list(self, *args: Any, **kwargs: Any) -> Films:
+        results = await self.cursor_search_query(*args, **kwargs)
+        return Films(**results)
+
 
 def get_film_service(
     client: DBInterface = Depends(get_db_client),
@@ -18,6 +18,10 @@ class GenreService(Service):
         result = await self.get_query(entity_id)
         return Genre(**result)
 
+    async def get_many(self, entity_ids: list[UUID]) -> dict[str, Genre]:
+        results = await self.get_many_query(entity_ids)
+        return {entity_id: Genre(**result) for entity_id, result in results.items()}
+
     async def get_list(self, *args: Any, **kwargs: Any) -> Genres:
         results = await self.search_query(*args, **kwargs)
         return Genres(**results)
@@ -0,0 +1,42 @@
+from __future__ import annotations
+from typing import Any
+
+import jwt
+from redis.asyncio import Redis
+
+jwt_verifier: JWTVerifier | None = None
+
+
+async def get_jwt_verifier() -> JWTVerifier | None:
+    return jwt_verifier
+
+
+class JWTVerifier:
+    """Локальная проверка access токенов сервиса auth без обращения к нему по сети"""
+
+    def __init__(self, key: str, algorithm: str, denylist: Redis | None = None):
+        self.key = key
+        self.algorithms = [algorithm]
+        self.denylist = denylist
+
+    async def verify(self, token: str) -> dict[str, Any]:
+        """Метод проверяет подпись, срок действия и отзыв токена, возвращает его содержимое"""
+        claims = jwt.decode(
+            token,
+            self.key,
+            algorithms=self.algorithms,
+            options={"require": ["exp", "sub", "jti"]},
+        )
+        if claims.get("type", "access") != "access":
+            raise jwt.InvalidTokenError("Access token required")
+        if self.denylist is not None and await self.denylist.get(claims["jti"]) == "true":
+            raise jwt.InvalidTokenError("Token has been revoked")
+        return claims
+
+    @staticmethod
+    def get_roles(claims: dict[str, Any]) -> set[str]:
+        return set(filter(None, claims.get("roles", "").split(",")))
+
+    async def close(self) -> None:
+        if self.denylist is not None:
+            await self.denylist.close()
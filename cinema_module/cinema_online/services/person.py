@@ -18,6 +18,10 @@ class PersonService(Service):
         result = await self.get_query(entity_id)
         return ExtendedPerson(**result)
 
+    async def get_many(self, entity_ids: list[UUID]) -> dict[str, ExtendedPerson]:
+        results = await self.get_many_query(entity_ids)
+        return {entity_id: ExtendedPerson(**result) for entity_id, result in results.items()}
+
     async def get_list(self, *args: Any, **kwargs: Any) -> Persons:
         results = await self.search_query(*args, **kwargs)
         return Persons(**results)
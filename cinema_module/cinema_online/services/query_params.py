@@ -1,10 +1,61 @@
+import hashlib
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as DecodeError
 from typing import Any
 from uuid import UUID
 
+from services.exceptions import InvalidCursor
+
 sort_params = {
     "imdb_rating": {"imdb_rating": {"order": "asc"}},
     "-imdb_rating": {"imdb_rating": {"order": "desc"}},
 }
+relevance_sort = {"_score": {"order": "desc"}}
+# Уникальное поле для однозначного порядка документов при курсорной пагинации
+tiebreaker_sort = {"id": {"order": "asc"}}
+
+
+def cursor_filter(query_phrase: str | None = None, nested_query: dict[str, Any] | None = None) -> str:
+    """Метод возвращает отпечаток условий выборки, с которыми был получен курсор"""
+    filters = {"query": query_phrase or "", "nested": {key: str(value) for key, value in (nested_query or {}).items()}}
+    return hashlib.md5(json.dumps(filters, sort_keys=True).encode()).hexdigest()  # noqa: S324
+
+
+def encode_cursor(page: int, sort: str, filters: str, search_after: list[Any], pit_id: str) -> str:
+    """Метод упаковывает состояние курсорной пагинации в непрозрачную строку"""
+    payload = {"page": page, "sort": sort, "filter": filters, "after": search_after, "pit": pit_id}
+    return urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    """Метод распаковывает состояние курсорной пагинации, пустой курсор означает первую страницу.
+
+    Курсор приходит от клиента, поэтому кроме формата проверяются и типы значений.
+    """
+    if not cursor:
+        return {"page": 1, "sort": None, "filter": None, "after": None, "pit": None}
+    payload = _load_cursor(cursor)
+    try:
+        state = {key: payload[key] for key in ("page", "sort", "filter", "after", "pit")}
+    except (KeyError, TypeError) as ex:
+        raise InvalidCursor from ex
+    page = state["page"]
+    if isinstance(page, bool) or not isinstance(page, int) or page < 1:
+        raise InvalidCursor
+    if not all(
+        state[key] is None or isinstance(state[key], value_type)
+        for key, value_type in (("sort", str), ("filter", str), ("after", list), ("pit", str))
+    ):
+        raise InvalidCursor
+    return state
+
+
+def _load_cursor(cursor: str) -> Any:
+    try:
+        return json.loads(urlsafe_b64decode(cursor.encode()))
+    except (DecodeError, ValueError) as ex:
+        raise InvalidCursor from ex
 
 
 class ElasticSearchQueryBuilder:
@@ -23,6 +74,24 @@ class ElasticSearchQueryBuilder:
             },
         )
 
+    def add_search_after(
+        self,
+        size: int,
+        sort: dict[str, Any] | None,
+        pit_id: str,
+        keep_alive: str,
+        search_after: list[Any] | None = None,
+    ) -> None:
+        self._query.update(
+            {
+                "size": size,
+                "sort": [sort or relevance_sort, tiebreaker_sort],
+                "pit": {"id": pit_id, "keep_alive": keep_alive},
+            },
+        )
+        if search_after:
+            self._query["search_after"] = search_after
+
     def add_nested_search_params_id(self, query_params: dict[str, UUID]) -> None:
         query: dict[str, Any] = {
             "query": {
@@ -42,6 +42,17 @@ class Service(ABC):
         except NotFoundException as ex:  # noqa
             raise self.NOT_FOUND_EXCEPTION from ex
 
+    @backoff.on_exception(
+        backoff.expo,
+        exception=ConnectionError,
+        jitter=backoff.random_jitter,
+        base=expo_base_sec,
+        max_time=backoff_max_time_sec,
+    )
+    async def get_many_query(self, entity_ids: list[UUID]) -> dict[str, dict[str, Any]]:
+        """Метод возвращает найденные документы по списку entity_id, отсутствующие документы пропускаются"""
+        return await self.client.mget_query(self.INDEX, entity_ids)
+
     @backoff.on_exception(
         backoff.expo,
         exception=ConnectionError,
@@ -76,3 +87,38 @@ class Service(ABC):
             sort,
             fields,
         )
+
+    @backoff.on_exception(
+        backoff.expo,
+        exception=ConnectionError,
+        jitter=backoff.random_jitter,
+        base=expo_base_sec,
+        max_time=backoff_max_time_sec,
+    )
+    async def cursor_search_query(
+        self,
+        page_size: int,
+        cursor: str,
+        query_phrase: str | None = None,
+        nested_query: dict[str, UUID] | None = None,
+        sort: str = "",
+        fields: list[str] | None = None,
+    ) -> dict[str, Any]:
+        """Метод получения списка документов с курсорной пагинацией.
+
+        :param page_size: размер страницы
+        :param cursor: значение next_cursor предыдущей страницы, пустая строка для первой страницы
+        :param query_phrase: фраза для поиска
+        :param nested_query: словарь, где ключ название поля для вложенного объекта, значение поля
+        :param sort: сортировка, может принимать значения ["imdb_rating", "-imdb_rating"]
+        :param fields: список полей возвращаемых из elastic search
+        """
+        return await self.client.cursor_search_query(
+            self.INDEX,
+            page_size,
+            cursor,
+            query_phrase,
+            nested_query,
+            sort,
+            fields,
+        )
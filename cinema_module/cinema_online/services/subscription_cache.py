@@ -0,0 +1,113 @@
+from __future__ import annotations
+import json
+from collections import OrderedDict
+from datetime import datetime, timezone
+from time import monotonic
+from typing import Any
+from uuid import UUID
+
+from redis.asyncio import Redis
+
+subscription_cache: SubscriptionCache
+
+# Подписки пользователя и момент monotonic(), до которого запись действительна
+LocalEntry = tuple[list[UUID], float]
+
+
+async def get_subscription_cache() -> SubscriptionCache:
+    return subscription_cache  # noqa
+
+
+class SubscriptionCache:
+    """Кэш активных подписок пользователя в памяти процесса и в Redis.
+
+    Запись живет не дольше max_ttl и не дольше ближайшего окончания подписки пользователя,
+    при изменении подписок в billing запись удаляется по оповещению. Оповещение также увеличивает
+    поколение пользователя: ответ billing, запрошенный до оповещения, сохраняется, только если
+    поколение не изменилось, иначе он мог бы заменить удаленную запись устаревшими подписками.
+    """
+
+    PREFIX = "subscriptions"
+    SET_SCRIPT = """
+        if (redis.call('get', KEYS[2]) or '0') == ARGV[1] then
+            return redis.call('set', KEYS[1], ARGV[2], 'EX', ARGV[3])
+        end
+        return nil
+    """
+
+    def __init__(self, redis: Redis, max_ttl: int, local_max_size: int):
+        self.redis = redis
+        self.max_ttl = max_ttl
+        self.local_max_size = local_max_size
+        self._local: OrderedDict[UUID, LocalEntry] = OrderedDict()
+        self._set = redis.register_script(self.SET_SCRIPT)
+
+    async def get(self, user_id: UUID) -> list[UUID] | None:
+        local_item = self._local.get(user_id)
+        if local_item is not None:
+            if local_item[1] > monotonic():
+                self._local.move_to_end(user_id)
+                return local_item[0]
+            self._local.pop(user_id, None)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            ttl, value = await pipe.ttl(self._key(user_id)).get(self._key(user_id)).execute()
+        if value is None:
+            return None
+        subscriptions = [UUID(subscription_id) for subscription_id in json.loads(value)]
+        self._set_local(user_id, subscriptions, ttl)
+        return subscriptions
+
+    async def generation(self, user_id: UUID) -> str:
+        """Поколение подписок пользователя, читается перед запросом к billing"""
+        return await self.redis.get(self._generation_key(user_id)) or "0"
+
+    async def set(self, user_id: UUID, user_subscriptions: list[dict[str, Any]], generation: str) -> list[UUID]:
+        """Сохранение ответа billing со списком подписок, возвращает id подписок.
+
+        Ответ не сохраняется, если после чтения generation пришло оповещение об изменении подписок.
+        """
+        subscriptions = [UUID(subscription["subscription_id"]) for subscription in user_subscriptions]
+        ttl = self._ttl(user_subscriptions)
+        if ttl <= 0:
+            return subscriptions
+        stored = await self._set(
+            keys=[self._key(user_id), self._generation_key(user_id)],
+            args=[generation, json.dumps([str(item) for item in subscriptions]), ttl],
+        )
+        if stored:
+            self._set_local(user_id, subscriptions, ttl)
+        return subscriptions
+
+    async def invalidate(self, user_id: UUID) -> None:
+        self._local.pop(user_id, None)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.incr(self._generation_key(user_id))
+            pipe.expire(self._generation_key(user_id), self.max_ttl)
+            pipe.delete(self._key(user_id))
+            await pipe.execute()
+        # Запись могла попасть в локальный кэш, пока выполнялся запрос к Redis
+        self._local.pop(user_id, None)
+
+    def _ttl(self, user_subscriptions: list[dict[str, Any]]) -> int:
+        now = datetime.now(timezone.utc)
+        ttl = self.max_ttl
+        for subscription in user_subscriptions:
+            expired = datetime.fromisoformat(subscription["expired"])
+            if expired.tzinfo is None:
+                expired = expired.replace(tzinfo=timezone.utc)
+            ttl = min(ttl, int((expired - now).total_seconds()))
+        return ttl
+
+    def _set_local(self, user_id: UUID, subscriptions: list[UUID], ttl: int) -> None:
+        if ttl <= 0:
+            return
+        self._local[user_id] = (subscriptions, monotonic() + ttl)
+        self._local.move_to_end(user_id)
+        while len(self._local) > self.local_max_size:
+            self._local.popitem(last=False)
+
+    def _key(self, user_id: UUID) -> str:
+        return f"{self.PREFIX}:{user_id}"
+
+    def _generation_key(self, user_id: UUID) -> str:
+        return f"{self.PREFIX}:{user_id}:generation"
@@ -20,3 +20,16 @@ def api_request(api_session):
         return status, data
 
     return inner
+
+
+@pytest_asyncio.fixture(scope="session")
+def api_post_request(api_session):
+    async def inner(path, json=None):  # noqa
+        base_url = str(settings.fast_api.host).removesuffix("/")
+        url = f"{base_url}{path}"
+        async with api_session.post(url, json=json) as response:
+            status = response.status
+            data = await response.json() if response.ok else None
+        return status, data
+
+    return inner
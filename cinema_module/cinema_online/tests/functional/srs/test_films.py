@@ -1,3 +1,4 @@
+from base64 import urlsafe_b64encode
 from http import HTTPStatus
 from typing import Any
 
@@ -149,3 +150,78 @@ class TestFilms(BaseTestAPI):
     @pytest.mark.asyncio(scope="session")
     async def test_cache(self, cache_client, db_client, api_request, path: str, request_params: dict, load_data: dict):
         await super().test_cache(cache_client, db_client, api_request, path, request_params, load_data)
+
+    @pytest.mark.parametrize(
+        "path, request_params",
+        [
+            ("/api/v1/films", {"page_size": 2, "sort": "-imdb_rating"}),
+            ("/api/v1/films/search", {"page_size": 2, "query": "Star"}),
+        ],
+    )
+    @pytest.mark.asyncio(scope="session")
+    async def test_cursor_pagination(self, api_request, path: str, request_params: dict):
+        status, first_page = await api_request(path=path, params=request_params)
+        assert status == HTTPStatus.OK
+
+        cursor, pages = "", []
+        while cursor is not None:
+            status, data = await api_request(path=path, params={**request_params, "cursor": cursor})
+            assert status == HTTPStatus.OK
+            pages.append(data)
+            cursor = data["next_cursor"]
+
+        assert len(pages) == first_page["total_pages"]
+        results = [film["uuid"] for page in pages for film in page["results"]]
+        assert len(results) == len(set(results)) == first_page["count"]
+
+    @pytest.mark.parametrize(
+        "cursor",
+        [
+            "not-a-cursor",
+            urlsafe_b64encode(b'{"page":"x","sort":"","filter":null,"after":null,"pit":null}').decode(),
+            urlsafe_b64encode(b'{"page":2,"sort":"","filter":null,"after":5,"pit":null}').decode(),
+            urlsafe_b64encode(b'{"page":0,"sort":"","filter":null,"after":null,"pit":null}').decode(),
+        ],
+    )
+    @pytest.mark.asyncio(scope="session")
+    async def test_invalid_cursor(self, api_request, cursor: str):
+        status, _ = await api_request(path="/api/v1/films", params={"cursor": cursor})
+        assert status == HTTPStatus.BAD_REQUEST
+
+    @pytest.mark.asyncio(scope="session")
+    async def test_cursor_with_other_filter(self, api_request):
+        path, request_params = "/api/v1/films/search", {"page_size": 1, "query": "Star"}
+        status, data = await api_request(path=path, params={**request_params, "cursor": ""})
+        assert status == HTTPStatus.OK
+        assert data["next_cursor"] is not None
+
+        other_params = {**request_params, "query": "Wars", "cursor": data["next_cursor"]}
+        status, _ = await api_request(path=path, params=other_params)
+        assert status == HTTPStatus.BAD_REQUEST
+
+    @pytest.mark.asyncio(scope="session")
+    async def test_batch(self, api_post_request):
+        found_ids = [film["id"] for film in films_data[:3]]
+        missing_id = "11111111-1111-1111-1111-111111111111"
+        request_ids = [found_ids[0], missing_id, *found_ids, found_ids[1]]
+
+        status, data = await api_post_request(path="/api/v1/films/batch", json={"ids": request_ids})
+        assert status == HTTPStatus.OK
+        assert found_ids == [film["uuid"] for film in data["results"]]
+        assert data["not_found"] == [missing_id]
+
+        status, cached_data = await api_post_request(path="/api/v1/films/batch", json={"ids": request_ids})
+        assert status == HTTPStatus.OK
+        assert cached_data == data
+
+    @pytest.mark.parametrize(
+        "request_ids, status_response",
+        [
+            ([], HTTPStatus.UNPROCESSABLE_ENTITY),
+            (["not-uuid"], HTTPStatus.UNPROCESSABLE_ENTITY),
+        ],
+    )
+    @pytest.mark.asyncio(scope="session")
+    async def test_batch_status_response(self, api_post_request, request_ids: list, status_response: HTTPStatus):
+        status, _ = await api_post_request(path="/api/v1/films/batch", json={"ids": request_ids})
+        assert status == status_response
@@ -0,0 +1,108 @@
+"""Генератор синтетического каталога фильмов в схеме content для нагрузочных замеров ETL.
+
+Данные создаются на стороне Postgres через generate_series, к именам добавляется метка запуска,
+поэтому генерацию можно повторять в той же базе. Запускать только на отдельной базе, не на рабочей.
+
+Запуск из каталога ETL: python -m benchmarks.catalogue --films 1000000
+"""
+import argparse
+import logging
+from time import perf_counter
+from uuid import uuid4
+
+import psycopg
+from dotenv import load_dotenv
+
+from settings import DbSettings
+
+GENRE_INSERT = """
+    INSERT INTO content.genre (id, name, created, modified)
+    SELECT id, %(tag)s || ' genre ' || n, now(), now() FROM synthetic_genre
+"""
+PERSON_INSERT = """
+    INSERT INTO content.person (id, full_name, created, modified)
+    SELECT id, %(tag)s || ' person ' || n, now(), now() FROM synthetic_person
+"""
+FILM_WORK_INSERT = """
+    INSERT INTO content.film_work (id, title, description, creation_date, rating, type, created, modified)
+    SELECT
+        id,
+        %(tag)s || ' film ' || n,
+        'Synthetic film ' || n,
+        date '1950-01-01' + n %% 27000,
+        n %% 100 / 10.0,
+        'movie',
+        now(),
+        now() - make_interval(secs => n)
+    FROM synthetic_film
+"""
+GENRE_FILM_WORK_INSERT = """
+    INSERT INTO content.genre_film_work (id, film_work_id, genre_id, created)
+    SELECT gen_random_uuid(), f.id, g.id, now()
+    FROM synthetic_film f
+    CROSS JOIN generate_series(0, %(genres_per_film)s - 1) k
+    JOIN synthetic_genre g ON g.n = 1 + (f.n + k * 7) %% %(genres)s
+    ON CONFLICT DO NOTHING
+"""
+PERSON_FILM_WORK_INSERT = """
+    INSERT INTO content.person_film_work (id, film_work_id, person_id, role, created)
+    SELECT gen_random_uuid(), f.id, p.id, (ARRAY['actor', 'actor', 'director', 'writer'])[1 + k %% 4], now()
+    FROM synthetic_film f
+    CROSS JOIN generate_series(0, %(persons_per_film)s - 1) k
+    JOIN synthetic_person p ON p.n = 1 + (f.n * 31 + k * 104729) %% %(persons)s
+    ON CONFLICT DO NOTHING
+"""
+
+GENERATE_QUERIES = (
+    "CREATE TEMP TABLE synthetic_genre AS SELECT n, gen_random_uuid() AS id FROM generate_series(1, %(genres)s) n",
+    "CREATE TEMP TABLE synthetic_person AS SELECT n, gen_random_uuid() AS id FROM generate_series(1, %(persons)s) n",
+    "CREATE TEMP TABLE synthetic_film AS SELECT n, gen_random_uuid() AS id FROM generate_series(1, %(films)s) n",
+    "CREATE INDEX ON synthetic_genre (n)",
+    "CREATE INDEX ON synthetic_person (n)",
+    GENRE_INSERT,
+    PERSON_INSERT,
+    FILM_WORK_INSERT,
+    GENRE_FILM_WORK_INSERT,
+    PERSON_FILM_WORK_INSERT,
+)
+
+
+def generate_catalogue(
+    conn: psycopg.Connection,
+    films: int,
+    persons: int,
+    genres: int,
+    persons_per_film: int = 8,
+    genres_per_film: int = 2,
+) -> str:
+    """Заполнение каталога синтетическими данными, возвращает метку запуска"""
+    tag = uuid4().hex[:8]
+    params = {
+        "tag": tag,
+        "films": films,
+        "persons": persons,
+        "genres": genres,
+        "persons_per_film": persons_per_film,
+        "genres_per_film": genres_per_film,
+    }
+    with conn.transaction():
+        for query in GENERATE_QUERIES:
+            start = perf_counter()
+            conn.execute(query, params)  # type: ignore
+            logging.info("%s: %.1f s", query.split("(")[0].strip(), perf_counter() - start)
+    conn.execute("ANALYZE")
+    return tag
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--films", type=int, default=1000000)
+    parser.add_argument("--persons", type=int, default=200000)
+    parser.add_argument("--genres", type=int, default=50)
+    parser.add_argument("--persons-per-film", type=int, default=8)
+    args = parser.parse_args()
+    with psycopg.Connection.connect(str(DbSettings().dsn), autocommit=True) as connection:
+        run_tag = generate_catalogue(connection, args.films, args.persons, args.genres, args.persons_per_film)
+    logging.info("Catalogue generated, tag %s", run_tag)
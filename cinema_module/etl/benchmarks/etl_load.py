@@ -0,0 +1,135 @@
+"""Замер полной и инкрементальной загрузки ETL на синтетическом каталоге.
+
+Оба этапа выполняет ETLProcess проходом синхронизации, как в рабочем цикле: план, сборка документов,
+загрузка и оповещения. Перед полной загрузкой позиции изменений ETL в Redis сбрасываются, поэтому проход
+переносит таблицы целиком, инкрементальная загрузка - проход после изменения --changed-films фильмов
+и --changed-persons персон. Redis, база каталога и Elasticsearch (--elastic server) должны быть отдельными
+от рабочих, документы можно загружать и в клиент в памяти (--elastic memory). Для каждого этапа выводится
+время и документов в секунду, в конце - пиковый RSS процесса. Результат можно сохранить (--save) и сравнить
+с сохраненным ранее (--baseline), при замедлении любого этапа больше чем на --tolerance процесс
+завершается с кодом 1.
+
+Запуск из каталога ETL: python -m benchmarks.etl_load --generate --films 100000 --elastic memory
+"""
+import argparse
+import json
+import resource
+import sys
+from pathlib import Path
+from time import perf_counter
+
+import psycopg
+from dotenv import load_dotenv
+
+from benchmarks.catalogue import generate_catalogue
+from benchmarks.memory_elastic import MemoryElasticsearch
+from etl import ETLProcess
+from row_factory import BaseClass
+from settings import AppSettings, adapters
+from workers import ElasticLoader, PGExtractor
+
+TOUCH_QUERY = """
+    UPDATE content.{table} SET modified = now()
+    WHERE id IN (SELECT id FROM content.{table} ORDER BY random() LIMIT %s)
+"""
+Report = dict[str, dict[str, float]]
+
+
+def stage_result(seconds: float, rows: int) -> dict[str, float]:
+    return {
+        "seconds": round(seconds, 3),
+        "rows": rows,
+        "rows_per_second": round(rows / seconds, 1) if seconds else 0,
+    }
+
+
+def touch_catalogue(dsn: str, films: int, persons: int) -> None:
+    """Изменение случайных фильмов и персон"""
+    with psycopg.Connection.connect(dsn, autocommit=True) as conn:
+        for table, count in (("film_work", films), ("person", persons)):
+            conn.execute(TOUCH_QUERY.format(table=table), (count,))  # type: ignore  # noqa: S608
+
+
+def measure_etl(process: ETLProcess, app_settings: AppSettings, args: argparse.Namespace) -> Report:
+    """Полный и инкрементальный проходы ETLProcess по всем таблицам"""
+    report = {}
+    with (
+        PGExtractor(app_settings.database, row_factory=BaseClass) as id_extractor,
+        PGExtractor(app_settings.database, row_factory=BaseClass) as link_id_extractor,
+        PGExtractor(app_settings.database) as data_extractor,
+    ):
+        extractors = (id_extractor, link_id_extractor, data_extractor)
+        if not args.skip_full:
+            process.state.reset_change_cursors()
+            start = perf_counter()
+            loaded = process.sync_changes(adapters, None, *extractors)
+            report["full load"] = stage_result(perf_counter() - start, loaded)
+        touch_catalogue(str(app_settings.database.dsn), args.changed_films, args.changed_persons)
+        start = perf_counter()
+        loaded = process.sync_changes(adapters, None, *extractors)
+        report["incremental load"] = stage_result(perf_counter() - start, loaded)
+    return report
+
+
+def compare(report: Report, baseline: Report, tolerance: float) -> bool:
+    """Сравнение скорости этапов с сохраненным результатом, возвращает False при замедлении"""
+    passed = True
+    for stage, result in report.items():
+        base_rate = baseline.get(stage, {}).get("rows_per_second")
+        if not base_rate or not result["rows_per_second"]:
+            continue
+        change = result["rows_per_second"] / base_rate - 1
+        if change < -tolerance:
+            passed = False
+            print(f"REGRESSION {stage}: {result['rows_per_second']:.1f} rows/s vs {base_rate:.1f} ({change:+.0%})")
+    return passed
+
+
+def main(args: argparse.Namespace) -> int:
+    app_settings = AppSettings()
+    report = {}
+    if args.generate:
+        start = perf_counter()
+        with psycopg.Connection.connect(str(app_settings.database.dsn), autocommit=True) as conn:
+            generate_catalogue(conn, args.films, args.persons, args.genres, args.persons_per_film, args.genres_per_film)
+        report["generate catalogue"] = stage_result(perf_counter() - start, args.films)
+    process = ETLProcess(app_settings)
+    process.loader = ElasticLoader(app_settings.elastic)
+    if args.elastic == "memory":
+        process.loader.client = MemoryElasticsearch()  # type: ignore
+    process.prepare(adapters)
+    report.update(measure_etl(process, app_settings, args))
+    for stage, result in report.items():
+        rate = f"{result['rows_per_second']:>10.1f} rows/s"
+        print(f"{stage:<20} {result['seconds']:>9.2f} s {result['rows']:>10} rows {rate}")
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"Peak RSS: {peak_rss:.1f} MB")
+    if args.save:
+        Path(args.save).write_text(json.dumps({"stages": report, "peak_rss_mb": round(peak_rss, 1)}, indent=2))
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        return int(not compare(report, baseline["stages"], args.tolerance))
+    return 0
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--generate", action="store_true", help="сгенерировать каталог перед замером")
+    parser.add_argument("--films", type=int, default=100000)
+    parser.add_argument("--persons", type=int, default=20000)
+    parser.add_argument("--genres", type=int, default=50)
+    parser.add_argument("--persons-per-film", type=int, default=8)
+    parser.add_argument("--genres-per-film", type=int, default=2)
+    parser.add_argument("--changed-films", type=int, default=1000)
+    parser.add_argument("--changed-persons", type=int, default=100)
+    parser.add_argument("--elastic", choices=("server", "memory"), default="server")
+    parser.add_argument(
+        "--skip-full",
+        action="store_true",
+        help="замерить только инкрементальную загрузку от позиций изменений предыдущего запуска",
+    )
+    parser.add_argument("--save", help="файл для сохранения результата")
+    parser.add_argument("--baseline", help="файл с результатом для сравнения")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    sys.exit(main(parser.parse_args()))
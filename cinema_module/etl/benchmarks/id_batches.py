@@ -0,0 +1,80 @@
+"""Время выборки пачки фильмов по id: список id в тексте запроса против параметра uuid[].
+
+В режиме inline id подставляются в текст запроса через IN (...), поэтому каждый запрос уникален
+и разбирается и планируется заново. В режиме param запрос один и тот же, id передаются массивом,
+запрос подготавливается на соединении один раз. Пачки выбираются случайно из content.film_work,
+для замеров на большом каталоге его можно сгенерировать через benchmarks.catalogue.
+
+Запуск из каталога ETL: python -m benchmarks.id_batches --chunks 1000 --chunk-size 100
+"""
+import argparse
+import random
+import statistics
+from time import perf_counter
+from uuid import UUID
+
+import psycopg
+from dotenv import load_dotenv
+
+from db_queries import Queries
+from settings import DbSettings
+
+
+def inline_query(ids: list[UUID]) -> str:
+    return Queries.FILMWORK_DATA.replace("= ANY(%s)", "IN ({})".format(",".join(f"'{id_}'" for id_ in ids)))
+
+
+def run_inline(dsn: str, chunks: list[list[UUID]]) -> list[float]:
+    timings = []
+    with psycopg.Connection.connect(dsn, cursor_factory=psycopg.ClientCursor) as conn, conn.cursor() as cursor:
+        for chunk in chunks:
+            start = perf_counter()
+            cursor.execute(inline_query(chunk))  # type: ignore
+            cursor.fetchall()
+            timings.append(perf_counter() - start)
+    return timings
+
+
+def run_param(dsn: str, chunks: list[list[UUID]]) -> list[float]:
+    timings = []
+    with psycopg.Connection.connect(dsn) as conn, conn.cursor() as cursor:
+        for chunk in chunks:
+            start = perf_counter()
+            cursor.execute(Queries.FILMWORK_DATA, (chunk,), prepare=True)  # type: ignore
+            cursor.fetchall()
+            timings.append(perf_counter() - start)
+    return timings
+
+
+def report(mode: str, timings: list[float]) -> None:
+    timings_ms = sorted(timing * 1000 for timing in timings)
+    print(", ".join((
+        f"{mode:>6}: {len(timings_ms)} chunks",
+        f"mean {statistics.mean(timings_ms):8.2f} ms",
+        f"p50 {timings_ms[len(timings_ms) // 2]:8.2f} ms",
+        f"p99 {timings_ms[int(len(timings_ms) * 0.99)]:8.2f} ms",
+    )))
+
+
+def main(args: argparse.Namespace) -> None:
+    dsn = str(DbSettings().dsn)
+    with psycopg.Connection.connect(dsn) as conn:
+        sample = conn.execute(
+            "SELECT id FROM content.film_work TABLESAMPLE SYSTEM (10) LIMIT %s",
+            (args.chunks * args.chunk_size,),
+        ).fetchall()
+    ids = [row[0] for row in sample]
+    random.shuffle(ids)
+    chunks = [ids[num:num + args.chunk_size] for num in range(0, len(ids), args.chunk_size)]
+    # Прогрев кэша страниц, чтобы оба режима читали одни и те же данные из памяти
+    run_param(dsn, chunks[:10])
+    report("inline", run_inline(dsn, chunks))
+    report("param", run_param(dsn, chunks))
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=1000)
+    parser.add_argument("--chunk-size", type=int, default=100)
+    main(parser.parse_args())
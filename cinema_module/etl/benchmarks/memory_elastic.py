@@ -0,0 +1,72 @@
+"""Клиент Elasticsearch в памяти для замеров ETL без кластера.
+
+Запросы bulk разбираются и подтверждаются без индексации, поэтому в замер входят сборка документов,
+их сериализация и работа helpers, но не стоимость индексации на стороне Elasticsearch.
+"""
+import fnmatch
+import json
+from types import SimpleNamespace
+from typing import Any
+
+from elastic_transport import SerializerCollection
+from elasticsearch import JsonSerializer
+
+DOC_OPERATIONS = frozenset(("index", "create", "update"))
+
+
+class MemoryIndices:
+    def __init__(self) -> None:
+        self.names: set[str] = set()
+        self.aliases: dict[str, str] = {}
+
+    def exists(self, index: str, **kwargs: Any) -> SimpleNamespace:
+        return SimpleNamespace(body=index in self.names or index in self.aliases)
+
+    def create(self, index: str, aliases: dict[str, Any] | None = None, **kwargs: Any) -> None:
+        self.names.add(index)
+        for alias in aliases or {}:
+            self.aliases[alias] = index
+
+    def delete(self, index: str, **kwargs: Any) -> None:
+        self.names.discard(index)
+
+    def get(self, index: str, **kwargs: Any) -> SimpleNamespace:
+        return SimpleNamespace(body={name: {} for name in fnmatch.filter(self.names, index)})
+
+    def get_alias(self, index: str, **kwargs: Any) -> SimpleNamespace:
+        return SimpleNamespace(body={self.aliases.get(index, index): {"aliases": {index: {}}}})
+
+    def get_settings(self, index: str, **kwargs: Any) -> dict[str, Any]:
+        return {index: {"settings": {}}}
+
+    def put_settings(self, **kwargs: Any) -> None:
+        pass
+
+    def refresh(self, **kwargs: Any) -> None:
+        pass
+
+
+class MemoryElasticsearch:
+    def __init__(self) -> None:
+        self.transport = SimpleNamespace(serializers=SerializerCollection({"application/json": JsonSerializer()}))
+        self.indices = MemoryIndices()
+        self.documents = 0
+        self.bytes = 0
+
+    def options(self, **kwargs: Any) -> "MemoryElasticsearch":
+        return self
+
+    def bulk(self, operations: list[bytes], **kwargs: Any) -> SimpleNamespace:
+        items = []
+        lines = iter(operations)
+        for line in lines:
+            self.bytes += len(line)
+            operation, meta = json.loads(line).popitem()
+            if operation in DOC_OPERATIONS:
+                self.bytes += len(next(lines))
+            self.documents += 1
+            items.append({operation: {"_id": meta.get("_id"), "status": 200}})
+        return SimpleNamespace(body={"errors": False, "items": items})
+
+    def update_by_query(self, query: dict[str, Any], **kwargs: Any) -> dict[str, int]:
+        return {"updated": len(query["ids"]["values"])}
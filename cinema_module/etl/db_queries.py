@@ -1,4 +1,25 @@
 class Queries:
+    FILMWORK_IDS = """
+        SELECT id
+        FROM content.film_work
+        WHERE id > %s
+        ORDER BY id
+        LIMIT %s;
+    """
+    PERSON_IDS = """
+        SELECT id
+        FROM content.person
+        WHERE id > %s
+        ORDER BY id
+        LIMIT %s;
+    """
+    GENRE_IDS = """
+        SELECT id
+        FROM content.genre
+        WHERE id > %s
+        ORDER BY id
+        LIMIT %s;
+    """
     FILMWORK_DATA = """
     SELECT
         fw.id,
@@ -27,7 +48,7 @@ class Queries:
         COALESCE (
             ARRAY_AGG(DISTINCT p.full_name
             ) FILTER (WHERE pfw.role = 'director'),
-            '{{}}'
+            '{}'
         ) as directors_names,
         COALESCE (
             json_agg(
@@ -41,7 +62,7 @@ class Queries:
         COALESCE (
             ARRAY_AGG(DISTINCT p.full_name
             ) FILTER (WHERE pfw.role = 'actor'),
-            '{{}}'
+            '{}'
         ) as actors_names,
         COALESCE (
             json_agg(
@@ -55,7 +76,7 @@ class Queries:
         COALESCE (
             ARRAY_AGG(DISTINCT p.full_name
             ) FILTER (WHERE pfw.role = 'writer'),
-            '{{}}'
+            '{}'
         ) as writers_names,
         array_remove(ARRAY_AGG(DISTINCT sfw.subscription_id), NULL) as subscriptions
     FROM content.film_work fw
@@ -64,60 +85,92 @@ class Queries:
     LEFT JOIN content.genre_film_work gfw ON gfw.film_work_id = fw.id
     LEFT JOIN content.genre g ON g.id = gfw.genre_id
     LEFT JOIN content.subscription_film_work sfw ON sfw.film_work_id = fw.id
-    WHERE fw.id IN ({ids})
+    WHERE fw.id = ANY(%s)
     GROUP BY fw.id;
     """
+    # Составные части документа фильма без имен персон и жанров, подзапросы не перемножают связи друг с другом
+    FILMWORK_PARTS = """
+    SELECT
+        fw.id,
+        fw.rating as imdb_rating,
+        fw.title,
+        fw.description,
+        ARRAY(SELECT gfw.genre_id FROM content.genre_film_work gfw WHERE gfw.film_work_id = fw.id) as genre_ids,
+        COALESCE (
+            (
+                SELECT json_agg(json_build_array(pfw.person_id, pfw.role))
+                FROM content.person_film_work pfw
+                WHERE pfw.film_work_id = fw.id
+            ),
+            '[]'
+        ) as persons,
+        ARRAY(
+            SELECT sfw.subscription_id FROM content.subscription_film_work sfw WHERE sfw.film_work_id = fw.id
+        ) as subscriptions
+    FROM content.film_work fw
+    WHERE fw.id = ANY(%s);
+    """
+    PERSON_NAMES = """
+        SELECT
+            id,
+            full_name
+        FROM content.person p
+        WHERE p.id = ANY(%s);
+    """
 
     FILMWORK_MODIFIED = """
         SELECT
            fw.id,
            fw.modified
         FROM content.film_work fw
-        WHERE fw.modified > %s
-        ORDER BY fw.modified;
+        WHERE (fw.modified, fw.id) > (%s, %s) AND (hashtext(fw.id::text) & 2147483647) %% %s = %s
+        ORDER BY fw.modified, fw.id
+        LIMIT %s;
     """
     PERSON_MODIFIED = """
         SELECT
            id,
            modified
         FROM content.person p
-        WHERE p.modified > %s
-        ORDER BY modified;
+        WHERE (p.modified, p.id) > (%s, %s) AND (hashtext(p.id::text) & 2147483647) %% %s = %s
+        ORDER BY p.modified, p.id
+        LIMIT %s;
     """
     FILM_BY_PERSON = """
         SELECT
             DISTINCT fw.id
         FROM content.film_work fw
         JOIN content.person_film_work pfw ON pfw.film_work_id = fw.id
-        WHERE pfw.person_id IN ({ids});"""
+        WHERE pfw.person_id = ANY(%s);"""
     GENRE_MODIFIED = """
         SELECT
            id,
            modified
         FROM content.genre g
-        WHERE g.modified > %s
-        ORDER BY g.modified;
+        WHERE (g.modified, g.id) > (%s, %s) AND (hashtext(g.id::text) & 2147483647) %% %s = %s
+        ORDER BY g.modified, g.id
+        LIMIT %s;
     """
     FILM_BY_GENRE = """
         SELECT
             DISTINCT fw.id
         FROM content.film_work fw
         JOIN content.genre_film_work gfw ON gfw.film_work_id = fw.id
-        WHERE gfw.genre_id IN ({ids});
+        WHERE gfw.genre_id = ANY(%s);
     """
     GENRE_DATA = """
         SELECT
             id,
             name
         FROM content.genre g
-        WHERE g.id IN ({ids});
+        WHERE g.id = ANY(%s);
     """
     PERSON_BY_FILM = """
     SELECT
         DISTINCT pfw.person_id as id
     FROM content.person_film_work pfw
     JOIN content.film_work fw ON pfw.film_work_id = fw.id
-    WHERE fw.id IN ({ids});
+    WHERE fw.id = ANY(%s);
     """
     PERSON_DATA = """
     SELECT
@@ -134,6 +187,6 @@ class Queries:
         ) as films
     FROM content.person p
     JOIN content.person_film_work pfw ON pfw.person_id = p.id
-    WHERE p.id IN ({ids})
+    WHERE p.id = ANY(%s)
     GROUP BY p.id;
     """
@@ -0,0 +1,129 @@
+from collections.abc import Iterable
+from typing import NamedTuple
+from uuid import UUID
+
+from pydantic import BaseModel
+from redis import Redis
+
+from db_queries import Queries
+from row_factory import ElasticFilmData, FilmParts, GenreInfo, PersonInfo
+from workers import PGExtractor
+
+ROLES = ("director", "actor", "writer")
+
+
+class NameSource(NamedTuple):
+    query: str
+    row_class: type[BaseModel]
+    field: str
+
+
+class FilmDocumentCache:
+    """Кэш составных частей документов фильмов в Redis.
+
+    Для фильма хранятся его поля и id связанных жанров, персон и подписок, имена персон и жанров
+    хранятся отдельно по id. При переименовании персоны или жанра обновляется одно имя, а документы
+    фильмов собираются из кэша без FILMWORK_DATA с его соединениями. Части фильма сбрасываются при
+    изменении самого фильма: изменение его жанров, персон и подписок обновляет film_work.modified
+    триггерами update_modified_filmwork (movies 0001 и 0006). Имена, как и части фильмов, хранятся
+    отдельными ключами с ttl, поэтому имена удаленных и давно не нужных персон и жанров истекают.
+    """
+
+    PREFIX = "ETL:FILMDOC"
+    NAME_SOURCES = {
+        "person": NameSource(Queries.PERSON_NAMES, PersonInfo, "full_name"),
+        "genre": NameSource(Queries.GENRE_DATA, GenreInfo, "name"),
+    }
+
+    def __init__(self, redis: Redis, ttl: int):
+        self.redis = redis
+        self.ttl = ttl
+
+    def on_changes(self, extractor: PGExtractor, table: str, ids: list[UUID]) -> None:
+        """Обновление кэша по изменениям таблицы адаптера"""
+        if table == "filmwork" and ids:
+            self.redis.delete(*(self._parts_key(film_id) for film_id in ids))
+        elif table in self.NAME_SOURCES:
+            self._fetch_names(extractor, table, ids)
+
+    def build(self, extractor: PGExtractor, ids: list[UUID]) -> list[ElasticFilmData]:
+        """Сборка документов фильмов, недостающие в кэше части выбираются из базы"""
+        films = self._get_parts(extractor, ids)
+        person_ids = {person_id for film in films for person_id, _ in film.persons}
+        genre_ids = {genre_id for film in films for genre_id in film.genre_ids}
+        person_names = self._get_names(extractor, "person", person_ids)
+        genre_names = self._get_names(extractor, "genre", genre_ids)
+        return [self._assemble(film, person_names, genre_names) for film in films]
+
+    def _get_parts(self, extractor: PGExtractor, ids: list[UUID]) -> list[FilmParts]:
+        films = [
+            FilmParts.model_validate_json(value)
+            for value in self.redis.mget([self._parts_key(film_id) for film_id in ids])
+            if value is not None
+        ]
+        missing_ids = list(set(ids) - {film.id for film in films})
+        if missing_ids:
+            extractor.set_factory(FilmParts)
+            fetched: list[FilmParts] = [
+                film for chunk in extractor.extract_data(Queries.FILMWORK_PARTS, missing_ids) for film in chunk
+            ]  # type: ignore
+            with self.redis.pipeline(transaction=False) as pipe:
+                for film in fetched:
+                    pipe.set(self._parts_key(film.id), film.model_dump_json(), ex=self.ttl)
+                pipe.execute()
+            films.extend(fetched)
+        return films
+
+    def _get_names(self, extractor: PGExtractor, kind: str, ids: set[UUID]) -> dict[UUID, str]:
+        if not ids:
+            return {}
+        id_list = list(ids)
+        values = self.redis.mget([self._name_key(kind, item_id) for item_id in id_list])
+        names = {
+            item_id: value.decode() for item_id, value in zip(id_list, values) if value is not None  # type: ignore
+        }
+        missing_ids = [item_id for item_id in id_list if item_id not in names]
+        if missing_ids:
+            names.update(self._fetch_names(extractor, kind, missing_ids))
+        return names
+
+    def _fetch_names(self, extractor: PGExtractor, kind: str, ids: Iterable[UUID]) -> dict[UUID, str]:
+        source = self.NAME_SOURCES[kind]
+        extractor.set_factory(source.row_class)
+        rows: list[BaseModel] = [row for chunk in extractor.extract_data(source.query, list(ids)) for row in chunk]
+        names = {row.id: getattr(row, source.field) for row in rows}  # type: ignore
+        with self.redis.pipeline(transaction=False) as pipe:
+            for item_id, name in names.items():
+                pipe.set(self._name_key(kind, item_id), name, ex=self.ttl)
+            pipe.execute()
+        return names
+
+    @staticmethod
+    def _assemble(film: FilmParts, person_names: dict[UUID, str], genre_names: dict[UUID, str]) -> ElasticFilmData:
+        persons: dict[str, dict[UUID, str]] = {role: {} for role in ROLES}
+        for person_id, role in film.persons:
+            if role in persons and person_id in person_names:
+                persons[role][person_id] = person_names[person_id]
+        genres = {genre_id: genre_names[genre_id] for genre_id in film.genre_ids if genre_id in genre_names}
+        role_fields = {}
+        for role_name, role_persons in persons.items():
+            role_fields[f"{role_name}s"] = [
+                PersonInfo(id=member_id, full_name=name) for member_id, name in sorted(role_persons.items())
+            ]
+            role_fields[f"{role_name}s_names"] = sorted(set(role_persons.values()))
+        return ElasticFilmData(
+            id=film.id,
+            imdb_rating=film.imdb_rating,
+            title=film.title,
+            description=film.description,
+            genre=[GenreInfo(id=genre_id, name=name) for genre_id, name in sorted(genres.items())],
+            genre_names=sorted(set(genres.values())),
+            subscriptions=film.subscriptions,
+            **role_fields,
+        )
+
+    def _parts_key(self, film_id: UUID) -> str:
+        return f"{self.PREFIX}:{film_id}"
+
+    def _name_key(self, kind: str, item_id: UUID) -> str:
+        return f"{self.PREFIX}:NAME:{kind}:{item_id}"
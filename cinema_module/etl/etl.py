@@ -1,8 +1,12 @@
+import json
 import logging
+import os
+import socket
+from collections.abc import Generator
+from contextlib import contextmanager
 from datetime import datetime
-from threading import Thread
-from time import sleep
-from typing import Any, Generator, Hashable, Iterator
+from time import monotonic, perf_counter, time
+from uuid import UUID, uuid4
 
 import backoff
 from redis import ConnectionPool as RedisConnectionPool
@@ -11,66 +15,108 @@ from redis.backoff import ExponentialBackoff
 from redis.exceptions import BusyLoadingError, ConnectionError, TimeoutError
 from redis.retry import Retry
 
-from row_factory import BaseClass
-from settings import AppSettings, TableAdapter
+from documents import FilmDocumentCache
+from listener import ChangeListener
+from metrics import LAST_INDEXED_MODIFIED, ROWS_EXTRACTED, lag_tracker
+from planner import DirtySetPlanner
+from row_factory import BaseClass, ElasticFilmData
+from shards import ShardLeases
+from settings import (
+    AppSettings,
+    IndexAdapter,
+    IndexDefinition,
+    RebuildAdapter,
+    RenameFields,
+    TableAdapter,
+    rebuild_adapters,
+)
 from workers import ElasticLoader, PGExtractor
 
 
 class EtlState:
     PREFIX = "ETL"
-    LOCK_KEY = "LOCK"
     MODIFY_KEY = "MODIFY"
+    REBUILD_KEY = "REBUILD"
+    BULK_INDEXING_KEY = "BULK_INDEXING"
 
-    def __init__(self, client_id: Hashable, driver: Redis, lifetime: int):
-        self.client_id = client_id
+    def __init__(self, driver: Redis, indexed_channel: str = ""):
         self.redis = driver
-        self.lifetime = lifetime
+        self.indexed_channel = indexed_channel
 
     @backoff.on_exception(backoff.expo, exception=(ConnectionError, TimeoutError), max_value=120)
     def check_connection(self) -> bool:
         """Проверка соединения с redis"""
         return bool(self.redis.ping())
 
-    def check_block(self) -> bool:
-        """Проверка на наличие запущенных экземпляров приложения"""
-        process_hash = self.redis.get(f"{self.PREFIX}:{self.LOCK_KEY}")
-        return process_hash is not None and hash(self.client_id) != int(process_hash.decode())  # type: ignore
+    def get_change_cursor(self, table_name: str) -> tuple[datetime, UUID] | None:
+        """Позиция последнего перенесенного изменения таблицы: дата модификации и id строки"""
 
-    def set_block(self) -> None:
-        """Установка блокировки запуска других экземпляров приложения"""
+        cursor = self.redis.get(f"{self.PREFIX}:{self.MODIFY_KEY}:{table_name}")
+        if cursor is None:
+            return None
+        modified, _, row_id = cursor.decode().partition("|")  # type: ignore
+        # Состояние старого формата хранит только время, строки с ним будут перечитаны
+        return datetime.fromisoformat(modified), UUID(row_id) if row_id else UUID(int=0)
 
-        if self.check_block():
-            self.redis.set(f"{self.PREFIX}:{self.LOCK_KEY}", hash(self.client_id), ex=self.lifetime)
+    def set_change_cursor(self, table_name: str, cursor: tuple[datetime, UUID]) -> None:
+        """Записать позицию последнего перенесенного изменения таблицы"""
 
-    def unlock_process(self) -> None:
-        """Снятие блокировки запуска других экземпляров приложения"""
+        modified, row_id = cursor
+        self.redis.set(f"{self.PREFIX}:{self.MODIFY_KEY}:{table_name}", f"{modified.isoformat()}|{row_id}")
 
-        if str(hash(self.client_id)).encode() == self.redis.get(f"{self.PREFIX}:{self.LOCK_KEY}"):
-            self.redis.delete(f"{self.PREFIX}:{self.LOCK_KEY}")
+    def request_rebuild(self, alias: str) -> None:
+        """Запрос полной перестройки индекса, ее выполняет запущенный процесс ETL"""
 
-    def get_modified_dt(self, table_name: str) -> datetime:
-        """Получить дату и время последней зарегистрированной модификации таблицы"""
+        self.redis.hsetnx(f"{self.PREFIX}:{self.REBUILD_KEY}:{alias}", "cursor", "")
 
-        datetime_string = self.redis.get(f"{self.PREFIX}:{self.MODIFY_KEY}:{table_name}")
-        if datetime_string is None:
-            return datetime.min
-        return datetime.fromisoformat(datetime_string.decode())  # type: ignore
+    def get_rebuild(self, alias: str) -> dict[str, str] | None:
+        """Состояние перестройки индекса: создаваемая версия индекса и id последнего загруженного объекта"""
 
-    def set_modified_dt(self, table_name: str, modified_dt: datetime) -> None:
-        """Записать дату и время последней зарегистрированной модификации таблицы"""
+        rebuild = self.redis.hgetall(f"{self.PREFIX}:{self.REBUILD_KEY}:{alias}")
+        if not rebuild:
+            return None
+        return {key.decode(): value.decode() for key, value in rebuild.items()}  # type: ignore
 
-        self.redis.set(f"{self.PREFIX}:{self.MODIFY_KEY}:{table_name}", modified_dt.isoformat())
+    def set_rebuild(self, alias: str, index_name: str, cursor: str) -> None:
+        self.redis.hset(
+            f"{self.PREFIX}:{self.REBUILD_KEY}:{alias}",
+            mapping={"index": index_name, "cursor": cursor},
+        )
+
+    def finish_rebuild(self, alias: str) -> None:
+        self.redis.delete(f"{self.PREFIX}:{self.REBUILD_KEY}:{alias}")
+
+    def start_bulk_indexing(self, aliases: list[str]) -> None:
+        """Отметка индексов с отключенными refresh и репликами, отметка переживает остановку процесса"""
+
+        self.redis.sadd(f"{self.PREFIX}:{self.BULK_INDEXING_KEY}", *aliases)
+
+    def get_bulk_indexing(self) -> set[str]:
+        aliases = self.redis.smembers(f"{self.PREFIX}:{self.BULK_INDEXING_KEY}")
+        return {alias.decode() for alias in aliases}  # type: ignore
+
+    def finish_bulk_indexing(self) -> None:
+        self.redis.delete(f"{self.PREFIX}:{self.BULK_INDEXING_KEY}")
+
+    def reset_change_cursors(self) -> None:
+        """Удаление позиций изменений всех таблиц, следующий проход перенесет таблицы полностью"""
+
+        for key in self.redis.scan_iter(match=f"{self.PREFIX}:{self.MODIFY_KEY}:*"):
+            self.redis.delete(key)
+
+    def publish_indexed(self, index_name: str, ids: list[str] | None) -> None:
+        """Оповещение подписчиков об обновленных документах индекса для сброса кэша, None - обновлен весь индекс"""
+
+        if self.indexed_channel and (ids is None or ids):
+            self.redis.publish(self.indexed_channel, json.dumps({"index": index_name, "ids": ids}))
 
 
 class ETLProcess:
-    def __init__(
-        self,
-        app_settings: AppSettings,
-        lifetime: int = 10,
-    ):
+    def __init__(self, app_settings: AppSettings):
         self.exit_flag = False
         logging.info("Launching the application.")
         self.pg_settings = app_settings.database
+        self.rebuild_indices: dict[str, str] = {}
         self.elastic_settings = app_settings.elastic
         redis_pool = RedisConnectionPool.from_url(
             url=str(app_settings.redis.dsn),
@@ -79,96 +125,432 @@ class ETLProcess:
             retry_on_error=[BusyLoadingError, ConnectionError, TimeoutError],
         )
         redis = Redis(connection_pool=redis_pool)
-        self.state = EtlState(id(self), redis, lifetime)
+        self.state = EtlState(redis, app_settings.redis.indexed_channel)
         self.state.check_connection()
-        if self.state.check_block():
-            logging.error("Attempt to start a duplicate process.")
-            raise RuntimeError("Attempt to start a duplicate process.")
-
-        thread = Thread(
-            target=self._process_locker,
-            args=[EtlState(id(self), Redis(connection_pool=redis_pool), lifetime)],
+        shard_settings = app_settings.shards
+        self.leases = ShardLeases(
+            redis,
+            worker_id=f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}",
+            count=shard_settings.count,
+            lease_ttl=shard_settings.lease_ttl,
+            heartbeat_interval=shard_settings.heartbeat_interval,
         )
-        thread.start()
+        self.leases.heartbeat(force=True)
+        document_cache = app_settings.document_cache
+        self.film_documents = FilmDocumentCache(redis, document_cache.ttl) if document_cache.enabled else None
         logging.info("The application is running")
 
     def __del__(self) -> None:
-        self.state.unlock_process()
+        self.leases.release_all()
 
     @backoff.on_exception(backoff.expo, exception=Exception, max_value=120)
     def run(self, adapters: list[TableAdapter], sleep_time: int = 30) -> None:
-        """Основной процесс переноса данных"""
+        """Основной процесс переноса данных.
+
+        Таблицы обходятся по оповещениям об изменениях и не реже чем раз в sleep_time секунд.
+        """
         self.loader = ElasticLoader(self.elastic_settings)
+        self.prepare(adapters)
+        notify_tables = {table: adapter.table for adapter in adapters for table in adapter.notify_tables}
+        with (
+            PGExtractor(self.pg_settings, row_factory=BaseClass) as id_extractor,
+            PGExtractor(self.pg_settings, row_factory=BaseClass) as link_id_extractor,
+            PGExtractor(self.pg_settings) as data_extractor,
+            ChangeListener(self.pg_settings, notify_tables) as listener,
+        ):
+            changed: set[str] | None = None
+            next_poll: float = 0
+            while not self.exit_flag:
+                if monotonic() >= next_poll:
+                    # Полный проход по сроку, даже если оповещения приходят непрерывно: он переносит
+                    # пропущенные оповещения и таблицы без оповещений
+                    changed = None
+                if changed is None:
+                    next_poll = monotonic() + sleep_time
+                self.leases.heartbeat()
+                # Порция перестройки выполняется между проходами синхронизации в том же потоке,
+                # поэтому изменения, загруженные позже, всегда перекрывают более ранние
+                rebuilding = self._rebuild_step(id_extractor, data_extractor)
+                self.sync_changes(
+                    adapters,
+                    changed,
+                    id_extractor,
+                    link_id_extractor,
+                    data_extractor,
+                )
+                changed = self._wait_changes(listener, 0 if rebuilding else max(next_poll - monotonic(), 0))
+
+    def prepare(self, adapters: list[TableAdapter]) -> None:
+        """Создание отсутствующих индексов и восстановление настроек индексов после прерванной перезагрузки"""
         self._create_if_not_exists_index(adapters)
-        with PGExtractor(self.pg_settings, row_factory=BaseClass) as id_extractor:
-            with PGExtractor(self.pg_settings, row_factory=BaseClass) as link_id_extractor:
-                with PGExtractor(self.pg_settings) as data_extractor:
-                    while not self.exit_flag:
-                        for adapter in adapters:
-                            logging.info("Transferring data from %s", adapter.table)
-                            modified_dt = self.state.get_modified_dt(adapter.table)
-                            base_obj_chunks = id_extractor.extract_data(adapter.get_id_query, modified_dt)
-                            # получили измененые объекты
-                            self._index_chunk_processing(
-                                adapter,
-                                base_obj_chunks,  # type: ignore
-                                link_id_extractor,
-                                data_extractor,
-                            )
-                            self._update_modified_time(adapter)
-                        sleep(sleep_time)
-
-    def _index_chunk_processing(
+        self._restore_bulk_indexing(adapters)
+        for adapter in adapters:
+            lag_tracker.track(adapter.table)
+
+    def sync_changes(
+        self,
+        all_adapters: list[TableAdapter],
+        changed: set[str] | None,
+        id_extractor: PGExtractor,
+        link_id_extractor: PGExtractor,
+        data_extractor: PGExtractor,
+    ) -> int:
+        """Проход по таблицам адаптеров: сбор плана затронутых документов и их загрузка.
+
+        Полный проход (changed is None) обходит все таблицы, иначе только таблицы из оповещений.
+        Обойденные таблицы считаются догнанными, в том числе если новых изменений в них не нашлось,
+        но только если процесс держал одни и те же шарды весь проход.
+        Возвращает количество загруженных документов.
+        """
+        adapters = [adapter for adapter in all_adapters if changed is None or adapter.table in changed]
+        planner = DirtySetPlanner()
+        owned = set(self.leases.owned)
+        revoked = self.leases.revoked
+        pass_started = time()
+        start = perf_counter()
+        loaded = 0
+        for adapter in adapters:
+            for shard in sorted(self.leases.owned):
+                logging.info("Collecting changes from %s, shard %d", adapter.table, shard)
+                loaded += self._plan_changes(
+                    adapter,
+                    shard,
+                    id_extractor,
+                    link_id_extractor,
+                    data_extractor,
+                    planner,
+                    adapters,
+                )
+        loaded += self._load_planned(planner, adapters, data_extractor)
+        # Без шардов или с потерянной арендой часть изменений таблиц этим проходом не перенесена
+        if owned and owned == self.leases.owned and revoked == self.leases.revoked:
+            for synced_adapter in adapters:
+                lag_tracker.caught_up(synced_adapter.table, pass_started)
+        self._log_throughput(planner, loaded, perf_counter() - start)
+        return loaded
+
+    def _wait_changes(self, listener: ChangeListener, timeout: float) -> set[str] | None:
+        """Ожидание изменений с продлением аренды шардов, None - изменений не было"""
+        deadline = monotonic() + timeout
+        while True:
+            changed = listener.wait(min(max(deadline - monotonic(), 0), self.leases.heartbeat_interval))
+            if changed is not None or monotonic() >= deadline:
+                return changed
+            self.leases.heartbeat()
+
+    def _plan_changes(
         self,
         adapter: TableAdapter,
-        base_obj_chunks: Generator[Iterator[BaseClass], Any, Any],
+        shard: int,
+        id_extractor: PGExtractor,
         link_id_extractor: PGExtractor,
         data_extractor: PGExtractor,
-    ) -> None:
-        for chunk in base_obj_chunks:
-            chunk_data = [row for row in chunk]  # сохраняем чтобы получить последний объект
-            base_ids = ", ".join(f"'{row.id}'" for row in chunk_data)
-            for index_adapter in adapter.index_adapters:
-                if index_adapter.linking_query:
-                    link_data = link_id_extractor.extract_data(index_adapter.linking_query.format(ids=base_ids))
-                    link_ids = ", ".join(
-                        [", ".join(f"'{row.id}'" for row in chunk) for chunk in link_data],  # type: ignore
-                    )
-                else:
-                    link_ids = base_ids
-                data_extractor.set_factory(index_adapter.data_class)
-                data = data_extractor.extract_data(index_adapter.get_data_query.format(ids=link_ids))
-                self.loader.load_data(index_adapter.index["index"], data)
-            self._set_modified_time(adapter, chunk_data[-1].modified)
+        planner: DirtySetPlanner,
+        adapters: list[TableAdapter],
+    ) -> int:
+        """Добавление в план документов, затронутых изменениями шарда таблицы.
+
+        Изменения читаются порциями по change_batch_size от сохраненной позиции (modified, id)
+        пока аренда шарда не потеряна.
+        Если план разросся больше dirty_set_max_ids, он загружается не дожидаясь конца цикла.
+        Возвращает количество загруженных при этом документов.
+        """
+        cursor = self.state.get_change_cursor(self._cursor_key(adapter, shard))
+        if cursor is None:
+            # Без сохраненного состояния таблица переносится полностью
+            planner.full_reload_indices.update(adapter.indices)
+            cursor = (datetime.min, UUID(int=0))
+        batch_size = self.elastic_settings.change_batch_size
+        loaded = 0
+        while shard in self.leases.owned:
+            id_chunks = id_extractor.extract_data(adapter.get_id_query, *cursor, self.leases.count, shard, batch_size)
+            changed_rows = [row for chunk in id_chunks for row in chunk]
+            if not changed_rows:
+                break
+            base_ids = [row.id for row in changed_rows]
+            loaded += self._plan_rows(adapter, base_ids, link_id_extractor, data_extractor, planner)
+            cursor = (changed_rows[-1].modified, changed_rows[-1].id)  # type: ignore
+            adapter.new_cursors[shard] = cursor
+            self.leases.heartbeat()
+            if planner.size >= self.elastic_settings.dirty_set_max_ids:
+                loaded += self._load_planned(planner, adapters, data_extractor)
+            if len(changed_rows) < batch_size:
+                break
+        return loaded
+
+    def _plan_rows(
+        self,
+        adapter: TableAdapter,
+        base_ids: list[UUID],
+        link_id_extractor: PGExtractor,
+        data_extractor: PGExtractor,
+        planner: DirtySetPlanner,
+    ) -> int:
+        """Добавление в план документов всех индексов адаптера, затронутых порцией измененных строк"""
+        ROWS_EXTRACTED.labels(adapter.table).inc(len(base_ids))
+        if self.film_documents:
+            self.film_documents.on_changes(data_extractor, adapter.table, base_ids)
+        loaded = 0
+        for index_adapter in adapter.index_adapters:
+            if index_adapter.linking_query:
+                loaded += self._plan_linked(index_adapter, base_ids, link_id_extractor, data_extractor, planner)
+            else:
+                planner.add(index_adapter, base_ids)
+        return loaded
+
+    def _plan_linked(
+        self,
+        index_adapter: IndexAdapter,
+        base_ids: list[UUID],
+        link_id_extractor: PGExtractor,
+        data_extractor: PGExtractor,
+        planner: DirtySetPlanner,
+    ) -> int:
+        """Добавление в план связанных документов индекса, переименования в режиме update_by_query выполняются сразу.
+
+        Возвращает количество обновленных при этом документов.
+        """
+        link_data = link_id_extractor.extract_data(index_adapter.linking_query, base_ids)  # type: ignore
+        link_ids = [row.id for link_chunk in link_data for row in link_chunk]  # type: ignore
+        rename_mode = self.elastic_settings.rename_mode
+        if index_adapter.rename is None or rename_mode == "reindex":
+            planner.add(index_adapter, link_ids)
+        elif rename_mode == "partial":
+            planner.add(index_adapter, link_ids, index_adapter.rename.fields)
+        else:
+            return self._rename_documents(index_adapter, base_ids, link_ids, data_extractor)
+        return 0
+
+    def _load_planned(self, planner: DirtySetPlanner, adapters: list[TableAdapter], data_extractor: PGExtractor) -> int:
+        """Загрузка документов из плана и сохранение позиций изменений, вошедших в план.
+
+        Возвращает количество загруженных документов.
+        """
+        loaded = 0
+        indexed: dict[str, list[str]] = {}
+        if planner.size:
+            with self._bulk_indexing(planner):
+                for index_adapter, ids, fields in planner.drain(self.elastic_settings.dirty_set_load_batch):
+                    self.leases.heartbeat()
+                    indexed_ids = self._load_documents(index_adapter, ids, fields, data_extractor)
+                    indexed.setdefault(index_adapter.index["index"], []).extend(indexed_ids)
+                    loaded += len(indexed_ids)
+            self._publish_indexed(indexed, planner)
+        for adapter in adapters:
+            self._save_change_cursor(adapter)
+        return loaded
+
+    def _load_documents(
+        self,
+        index_adapter: IndexAdapter,
+        ids: list[UUID],
+        fields: set[str] | None,
+        data_extractor: PGExtractor,
+    ) -> list[str]:
+        """Сборка и загрузка порции документов индекса, возвращает id загруженных документов"""
+        if self.film_documents and index_adapter.data_class is ElasticFilmData:
+            data = [self.film_documents.build(data_extractor, ids)]
+        else:
+            data_extractor.set_factory(index_adapter.data_class)
+            data = data_extractor.extract_data(index_adapter.get_data_query, ids)  # type: ignore
+        rebuild_index = self.rebuild_indices.get(index_adapter.index["index"])
+        if rebuild_index:
+            # Во время перестройки изменения пишутся и в рабочий, и в новый индекс. В новый индекс
+            # документы пишутся целиком: перестройка могла еще не скопировать их, и частичное
+            # обновление завершилось бы ошибкой document_missing
+            data = [tuple(data_chunk) for data_chunk in data]  # type: ignore
+            self.loader.load_data(rebuild_index, data)
+        return self.loader.load_data(index_adapter.index["index"], data, fields)
+
+    def _publish_indexed(self, indexed: dict[str, list[str]], planner: DirtySetPlanner) -> None:
+        """Оповещение о загруженных документах после обновления индексов.
+
+        До refresh поиск не видит новых документов, и сброшенный кэш списков заполнился бы старыми ответами.
+        Для индексов, перезагружаемых целиком, вместо id отправляется сброс всего индекса.
+        """
+        index_names = [index_name for index_name, ids in indexed.items() if ids]
+        if not index_names:
+            return
+        self.loader.refresh(index_names)
+        batch_size = self.elastic_settings.dirty_set_load_batch
+        for index_name in index_names:
+            if index_name in planner.full_reload_indices:
+                self.state.publish_indexed(index_name, None)
+                continue
+            ids = indexed[index_name]
+            for num in range(0, len(ids), batch_size):
+                self.state.publish_indexed(index_name, ids[num:num + batch_size])
+
+    @contextmanager
+    def _bulk_indexing(self, planner: DirtySetPlanner) -> Generator[None, None, None]:
+        """Отключение refresh и реплик индексов, перезагружаемых целиком.
+
+        Настройки индексов меняются только единственным процессом, иначе процессы восстановят их неверно.
+        """
+        indices = list(planner.full_reload_indices.values()) if self.leases.count == 1 else []
+        if not indices or not self.elastic_settings.full_reload_tuning:
+            yield
+            return
+        self.state.start_bulk_indexing([index["index"] for index in indices])
+        with self.loader.bulk_indexing(indices):
+            yield
+        self.state.finish_bulk_indexing()
+
+    def _restore_bulk_indexing(self, adapters: list[TableAdapter]) -> None:
+        """Восстановление настроек индексов, полная перезагрузка которых прервалась остановкой процесса"""
+        aliases = self.state.get_bulk_indexing()
+        if not aliases:
+            return
+        definitions: dict[str, IndexDefinition] = {}
+        for adapter in adapters:
+            definitions.update(adapter.indices)
+        self.loader.restore_settings([definitions[alias] for alias in sorted(aliases) if alias in definitions])
+        self.state.finish_bulk_indexing()
+
+    def _rename_documents(
+        self,
+        index_adapter: IndexAdapter,
+        renamed_ids: list[UUID],
+        doc_ids: list[UUID],
+        data_extractor: PGExtractor,
+    ) -> int:
+        """Замена имен переименованных сущностей в документах индекса через update_by_query.
+
+        Возвращает количество обновленных документов.
+        """
+        if not doc_ids:
+            return 0
+        rename: RenameFields = index_adapter.rename  # type: ignore
+        data_extractor.set_factory(rename.names_class)
+        names = {
+            str(row.id): getattr(row, rename.name_field)
+            for chunk in data_extractor.extract_data(rename.names_query, renamed_ids)
+            for row in chunk
+        }
+        index_name = index_adapter.index["index"]
+        rebuild_index = self.rebuild_indices.get(index_name)
+        batch_size = self.elastic_settings.rename_batch_size
+        updated = 0
+        for num in range(0, len(doc_ids), batch_size):
+            batch_ids = [str(doc_id) for doc_id in doc_ids[num:num + batch_size]]
+            if rebuild_index:
+                self.loader.rename_nested(rebuild_index, batch_ids, rename, names)
+            updated += self.loader.rename_nested(index_name, batch_ids, rename, names)
+            self.state.publish_indexed(index_name, batch_ids)
+            self.leases.heartbeat()
+        logging.info("%d names renamed in %d documents of %s.", len(names), updated, index_name)
+        return updated
 
     def _create_if_not_exists_index(self, adapters: list[TableAdapter]) -> None:
-        """Проверка и создание индекса в случае его отсутствия."""
+        """Проверка и создание первой версии индекса с алиасом в случае его отсутствия."""
         for adapter in adapters:
             for index_adapter in adapter.index_adapters:
                 index_name = index_adapter.index["index"]
                 if not self.loader.check_index(index_name):
                     logging.info("Creating an index %s", index_name)
-                    self.loader.create_index(index_adapter.index)
-                    logging.info("Index %s created.", index_name)
+                    versioned_name = self.loader.create_versioned_index(index_adapter.index, attach_alias=True)
+                    logging.info("Index %s created with alias %s.", versioned_name, index_name)
+
+    def _rebuild_step(self, id_extractor: PGExtractor, data_extractor: PGExtractor) -> bool:
+        """Загрузка очередных порций запрошенных перестроек индексов.
+
+        Перестройку выполняет процесс, владеющий шардом 0, остальные процессы только пишут изменения
+        и в новую версию индекса. Когда все объекты загружены, алиас переключается на новую версию индекса.
+        Возвращает True, если перестройка еще не завершена и ее выполняет этот процесс.
+        """
+        self.rebuild_indices = {}
+        rebuild_owner = 0 in self.leases.owned
+        for alias, rebuild_adapter in rebuild_adapters.items():
+            rebuild = self.state.get_rebuild(alias)
+            if rebuild is None:
+                continue
+            if rebuild_owner:
+                index_name = self._rebuild_index(rebuild_adapter, rebuild, id_extractor, data_extractor)
+            else:
+                index_name = rebuild.get("index")
+            if index_name:
+                self.rebuild_indices[alias] = index_name
+        return rebuild_owner and bool(self.rebuild_indices)
+
+    def _rebuild_index(
+        self,
+        rebuild_adapter: RebuildAdapter,
+        rebuild: dict[str, str],
+        id_extractor: PGExtractor,
+        data_extractor: PGExtractor,
+    ) -> str | None:
+        """Порции перестройки одного индекса, возвращает новую версию индекса, если перестройка не завершена"""
+        alias = rebuild_adapter.index["index"]
+        index_name = rebuild.get("index")
+        if not index_name:
+            index_name = self.loader.create_versioned_index(rebuild_adapter.index)
+            self.state.set_rebuild(alias, index_name, "")
+            logging.info("Rebuilding %s into %s.", alias, index_name)
+        cursor = rebuild.get("cursor") or str(UUID(int=0))
+        if not self._rebuild_batches(rebuild_adapter, index_name, cursor, id_extractor, data_extractor):
+            return index_name
+        self.loader.swap_alias(rebuild_adapter.index, index_name, self.elastic_settings.rebuild_keep_versions)
+        self.state.finish_rebuild(alias)
+        # Кэш сбрасывается целиком: документы новой версии индекса могут отличаться от всех прежних
+        self.state.publish_indexed(alias, None)
+        return None
+
+    def _rebuild_batches(
+        self,
+        rebuild_adapter: RebuildAdapter,
+        index_name: str,
+        cursor: str,
+        id_extractor: PGExtractor,
+        data_extractor: PGExtractor,
+    ) -> bool:
+        """Загрузка нескольких порций объектов в новую версию индекса, возвращает True, если объекты закончились"""
+        alias = rebuild_adapter.index["index"]
+        for _ in range(self.elastic_settings.rebuild_batches_per_cycle):
+            id_chunks = id_extractor.extract_data(
+                rebuild_adapter.get_ids_query,
+                cursor,
+                self.elastic_settings.rebuild_batch_size,
+            )
+            ids = [row.id for chunk in id_chunks for row in chunk]
+            if not ids:
+                return True
+            data_extractor.set_factory(rebuild_adapter.data_class)
+            data = data_extractor.extract_data(rebuild_adapter.get_data_query, ids)
+            self.loader.load_data(index_name, data)
+            cursor = str(ids[-1])
+            self.state.set_rebuild(alias, index_name, cursor)
+            self.leases.heartbeat()
+        return False
 
-    def _set_modified_time(self, adapter: TableAdapter, new_time: datetime) -> None:
-        adapter.new_modified = new_time
+    @staticmethod
+    def _log_throughput(planner: DirtySetPlanner, loaded: int, elapsed: float) -> None:
+        if loaded:
+            logging.info(
+                "%d documents loaded in %.2f s (%.0f docs/s), %d redundant rebuilds avoided of %d requested",
+                loaded,
+                elapsed,
+                loaded / elapsed,
+                planner.stats.avoided,
+                planner.stats.requested,
+            )
 
-    def _update_modified_time(self, adapter: TableAdapter) -> None:
-        """Обновление времени последнего перенесенного изменения"""
-        last_transform = adapter.new_modified
-        if last_transform:
-            self.state.set_modified_dt(adapter.table, last_transform)
+    def _save_change_cursor(self, adapter: TableAdapter) -> None:
+        """Сохранение позиций последних перенесенных изменений, после сбоя перенос продолжится с них"""
+        if not adapter.new_cursors:
+            logging.info("%s no updated data.", adapter.table)
+        for shard, cursor in adapter.new_cursors.items():
+            self.state.set_change_cursor(self._cursor_key(adapter, shard), cursor)
+            LAST_INDEXED_MODIFIED.labels(adapter.table).set(cursor[0].timestamp())
             logging.info(
-                "Data from %s was successfully migrated. Last update %s",
+                "Data from %s, shard %d was successfully migrated. Last update %s (%s)",
                 adapter.table,
-                last_transform,
+                shard,
+                *cursor,
             )
-        else:
-            logging.info("%s no updated data.", adapter.table)
+        adapter.new_cursors.clear()
 
-    def _process_locker(self, state: EtlState) -> None:
-        """Периодическое обновление значения для блокировки запуска дублирующих процессов"""
-        while not self.exit_flag:
-            state.set_block()
-            sleep(min(5, self.state.lifetime - 5))
+    def _cursor_key(self, adapter: TableAdapter, shard: int) -> str:
+        """Позиция хранится отдельно для каждого шарда, при изменении числа шардов таблица переносится заново"""
+        if self.leases.count == 1:
+            return adapter.table
+        return f"{adapter.table}:{shard}/{self.leases.count}"
@@ -0,0 +1,71 @@
+import logging
+import select
+from time import monotonic, sleep
+
+import backoff
+import psycopg
+
+from settings import DbSettings
+
+
+class ChangeListener:
+    """Ожидание оповещений Postgres об изменении таблиц каталога (LISTEN/NOTIFY).
+
+    Оповещения отправляют триггеры таблиц content, в оповещении передается только имя таблицы.
+    Сами изменения ETL по-прежнему читает от сохраненной позиции, поэтому потерянное оповещение
+    лишь откладывает перенос до очередного прохода по расписанию.
+    """
+
+    def __init__(self, settings: DbSettings, tables: dict[str, str]):
+        """tables - соответствие таблиц из оповещений таблицам адаптеров ETL"""
+        self.dsn = settings.dsn
+        self.enabled = settings.notify_enabled
+        self.channel = settings.notify_channel
+        self.debounce = settings.notify_debounce
+        self.tables = tables
+        self._changed: set[str] = set()
+
+    @backoff.on_exception(backoff.expo, exception=psycopg.OperationalError, max_value=120)
+    def __enter__(self) -> "ChangeListener":
+        if self.enabled:
+            self._conn = psycopg.Connection.connect(str(self.dsn), autocommit=True)
+            self._conn.add_notify_handler(self._on_notify)
+            self._conn.execute(f"LISTEN {self.channel}")  # type: ignore
+            logging.info("Listening for changes on channel %s.", self.channel)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:  # type: ignore
+        if self.enabled:
+            self._conn.close()
+
+    def wait(self, timeout: float) -> set[str] | None:
+        """Ожидание изменений не дольше timeout секунд.
+
+        Возвращает таблицы адаптеров, в которых были изменения, или None, если оповещений не было.
+        """
+        if not self.enabled:
+            sleep(timeout)
+            return None
+        deadline = monotonic() + timeout
+        self._receive()
+        while not self._changed:
+            remaining = deadline - monotonic()
+            if remaining <= 0 or not select.select([self._conn.fileno()], [], [], remaining)[0]:
+                return None
+            # Изменения из админки приходят несколькими транзакциями подряд, собираем их в один проход
+            sleep(self.debounce)
+            self._receive()
+        changed = self._changed
+        self._changed = set()
+        return changed
+
+    def _receive(self) -> None:
+        """Полученные соединением оповещения передаются обработчику при выполнении любого запроса"""
+        self._conn.execute("SELECT 1")
+
+    def _on_notify(self, notify: psycopg.Notify) -> None:
+        table = self.tables.get(notify.payload)
+        if table is None:
+            logging.warning("Notification about unknown table %s.", notify.payload)
+            return
+        self._changed.add(table)
@@ -1,15 +1,34 @@
+import argparse
 import logging
 
 from dotenv import load_dotenv
+from redis import Redis
 
-from etl import ETLProcess
-from settings import AppSettings, adapters
+from etl import ETLProcess, EtlState
+from metrics import start_metrics_server
+from settings import AppSettings, adapters, rebuild_adapters
 
 if __name__ == "__main__":
     load_dotenv()
 
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--rebuild",
+        nargs="+",
+        choices=list(rebuild_adapters),
+        help="запросить у запущенного ETL полную перестройку индексов с переключением алиаса и выйти",
+    )
+    args = parser.parse_args()
+
     app_settings = AppSettings()
     logging.basicConfig(**app_settings.logging.as_dict())
-    etl = ETLProcess(app_settings)
-
-    etl.run(adapters)
+    if args.rebuild:
+        state = EtlState(Redis.from_url(str(app_settings.redis.dsn)))
+        for alias in args.rebuild:
+            state.request_rebuild(alias)
+            logging.info("Rebuild of %s requested.", alias)
+    else:
+        if app_settings.metrics.enabled:
+            start_metrics_server(app_settings.metrics.port, app_settings.metrics.max_lag)
+        etl = ETLProcess(app_settings)
+        etl.run(adapters)
@@ -0,0 +1,98 @@
+import json
+import logging
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from time import time
+from typing import Any
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+# Скорости (строк/с, документов/с) считаются в Prometheus через rate() по счетчикам
+ROWS_EXTRACTED = Counter("etl_rows_extracted_total", "Changed rows read from Postgres", ["table"])
+DOCS_INDEXED = Counter("etl_documents_indexed_total", "Documents loaded into Elasticsearch", ["index"])
+BULK_SECONDS = Histogram(
+    "etl_bulk_seconds",
+    "Duration of one load into Elasticsearch",
+    ["index", "mode"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+BULK_REJECTED = Counter("etl_bulk_rejected_total", "Documents rejected by Elasticsearch in parallel bulk", ["index"])
+BULK_RETRIES = Counter("etl_bulk_retries_total", "Bulk requests retried after an error", ["index"])
+TABLE_LAG = Gauge("etl_table_lag_seconds", "Time since all changes of the table were indexed", ["table"])
+LAST_INDEXED_MODIFIED = Gauge(
+    "etl_table_last_indexed_modified_seconds",
+    "Unix time of the newest indexed change of the table",
+    ["table"],
+)
+
+
+class LagTracker:
+    """Отставание ETL по таблицам.
+
+    Таблица считается догнанной на момент начала прохода, после которого все ее изменения загружены,
+    отставание - время, прошедшее с этого момента. Полный проход выполняется не реже интервала опроса,
+    поэтому, пока ETL успевает, отставание любой таблицы не превышает интервала опроса и длительности прохода.
+    """
+
+    def __init__(self) -> None:
+        self.started = time()
+        self._caught_up: dict[str, float] = {}
+
+    def track(self, table: str) -> None:
+        if table not in self._caught_up:
+            self._caught_up[table] = self.started
+            TABLE_LAG.labels(table).set_function(lambda: self.lag(table))
+
+    def caught_up(self, table: str, pass_started: float) -> None:
+        self._caught_up[table] = max(self._caught_up.get(table, 0), pass_started)
+
+    def lag(self, table: str) -> float:
+        return time() - self._caught_up.get(table, self.started)
+
+    def lags(self) -> dict[str, float]:
+        return {table: self.lag(table) for table in self._caught_up}
+
+
+lag_tracker = LagTracker()
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """/metrics для Prometheus и /health, возвращающий 503, если отставание таблицы больше max_lag"""
+
+    def __init__(self, *args: Any, max_lag: float, **kwargs: Any):
+        # Запрос обрабатывается в конструкторе базового класса, поэтому порог задается до его вызова
+        self.max_lag = max_lag
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path == "/metrics":
+            self._respond(200, CONTENT_TYPE_LATEST, generate_latest())
+        elif self.path == "/health":
+            self._health()
+        else:
+            self._respond(404, "text/plain", b"Not found")
+
+    def log_message(self, message_format: str, *args: Any) -> None:
+        logging.debug(message_format, *args)
+
+    def _health(self) -> None:
+        lags = lag_tracker.lags()
+        status = 503 if any(lag > self.max_lag for lag in lags.values()) else 200
+        body = {"status": "ok" if status == 200 else "lagging", "max_lag": self.max_lag, "lag": lags}
+        self._respond(status, "application/json", json.dumps(body).encode())
+
+    def _respond(self, status: int, content_type: str, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_metrics_server(port: int, max_lag: float) -> ThreadingHTTPServer:
+    """HTTP-сервер метрик в отдельном потоке"""
+    server = ThreadingHTTPServer(("", port), partial(MetricsHandler, max_lag=max_lag))
+    Thread(target=server.serve_forever, daemon=True).start()
+    logging.info("Metrics are served on port %d.", port)
+    return server
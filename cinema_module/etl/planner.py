@@ -0,0 +1,81 @@
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from typing import NamedTuple
+from uuid import UUID
+
+from settings import IndexAdapter, IndexDefinition
+
+
+class PlannedBatch(NamedTuple):
+    """Порция плана, fields - обновляемые поля документов, None - документы целиком"""
+    index_adapter: IndexAdapter
+    ids: list[UUID]
+    fields: set[str] | None
+
+
+@dataclass
+class DirtyIndex:
+    """Документы одного индекса, которые нужно перестроить целиком или обновить частично"""
+    index_adapter: IndexAdapter
+    ids: set[UUID] = field(default_factory=set)
+    partial: dict[UUID, set[str]] = field(default_factory=dict)
+
+    def groups(self) -> dict[frozenset[str] | None, list[UUID]]:
+        """id документов по набору обновляемых полей, None - документы целиком.
+
+        Документ, запланированный и целиком, и частично, загружается только целиком.
+        """
+        groups: dict[frozenset[str] | None, list[UUID]] = {None: sorted(self.ids)}
+        for doc_id, doc_fields in sorted(self.partial.items()):
+            if doc_id not in self.ids:
+                groups.setdefault(frozenset(doc_fields), []).append(doc_id)
+        return groups
+
+
+@dataclass
+class PlanStats:
+    requested: int = 0
+    planned: int = 0
+
+    @property
+    def avoided(self) -> int:
+        return self.requested - self.planned
+
+
+class DirtySetPlanner:
+    """Планировщик цикла ETL: сначала собирает id затронутых документов от всех адаптеров, затем отдает на загрузку.
+
+    Один фильм может попасть в цикл из нескольких таблиц (сам фильм, его персоны и жанры),
+    в плане он остается один раз, поэтому каждый документ строится и загружается однократно.
+    """
+
+    def __init__(self) -> None:
+        self.indices: dict[str, DirtyIndex] = {}
+        self.full_reload_indices: dict[str, IndexDefinition] = {}
+        self.stats = PlanStats()
+
+    @property
+    def size(self) -> int:
+        return sum(len(dirty_index.ids) + len(dirty_index.partial) for dirty_index in self.indices.values())
+
+    def add(self, index_adapter: IndexAdapter, ids: list[UUID], fields: set[str] | None = None) -> None:
+        """Добавление документов в план, fields - обновить только эти поля документов"""
+        index_name = index_adapter.index["index"]
+        dirty_index = self.indices.setdefault(index_name, DirtyIndex(index_adapter))
+        self.stats.requested += len(ids)
+        if fields is None:
+            dirty_index.ids.update(ids)
+            return
+        for doc_id in ids:
+            dirty_index.partial.setdefault(doc_id, set()).update(fields)
+
+    def drain(self, batch_size: int) -> Iterator[PlannedBatch]:
+        """Выдача запланированных id порциями по индексам, план при этом очищается"""
+        dirty_indices = list(self.indices.values())
+        self.indices = {}
+        for dirty_index in dirty_indices:
+            for group_fields, ids in dirty_index.groups().items():
+                self.stats.planned += len(ids)
+                fields = set(group_fields) if group_fields else None
+                for num in range(0, len(ids), batch_size):
+                    yield PlannedBatch(dirty_index.index_adapter, ids[num:num + batch_size], fields)
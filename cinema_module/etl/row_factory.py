@@ -35,6 +35,16 @@ class ElasticFilmData(BaseModel):
     subscriptions: list[UUID]
 
 
+class FilmParts(BaseModel):
+    id: UUID
+    imdb_rating: float | None
+    title: str | None
+    description: str | None
+    genre_ids: list[UUID]
+    persons: list[tuple[UUID, str]]
+    subscriptions: list[UUID]
+
+
 class ElasticGenreData(BaseModel):
     id: UUID
     name: str
@@ -52,4 +62,4 @@ class ElasticPersonData(BaseModel):
 
 
 ElasticDataClasses = type[ElasticFilmData | ElasticGenreData | ElasticPersonData]
-EtlClasses = BaseClass | ElasticFilmData | ElasticGenreData | ElasticPersonData
+EtlClasses = BaseClass | ElasticFilmData | ElasticGenreData | ElasticPersonData | FilmParts
@@ -1,23 +1,44 @@
 import logging
 import sys
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import IO, Any
+from typing import IO, Any, Literal
+from uuid import UUID
 
 from pydantic import HttpUrl, PostgresDsn, RedisDsn
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 from db_queries import Queries
 from elastic_indexes import index_genre, index_movie, index_person
-from row_factory import ElasticFilmData, ElasticGenreData, ElasticPersonData
+from row_factory import ElasticFilmData, ElasticGenreData, ElasticPersonData, GenreInfo, PersonInfo
+
+# Описание индекса из elastic_indexes: имя (алиас), settings и mappings
+IndexDefinition = dict[str, Any]
+
+
+@dataclass
+class RenameFields:
+    """Вложенные списки документа, в которых меняется имя при переименовании связанной сущности"""
+    name_field: str
+    # Путь вложенного списка и поле со списком имен из него
+    names_fields: dict[str, str]
+    # Запрос новых имен по id переименованных сущностей
+    names_query: str
+    names_class: type[PersonInfo | GenreInfo]
+
+    @property
+    def fields(self) -> set[str]:
+        return {*self.names_fields, *self.names_fields.values()}
 
 
 @dataclass
 class IndexAdapter:
     data_class: type[ElasticFilmData | ElasticGenreData]
     get_data_query: str
-    index: dict[str, Any]
+    index: IndexDefinition
     linking_query: str | None = None
+    # Изменение базовой таблицы меняет в документах индекса только имена во вложенных списках
+    rename: RenameFields | None = None
 
 
 @dataclass
@@ -25,22 +46,89 @@ class TableAdapter:
     get_id_query: str
     table: str
     index_adapters: list[IndexAdapter]
-    new_modified: datetime | None = None
+    # Таблицы, оповещения об изменении которых запускают проход адаптера
+    notify_tables: tuple[str, ...] = ()
+    # Позиции последних собранных в план изменений по шардам
+    new_cursors: dict[int, tuple[datetime, UUID]] = field(default_factory=dict)
+
+    @property
+    def indices(self) -> dict[str, IndexDefinition]:
+        return {index_adapter.index["index"]: index_adapter.index for index_adapter in self.index_adapters}
+
+
+@dataclass
+class RebuildAdapter:
+    """Источник полной перестройки индекса: все id базовой таблицы порциями по возрастанию"""
+    index: IndexDefinition
+    get_ids_query: str
+    data_class: type[ElasticFilmData | ElasticGenreData | ElasticPersonData]
+    get_data_query: str
 
 
 class DbSettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="pg_db_")
     dsn: PostgresDsn
+    # Перенос изменений по оповещениям триггеров, опрос таблиц по расписанию при этом сохраняется
+    notify_enabled: bool = True
+    notify_channel: str = "etl_changes"
+    notify_debounce: float = 0.2
 
 
 class ElasticSettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="elastic_")
     base_url: HttpUrl
+    # streaming - пачки отправляются по одной, parallel - несколькими потоками через parallel_bulk
+    bulk_mode: Literal["streaming", "parallel"] = "parallel"
+    bulk_max_docs: int = 500
+    bulk_max_bytes: int = 10 * 1024 * 1024
+    bulk_threads: int = 4
+    bulk_queue_size: int = 4
+    bulk_max_retries: int = 50
+    # Отключение refresh и реплик индексов на время полной перезагрузки
+    full_reload_tuning: bool = True
+    # Полная перестройка индекса: размер порции id, порций за цикл ETL и число хранимых старых версий
+    rebuild_batch_size: int = 1000
+    rebuild_batches_per_cycle: int = 10
+    rebuild_keep_versions: int = 1
+    # Переименования персон и жанров: reindex - документы фильмов целиком, partial - update только
+    # измененных полей, update_by_query - скрипт на стороне ElasticSearch без сборки документов
+    rename_mode: Literal["reindex", "partial", "update_by_query"] = "update_by_query"
+    rename_batch_size: int = 1000
+    # Размер порции изменений, читаемой из таблицы от сохраненной позиции (modified, id)
+    change_batch_size: int = 1000
+    # План цикла: предел числа собранных id, после которого план загружается досрочно, и размер порции выборки
+    dirty_set_max_ids: int = 100000
+    dirty_set_load_batch: int = 1000
 
 
 class RedisSettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="redis_")
     dsn: RedisDsn
+    # Канал для публикации идентификаторов переиндексированных документов
+    indexed_channel: str = "etl:indexed"
+
+
+class ShardSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="etl_shard_")
+    # Количество шардов изменений, шарды распределяются между запущенными процессами ETL
+    count: int = 1
+    lease_ttl: int = 30
+    heartbeat_interval: float = 5
+
+
+class DocumentCacheSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="etl_document_cache_")
+    # Сборка документов фильмов из кэша частей вместо FILMWORK_DATA
+    enabled: bool = True
+    ttl: int = 7 * 24 * 60 * 60
+
+
+class MetricsSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="etl_metrics_")
+    enabled: bool = True
+    port: int = 8000
+    # Отставание в секундах, при превышении которого /health отвечает 503
+    max_lag: float = 300
 
 
 class LoggingSettings:
@@ -60,6 +148,9 @@ class AppSettings:
     database = DbSettings()
     elastic = ElasticSettings()
     redis = RedisSettings()
+    shards = ShardSettings()
+    document_cache = DocumentCacheSettings()
+    metrics = MetricsSettings()
     logging = LoggingSettings()
 
 
@@ -67,6 +158,7 @@ adapters = [
     TableAdapter(
         get_id_query=Queries.FILMWORK_MODIFIED,
         table="filmwork",
+        notify_tables=("film_work", "genre_film_work", "person_film_work", "subscription_film_work"),
         index_adapters=[
             IndexAdapter(
                 data_class=ElasticFilmData,
@@ -85,12 +177,23 @@ adapters = [
     TableAdapter(
         get_id_query=Queries.PERSON_MODIFIED,
         table="person",
+        notify_tables=("person",),
         index_adapters=[
             IndexAdapter(
                 data_class=ElasticFilmData,
                 linking_query=Queries.FILM_BY_PERSON,
                 get_data_query=Queries.FILMWORK_DATA,
                 index=index_movie,
+                rename=RenameFields(
+                    name_field="full_name",
+                    names_fields={
+                        "actors": "actors_names",
+                        "directors": "directors_names",
+                        "writers": "writers_names",
+                    },
+                    names_query=Queries.PERSON_NAMES,
+                    names_class=PersonInfo,
+                ),
             ),
             IndexAdapter(
                 data_class=ElasticPersonData,
@@ -103,12 +206,19 @@ adapters = [
     TableAdapter(
         get_id_query=Queries.GENRE_MODIFIED,
         table="genre",
+        notify_tables=("genre",),
         index_adapters=[
             IndexAdapter(
                 data_class=ElasticFilmData,
                 linking_query=Queries.FILM_BY_GENRE,
                 get_data_query=Queries.FILMWORK_DATA,
                 index=index_movie,
+                rename=RenameFields(
+                    name_field="name",
+                    names_fields={"genre": "genre_names"},
+                    names_query=Queries.GENRE_DATA,
+                    names_class=GenreInfo,
+                ),
             ),
             IndexAdapter(
                 data_class=ElasticGenreData,
@@ -119,3 +229,24 @@ adapters = [
         ],
     ),
 ]
+
+rebuild_adapters = {
+    index_movie["index"]: RebuildAdapter(
+        index=index_movie,
+        get_ids_query=Queries.FILMWORK_IDS,
+        data_class=ElasticFilmData,
+        get_data_query=Queries.FILMWORK_DATA,
+    ),
+    index_person["index"]: RebuildAdapter(
+        index=index_person,
+        get_ids_query=Queries.PERSON_IDS,
+        data_class=ElasticPersonData,
+        get_data_query=Queries.PERSON_DATA,
+    ),
+    index_genre["index"]: RebuildAdapter(
+        index=index_genre,
+        get_ids_query=Queries.GENRE_IDS,
+        data_class=ElasticGenreData,
+        get_data_query=Queries.GENRE_DATA,
+    ),
+}
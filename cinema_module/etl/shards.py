@@ -0,0 +1,103 @@
+import logging
+import random
+from math import ceil
+from time import monotonic
+
+from redis import Redis
+
+
+class ShardLeases:
+    """Аренда шардов ETL в Redis.
+
+    Изменения таблиц делятся на count шардов по хэшу id, шард обрабатывает только процесс,
+    который держит его аренду. Аренда продлевается на каждом heartbeat, аренда упавшего процесса
+    истекает через lease_ttl секунд, и шард забирает один из оставшихся. Каждый процесс держит
+    не больше своей доли шардов, лишние отпускает для процессов, запущенных позже.
+    """
+
+    PREFIX = "ETL"
+    SHARD_KEY = "SHARD"
+    WORKERS_KEY = "WORKERS"
+    RENEW_SCRIPT = """
+        if redis.call('get', KEYS[1]) == ARGV[1] then
+            return redis.call('expire', KEYS[1], ARGV[2])
+        end
+        return 0
+    """
+    RELEASE_SCRIPT = """
+        if redis.call('get', KEYS[1]) == ARGV[1] then
+            return redis.call('del', KEYS[1])
+        end
+        return 0
+    """
+
+    def __init__(self, redis: Redis, worker_id: str, count: int, lease_ttl: int, heartbeat_interval: float):
+        self.redis = redis
+        self.worker_id = worker_id
+        self.count = count
+        self.lease_ttl = lease_ttl
+        self.heartbeat_interval = heartbeat_interval
+        self.owned: set[int] = set()
+        # Количество потерянных и отпущенных аренд, по нему проход узнает, что набор шардов менялся
+        self.revoked = 0
+        self._next_heartbeat: float = 0
+        self._renew = redis.register_script(self.RENEW_SCRIPT)
+        self._release = redis.register_script(self.RELEASE_SCRIPT)
+
+    def heartbeat(self, force: bool = False) -> None:
+        """Продление аренды своих шардов и перераспределение шардов между живыми процессами"""
+        if not force and monotonic() < self._next_heartbeat:
+            return
+        self._next_heartbeat = monotonic() + self.heartbeat_interval
+        workers = self._register_worker()
+        self._renew_owned()
+        fair_share = ceil(self.count / max(workers, 1))
+        self._release_extra(fair_share)
+        self._acquire_free(fair_share)
+
+    def release(self, shard: int) -> None:
+        self._release(keys=[self._key(shard)], args=[self.worker_id])
+        self.owned.discard(shard)
+        self.revoked += 1
+
+    def release_all(self) -> None:
+        for shard in sorted(self.owned):
+            self.release(shard)
+        self.redis.zrem(f"{self.PREFIX}:{self.WORKERS_KEY}", self.worker_id)
+
+    def _renew_owned(self) -> None:
+        for owned_shard in sorted(self.owned):
+            if not self._renew(keys=[self._key(owned_shard)], args=[self.worker_id, self.lease_ttl]):
+                logging.warning("Lease of shard %d is lost.", owned_shard)
+                self.owned.discard(owned_shard)
+                self.revoked += 1
+
+    def _release_extra(self, fair_share: int) -> None:
+        """Освобождение шардов сверх доли процесса для процессов, запущенных позже"""
+        while len(self.owned) > fair_share:
+            extra_shard = max(self.owned)
+            self.release(extra_shard)
+            logging.info("Shard %d is released for rebalancing.", extra_shard)
+
+    def _acquire_free(self, fair_share: int) -> None:
+        free_shards = [shard for shard in range(self.count) if shard not in self.owned]
+        random.shuffle(free_shards)
+        for free_shard in free_shards:
+            if len(self.owned) >= fair_share:
+                return
+            if self.redis.set(self._key(free_shard), self.worker_id, nx=True, ex=self.lease_ttl):
+                self.owned.add(free_shard)
+                logging.info("Shard %d of %d is acquired.", free_shard, self.count)
+
+    def _register_worker(self) -> int:
+        """Отметка процесса в списке живых, возвращает количество живых процессов"""
+        now = self.redis.time()[0]
+        key = f"{self.PREFIX}:{self.WORKERS_KEY}"
+        with self.redis.pipeline() as pipe:
+            pipe.zadd(key, {self.worker_id: now})
+            pipe.zremrangebyscore(key, "-inf", now - self.lease_ttl)
+            pipe.zcard(key)
+            return pipe.execute()[-1]
+
+    def _key(self, shard: int) -> str:
+        return f"{self.PREFIX}:{self.SHARD_KEY}:{self.count}:{shard}"
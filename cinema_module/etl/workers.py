@@ -1,19 +1,52 @@
 import logging
 from collections.abc import Generator, Iterator
+from contextlib import contextmanager
+from copy import deepcopy
 from itertools import chain, islice
+from time import perf_counter
 from typing import Any
 
 import backoff
 import psycopg
 from elastic_transport import TransportError
-from elasticsearch import Elasticsearch
-from elasticsearch.helpers import streaming_bulk
+from elasticsearch import ConflictError, Elasticsearch
+from elasticsearch.helpers import parallel_bulk, streaming_bulk
 from psycopg.rows import class_row
 from pydantic import BaseModel
 
 from exceptions import ElasticLoadException
+from metrics import BULK_REJECTED, BULK_RETRIES, BULK_SECONDS, DOCS_INDEXED
 from row_factory import BaseClass, ElasticDataClasses, EtlClasses
-from settings import DbSettings, ElasticSettings
+from settings import DbSettings, ElasticSettings, IndexDefinition, RenameFields
+
+# Замена имен во вложенных списках документа и пересчет списков имен без повторов
+RENAME_SCRIPT = """
+    boolean changed = false;
+    for (entry in params.names_fields.entrySet()) {
+        def items = ctx._source[entry.getKey()];
+        if (items == null) {
+            continue;
+        }
+        def names = new TreeSet();
+        for (item in items) {
+            if (params.names.containsKey(item.id)) {
+                item[params.name_field] = params.names[item.id];
+                changed = true;
+            }
+            names.add(item[params.name_field]);
+        }
+        ctx._source[entry.getValue()] = new ArrayList(names);
+    }
+    if (!changed) {
+        ctx.op = 'noop';
+    }
+"""
+
+
+def _count_bulk_retry(details: dict[str, Any]) -> None:
+    """Учет повторов load_bulk, имя индекса - второй аргумент метода"""
+    index_name = details["kwargs"].get("index_name") or details["args"][2]
+    BULK_RETRIES.labels(index_name).inc()
 
 
 class PGExtractor:
@@ -29,7 +62,8 @@ class PGExtractor:
 
     @backoff.on_exception(backoff.expo, exception=psycopg.errors.ConnectionTimeout, max_value=120)
     def __enter__(self) -> "PGExtractor":
-        self._conn = psycopg.Connection.connect(str(self.dsn), cursor_factory=psycopg.ClientCursor)
+        # Серверная передача параметров: текст запросов не зависит от данных и готовится один раз на соединение
+        self._conn = psycopg.Connection.connect(str(self.dsn))
         self._cursor = self._conn.cursor()
         self._cursor.itersize = self.chunk_size  # type: ignore
         if self.row_factory:
@@ -52,7 +86,7 @@ class PGExtractor:
     def extract_data(self, query: str, *query_args: Any) -> Generator[Iterator[EtlClasses], None, None]:
         """Метод генерирует итераторы полученных их БД данных"""
 
-        self._cursor.execute(query, query_args)
+        self._cursor.execute(query, query_args, prepare=True)
         yield from self._chunk_generator(self._cursor)
 
     def _chunk_generator(self, cursor: psycopg.Cursor) -> Generator[Iterator[EtlClasses], None, None]:
@@ -65,17 +99,40 @@ class PGExtractor:
 class ElasticLoader:
     def __init__(self, settings: ElasticSettings):
         self.client = Elasticsearch(str(settings.base_url))
+        self.settings = settings
 
-    def load_data(self, index_name: str, data: Iterator[Iterator[BaseModel]]) -> None:
-        """Метод загрузки данных пачками в ElasticSearch в указанный индекс"""
+    def load_data(
+        self,
+        index_name: str,
+        data: Iterator[Iterator[BaseModel]],
+        fields: set[str] | None = None,
+    ) -> list[str]:
+        """Метод загрузки данных пачками в ElasticSearch в указанный индекс, возвращает id загруженных документов.
+
+        Если указаны fields, документы не перезаписываются, а обновляются только эти поля.
+        """
 
-        bulk_quantity = None
         # Преобразуем генератор в кортеж, чтобы не разряжать генератор при исключениях
-        for num, bulk in enumerate(map(tuple, data), start=1):
-            self.load_bulk(bulk, index_name)
-            bulk_quantity = num
-        if not bulk_quantity:
+        rows = tuple(chain.from_iterable(data))
+        if not rows:
             logging.info("No new data.")
+            return []
+        start = perf_counter()
+        if self.settings.bulk_mode == "parallel":
+            self.load_parallel(rows, index_name, fields)
+        else:
+            self.load_bulk(rows, index_name, fields)
+        elapsed = perf_counter() - start
+        BULK_SECONDS.labels(index_name, self.settings.bulk_mode).observe(elapsed)
+        DOCS_INDEXED.labels(index_name).inc(len(rows))
+        logging.info(
+            "Loaded %d documents into %s in %.2f s (%.0f docs/s)",
+            len(rows),
+            index_name,
+            elapsed,
+            len(rows) / elapsed if elapsed else 0,
+        )
+        return [str(row.id) for row in rows]
 
     @backoff.on_exception(backoff.expo, exception=(TransportError), max_value=120)
     def check_index(self, index_name: str) -> bool:
@@ -85,19 +142,186 @@ class ElasticLoader:
     def create_index(self, index: dict[str, Any]) -> None:
         self.client.indices.create(**index)
 
-    @backoff.on_exception(backoff.expo, exception=(TransportError, ElasticLoadException), max_value=120)
-    def load_bulk(self, bulk: tuple, index_name: str) -> None:
+    def index_versions(self, alias: str) -> dict[int, str]:
+        """Версии индекса вида {alias}_v{n}"""
+        indices = self.client.indices.get(index=f"{alias}_v*", expand_wildcards="open").body
+        versions = {}
+        for index_name in indices:
+            version = index_name.rsplit("_v", 1)[-1]
+            if version.isdigit():
+                versions[int(version)] = index_name
+        return versions
+
+    def create_versioned_index(self, index: dict[str, Any], attach_alias: bool = False) -> str:
+        """Создание следующей версии индекса, алиасом служит имя индекса из его описания.
+
+        Версия для перестройки (attach_alias=False) создается без реплик и с выключенным refresh.
+        """
+        alias = index["index"]
+        index_name = f"{alias}_v{max(self.index_versions(alias), default=0) + 1}"
+        body = deepcopy(index)
+        body["index"] = index_name
+        if attach_alias:
+            body["aliases"] = {alias: {}}
+        else:
+            body["settings"].update({"refresh_interval": "-1", "number_of_replicas": 0})
+        self.create_index(body)
+        return index_name
+
+    def refresh(self, index_names: list[str]) -> None:
+        self.client.indices.refresh(index=index_names)
+
+    def swap_alias(self, index: dict[str, Any], index_name: str, keep_versions: int) -> None:
+        """Восстановление настроек перестроенного индекса и атомарное переключение на него алиаса.
+
+        После переключения удаляются версии старше keep_versions предыдущих.
+        """
+        alias = index["index"]
+        replicas = None
+        actions: list[dict[str, Any]] = [{"add": {"index": index_name, "alias": alias}}]
+        if self.client.indices.exists_alias(name=alias):
+            for old_index in self.client.indices.get_alias(name=alias).body:
+                actions.append({"remove": {"index": old_index, "alias": alias}})
+        elif self.client.indices.exists(index=alias):
+            # Индекс, созданный до перехода на алиасы, удаляется в той же операции
+            actions.append({"remove_index": {"index": alias}})
+        if len(actions) > 1:
+            replicas = self.client.indices.get_settings(
+                index=alias,
+                name="index.number_of_replicas",
+                flat_settings=True,
+            ).body.popitem()[1]["settings"].get("index.number_of_replicas")
+        self.client.indices.put_settings(
+            index=index_name,
+            settings={
+                "index.refresh_interval": index["settings"].get("refresh_interval"),
+                "index.number_of_replicas": replicas,
+            },
+        )
+        self.client.indices.refresh(index=index_name)
+        self.client.indices.update_aliases(actions=actions)
+        logging.info("Alias %s switched to %s.", alias, index_name)
+        versions = self.index_versions(alias)
+        current = next(version for version, name in versions.items() if name == index_name)
+        old_versions = sorted(version for version in versions if version < current)
+        for version in old_versions[:max(len(old_versions) - keep_versions, 0)]:
+            self.client.indices.delete(index=versions[version])
+            logging.info("Index %s deleted.", versions[version])
+
+    @contextmanager
+    def bulk_indexing(self, indices: list[IndexDefinition]) -> Generator[None, None, None]:
+        """Отключение refresh и реплик индексов на время полной перезагрузки, после нее настройки восстанавливаются"""
+
+        if not self.settings.full_reload_tuning:
+            yield
+            return
+        self.disable_refresh(indices)
+        try:
+            yield
+        finally:
+            self.restore_settings(indices)
+
+    def concrete_indices(self, alias: str) -> list[str]:
+        """Индексы, на которые указывает алиас, или сам индекс, созданный до перехода на алиасы"""
+        return list(self.client.indices.get_alias(index=alias).body)
+
+    def disable_refresh(self, indices: list[IndexDefinition]) -> None:
+        for index in indices:
+            for concrete_index in self.concrete_indices(index["index"]):
+                self.client.indices.put_settings(
+                    index=concrete_index,
+                    settings={"index.refresh_interval": "-1", "index.number_of_replicas": 0},
+                )
+                logging.info("Refresh and replicas of %s are disabled for full reload.", concrete_index)
+
+    def restore_settings(self, indices: list[IndexDefinition]) -> None:
+        """Восстановление refresh и реплик из описания индекса.
+
+        Текущие настройки в кластере не используются: после прерванной перезагрузки в них остались -1 и 0.
+        Отсутствующее в описании значение (None) возвращает значение по умолчанию.
+        """
+        for index in indices:
+            index_settings = {
+                "index.refresh_interval": index["settings"].get("refresh_interval"),
+                "index.number_of_replicas": index["settings"].get("number_of_replicas"),
+            }
+            for concrete_index in self.concrete_indices(index["index"]):
+                self.client.indices.put_settings(index=concrete_index, settings=index_settings)
+                self.client.indices.refresh(index=concrete_index)
+                logging.info("Settings of %s are restored after full reload.", concrete_index)
+
+    @backoff.on_exception(
+        backoff.expo,
+        exception=(TransportError, ElasticLoadException),
+        max_value=120,
+        on_backoff=_count_bulk_retry,
+    )
+    def load_bulk(self, bulk: tuple, index_name: str, fields: set[str] | None = None) -> None:
         for _ in streaming_bulk(  # noqa
             client=self.client,
             index=index_name,
-            actions=self._row_generator(bulk),
+            actions=self._row_generator(bulk, fields),
+            chunk_size=self.settings.bulk_max_docs,
+            max_chunk_bytes=self.settings.bulk_max_bytes,
             yield_ok=False,
-            max_retries=50,
+            max_retries=self.settings.bulk_max_retries,
         ):
             raise ElasticLoadException
 
+    def load_parallel(self, bulk: tuple, index_name: str, fields: set[str] | None = None) -> None:
+        """Загрузка пачек в несколько потоков, не загруженные документы повторно отправляются через load_bulk"""
+
+        failed_ids = set()
+        results = parallel_bulk(
+            client=self.client,
+            index=index_name,
+            actions=self._row_generator(bulk, fields),
+            thread_count=self.settings.bulk_threads,
+            queue_size=self.settings.bulk_queue_size,
+            chunk_size=self.settings.bulk_max_docs,
+            max_chunk_bytes=self.settings.bulk_max_bytes,
+            raise_on_error=False,
+            raise_on_exception=False,
+        )
+        for ok, info in results:
+            if not ok:
+                failed_ids.add(next(iter(info.values())).get("_id"))
+        if failed_ids:
+            BULK_REJECTED.labels(index_name).inc(len(failed_ids))
+            logging.warning("%d documents were not loaded into %s, retrying.", len(failed_ids), index_name)
+            self.load_bulk(tuple(row for row in bulk if str(row.id) in failed_ids), index_name, fields)
+
+    @backoff.on_exception(backoff.expo, exception=(TransportError, ConflictError), max_value=120)
+    def rename_nested(self, index_name: str, doc_ids: list[str], rename: RenameFields, names: dict[str, str]) -> int:
+        """Замена имен во вложенных списках документов скриптом update_by_query, возвращает число обновленных.
+
+        Документы не собираются и не передаются, списки имен пересчитываются скриптом.
+        Повтор после ошибки безопасен: скрипт только записывает новые имена. Поэтому при конфликте версий
+        с одновременной записью того же документа (ConflictError) запрос повторяется целиком.
+        update_by_query видит только обновленные сегменты, а у перестраиваемого индекса и у индекса
+        во время полной перезагрузки refresh выключен, поэтому индекс обновляется перед запросом.
+        После запроса индекс тоже обновляется, чтобы оповещение о переименовании не опережало поиск.
+        """
+        self.client.indices.refresh(index=index_name)
+        response = self.client.update_by_query(
+            index=index_name,
+            query={"ids": {"values": doc_ids}},
+            script={
+                "source": RENAME_SCRIPT,
+                "lang": "painless",
+                "params": {"names": names, "name_field": rename.name_field, "names_fields": rename.names_fields},
+            },
+            slices="auto",
+            conflicts="abort",
+            refresh=True,
+        )
+        return response["updated"]
+
     @staticmethod
-    def _row_generator(data: tuple) -> Generator[dict[str, Any], None, None]:
-        """Генератор строк для формирования пачки записей"""
+    def _row_generator(data: tuple, fields: set[str] | None = None) -> Generator[dict[str, Any], None, None]:
+        """Генератор строк для формирования пачки записей, при указании fields - частичное обновление документов"""
         for row in data:
-            yield {"_id": str(row.id), "_source": row.model_dump()}
+            if fields:
+                yield {"_op_type": "update", "_id": str(row.id), "doc": row.model_dump(include=fields)}
+            else:
+                yield {"_id": str(row.id), "_source": row.model_dump()}
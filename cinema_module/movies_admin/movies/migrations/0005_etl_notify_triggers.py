@@ -0,0 +1,35 @@
+from django.db import migrations
+
+ETL_NOTIFY_CHANNEL = "etl_changes"
+ETL_NOTIFY_TABLES = ("film_work", "person", "genre", "genre_film_work", "person_film_work", "subscription_film_work")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("movies", "0004_modified_id_indexes"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="CREATE OR REPLACE FUNCTION content.etl_notify_changes() RETURNS trigger AS "
+                "$$ "
+                "BEGIN "
+                "PERFORM pg_notify(TG_ARGV[0], TG_TABLE_NAME); "
+                "RETURN NULL; "
+                "END; "
+                "$$ LANGUAGE plpgsql; ",
+            reverse_sql="DROP FUNCTION IF EXISTS content.etl_notify_changes();",
+        ),
+        *(
+            migrations.RunSQL(
+                sql=f"CREATE OR REPLACE TRIGGER etl_notify_{table} "
+                    "AFTER INSERT OR UPDATE OR DELETE "
+                    f"ON content.{table} "
+                    "FOR EACH STATEMENT "
+                    f"EXECUTE FUNCTION content.etl_notify_changes('{ETL_NOTIFY_CHANNEL}');",
+                reverse_sql=f"DROP TRIGGER IF EXISTS etl_notify_{table} ON content.{table};",
+            )
+            for table in ETL_NOTIFY_TABLES
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("movies", "0005_etl_notify_triggers"),
+    ]
+
+    operations = [
+        # Изменение подписок фильма обновляет film_work.modified, как и изменение его жанров и персон,
+        # поэтому ETL переносит фильм и сбрасывает кэш его частей. Триггер AFTER: его результат не
+        # влияет на саму операцию, в том числе на удаление
+        migrations.RunSQL(
+            sql="CREATE OR REPLACE TRIGGER updated_subscription_film_work "
+                "AFTER UPDATE OR INSERT OR DELETE "
+                "ON content.subscription_film_work "
+                "FOR EACH ROW "
+                "EXECUTE FUNCTION update_modified_filmwork();",
+            reverse_sql="DROP TRIGGER IF EXISTS updated_subscription_film_work ON content.subscription_film_work;",
+        ),
+    ]
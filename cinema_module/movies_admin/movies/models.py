@@ -34,6 +34,9 @@ class Genre(UUIDMixin, TimeStampedMixin):
         db_table = 'content"."genre'
         verbose_name = _("genre")
         verbose_name_plural = _("genres")
+        indexes = [
+            models.Index(fields=["modified", "id"], name="genre_modified_id_idx"),
+        ]
 
     def __str__(self):
         return f"{self.name}"
@@ -67,6 +70,7 @@ class FilmWork(UUIDMixin, TimeStampedMixin):
         ]
         indexes = [
             models.Index(fields=["creation_date"], name="film_work_creation_date_idx"),
+            models.Index(fields=["modified", "id"], name="film_work_modified_id_idx"),
         ]
 
     def __str__(self):
@@ -82,6 +86,7 @@ class Person(UUIDMixin, TimeStampedMixin):
         verbose_name_plural = _("actors")
         indexes = [
             models.Index(fields=["full_name"], name="person_full_name_idx"),
+            models.Index(fields=["modified", "id"], name="person_modified_id_idx"),
         ]
 
     def __str__(self):
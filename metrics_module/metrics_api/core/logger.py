@@ -1,7 +1,7 @@
 import logging
 
 from core.config import settings
-from fastapi import Request
+from core.request_context import request_id_var
 
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 LOG_DEFAULT_HANDLERS = ["console"]
@@ -9,18 +9,20 @@ LOGGER_NAME = settings.app.project_name.replace(" ", "_").lower()
 
 
 class RequestIdFilter(logging.Filter):
-    def __init__(self, request: Request, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.request = request
+    """Добавление в запись лога X-Request-Id запроса, в контексте которого она создана.
+
+    Подключается к обработчикам один раз через LOGGING.
+    """
 
     def filter(self, record):
-        record.request_id = self.request.headers.get("X-Request-Id")
+        record.request_id = request_id_var.get()
         return True
 
 
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
+    "filters": {"request_id": {"()": RequestIdFilter}},
     "formatters": {
         "verbose": {"format": LOG_FORMAT},
         "default": {
@@ -37,16 +39,19 @@ LOGGING = {
         "console": {
             "level": "DEBUG",
             "class": "logging.StreamHandler",
+            "filters": ["request_id"],
             "formatter": "verbose",
         },
         "default": {
             "formatter": "default",
             "class": "logging.StreamHandler",
+            "filters": ["request_id"],
             "stream": "ext://sys.stdout",
         },
         "access": {
             "formatter": "access",
             "class": "logging.StreamHandler",
+            "filters": ["request_id"],
             "stream": "ext://sys.stdout",
         },
     },
@@ -77,6 +82,7 @@ if settings.logstash.enable:
     LOGGING = {
         "version": 1,
         "disable_existing_loggers": False,
+        "filters": {"request_id": {"()": RequestIdFilter}},
         "formatters": {
             "verbose": {"format": LOG_FORMAT},
             "default": {
@@ -93,21 +99,25 @@ if settings.logstash.enable:
             "console": {
                 "level": "INFO",
                 "class": "logging.StreamHandler",
+                "filters": ["request_id"],
                 "formatter": "verbose",
             },
             "default": {
                 "formatter": "default",
                 "class": "logging.StreamHandler",
+                "filters": ["request_id"],
                 "stream": "ext://sys.stdout",
             },
             "access": {
                 "formatter": "access",
                 "class": "logging.StreamHandler",
+                "filters": ["request_id"],
                 "stream": "ext://sys.stdout",
             },
             "logstash": {
                 "level": "INFO",
                 "class": "logstash.LogstashHandler",
+                "filters": ["request_id"],
                 "host": settings.logstash.host,
                 "port": settings.logstash.port,
                 "version": 1,
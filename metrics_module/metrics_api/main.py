@@ -1,4 +1,3 @@
-import logging
 from contextlib import asynccontextmanager
 from logging import config as logging_config
 
@@ -11,7 +10,8 @@ from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
 from api.v1 import metrics
 from core import broker
 from core.config import settings
-from core.logger import LOGGING, RequestIdFilter
+from core.logger import LOGGING
+from core.request_context import RequestContextMiddleware
 
 if settings.sentry.dsn:
     sentry_sdk.init(**settings.sentry.model_dump())
@@ -56,12 +56,7 @@ async def before_request(request: Request, call_next):
     return response
 
 
-@app.middleware("http")
-async def add_log_filter(request: Request, call_next):
-    for log_type in ("access", "error"):
-        logger = logging.getLogger("uvicorn.%s" % (log_type,))
-        logger.addFilter(RequestIdFilter(request))
-    return await call_next(request)
+app.add_middleware(RequestContextMiddleware)
 
 
 @app.get("/healthcheck")
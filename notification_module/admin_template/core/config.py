@@ -71,6 +71,20 @@ class MongoDBSettings(BaseSettings):
     dsn: str
 
 
+class HttpClientSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="http_client_")
+    limit: int = 100
+    limit_per_host: int = 20
+    dns_cache_ttl: int = 300
+    keepalive_timeout: float = 30
+    timeout: float = 10
+    connect_timeout: float = 3
+    retries: int = 2
+    retry_backoff: float = 0.1
+    retry_budget_ratio: float = 0.2
+    retry_budget_max: float = 10
+
+
 class AppSettings:
     tracer_enable = bool(int(os.getenv("TRACER_ENABLE")))
     auth = AuthSettings()
@@ -82,6 +96,7 @@ class AppSettings:
     jaeger = JaegerSetting()
     sentry = SentrySettings()
     celery = CelerySettings()
+    http_client = HttpClientSettings()
     logstash = LogstashSettings()
     service_role: str = "service"
 
@@ -2,9 +2,10 @@ import asyncio
 import logging
 from uuid import UUID
 
-import aiohttp
 from celery import Celery
+from celery.signals import worker_process_shutdown
 
+from core import http_client
 from core.config import settings
 
 celery_event_loop = asyncio.new_event_loop()
@@ -18,6 +19,19 @@ celery_app.autodiscover_tasks()
 logger = logging.getLogger(__name__)
 
 
+async def get_worker_http_client() -> http_client.HttpClient:
+    """Пул соединений процесса воркера, создается в цикле событий celery при первой задаче"""
+    if http_client.http_client is None:
+        http_client.http_client = http_client.HttpClient(**settings.http_client.model_dump())
+    return http_client.http_client
+
+
+@worker_process_shutdown.connect
+def close_worker_http_client(**kwargs):
+    if http_client.http_client is not None:
+        celery_event_loop.run_until_complete(http_client.http_client.close())
+
+
 async def send_message_to_entity_once(
     entity_id: UUID,
     pattern_id: UUID,
@@ -42,14 +56,14 @@ async def send_message_to_entity_once(
         return
     dict_key = "user_id" if send_to == "user" else "role_id"
     params.update({dict_key: entity_id})
+    client = await get_worker_http_client()
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(  # noqa
-                url=settings.celery.notification_user if send_to == "user" else settings.celery.notification_group,
-                params=params,
-                headers=headers,
-            ):
-                pass
+        async with client.post(  # noqa
+            url=settings.celery.notification_user if send_to == "user" else settings.celery.notification_group,
+            params=params,
+            headers=headers,
+        ):
+            pass
     except Exception as error:
         logger.error("Something went wrong: %s" % error)
     else:
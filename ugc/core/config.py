@@ -59,6 +59,20 @@ class MongoDBSettings(BaseSettings):
     dsn: MongoDsn
 
 
+class HttpClientSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="http_client_")
+    limit: int = 100
+    limit_per_host: int = 20
+    dns_cache_ttl: int = 300
+    keepalive_timeout: float = 30
+    timeout: float = 10
+    connect_timeout: float = 3
+    retries: int = 2
+    retry_backoff: float = 0.1
+    retry_budget_ratio: float = 0.2
+    retry_budget_max: float = 10
+
+
 class AppSettings:
     redis = RedisSettings()
     mongo_db = MongoDBSettings()
@@ -66,6 +80,7 @@ class AppSettings:
     logstash = LogstashSettings()
     jaeger = JaegerSetting()
     app = FastApiSettings()
+    http_client = HttpClientSettings()
     tracer_enable = bool(int(os.getenv("TRACER_ENABLE")))
     BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
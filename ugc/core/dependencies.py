@@ -1,3 +1,4 @@
+import asyncio
 from typing import Annotated
 from uuid import UUID
 
@@ -8,6 +9,7 @@ from opentelemetry import trace
 
 from api.v1.models import PaginatedParams
 from core.config import AppSettings
+from core.http_client import HttpClient, get_http_client
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=str(AppSettings.auth.login_redirect_url))
 
@@ -21,19 +23,19 @@ async def paginator_params_dep(
     return PaginatedParams(page_size=page_size, page_number=page_number)
 
 
-async def user_id_dep(request: Request, token=Depends(oauth2_scheme)) -> UUID:
+async def user_id_dep(
+    request: Request,
+    token=Depends(oauth2_scheme),
+    http_client: HttpClient = Depends(get_http_client),
+) -> UUID:
     with tracer.start_as_current_span("check-token-request"):
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{AppSettings.auth.base_url}user_id",
-                    headers={
-                        "Authorization": f"Bearer {token}",
-                        "x-request-id": request.headers.get("x-request-id"),
-                    },
-                ) as response:
-                    if response.status != status.HTTP_200_OK:
-                        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Auth Error")
-                    return UUID(await response.json())
-        except Exception:
+            async with http_client.get(
+                f"{AppSettings.auth.base_url}user_id",
+                headers={"Authorization": f"Bearer {token}"},
+            ) as response:
+                if response.status != status.HTTP_200_OK:
+                    raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Auth Error")
+                return UUID(await response.json())
+        except (aiohttp.ClientError, asyncio.TimeoutError):
             raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Auth service is not responding")
@@ -1,4 +1,3 @@
-import logging
 from contextlib import asynccontextmanager
 from logging import config as logging_config
 from typing import Any
@@ -14,8 +13,10 @@ from pymongo.errors import DuplicateKeyError
 from redis import asyncio as redis_async
 
 from api.v1 import film_timestamp, like, like_review, review
+from core import http_client
 from core.config import AppSettings
-from core.logger import RequestIdFilter, LOGGING
+from core.logger import LOGGING
+from core.request_context import RequestContextMiddleware, request_id_trace_config
 from create_index import create_indexes
 from db import review_db_client
 from services.exceptions import (
@@ -45,7 +46,12 @@ async def lifespan(app: FastAPI):  # type: ignore
     FastAPICache.init(RedisBackend(redis), prefix="fastapi-cache")
     review_db_client.db = AsyncIOMotorClient(str(app_settings.mongo_db.dsn))
     await create_indexes(review_db_client.db, [film_collection, timestamp_collection])
+    http_client.http_client = http_client.HttpClient(
+        **app_settings.http_client.model_dump(),
+        trace_configs=[request_id_trace_config()],
+    )
     yield
+    await http_client.http_client.close()
 
 
 tags_metadata = [
@@ -158,12 +164,7 @@ async def before_request(request: Request, call_next):
     return response
 
 
-@app.middleware("http")
-async def add_log_filter(request: Request, call_next):
-    for log_type in ("access", "error"):
-        logger = logging.getLogger("uvicorn.%s" % (log_type,))
-        logger.addFilter(RequestIdFilter(request))
-    return await call_next(request)
+app.add_middleware(RequestContextMiddleware)
 
 
 @app.get("/healthcheck")
@@ -171,4 +172,9 @@ async def health() -> Any:
     return  # noqa
 
 
-FastAPIInstrumentor.instrument_app(app, excluded_urls="healthcheck")
+@app.get("/http-client/stats")
+async def http_client_stats() -> Any:
+    return http_client.http_client.stats
+
+
+FastAPIInstrumentor.instrument_app(app, excluded_urls="healthcheck,http-client/stats")